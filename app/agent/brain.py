@@ -2,19 +2,82 @@ from app.database.connection import db_instance
 from app.utils.regex_spy import RegexSpy
 from app.agent.llm import llm_service
 from app.agent.planner import planner_service
+from app.core.executor import executor
+from app.core.jobs import job_queue
+from app.core.config import settings
+from app.database.unit_of_work import DUPLICATE_KEY, SessionUnitOfWork
+from app.database.backfill import build_update, count_key
+from app.agent.session_cache import SessionCache, CachedSession
+from app.agent.extraction_batcher import ExtractionBatcher
+from app.agent.canary import canary_service
+from pymongo import UpdateOne
+from pymongo.errors import BulkWriteError
+from app.utils import metrics
+import asyncio
 import time
+import weakref
 
 class AgentBrain:
+    # Intel keys that have their own dedicated fields under extracted_data
+    STANDARD_KEYS = ["upi", "bank_account", "ifsc", "phone", "url", "email", "suspicious_keywords"]
+
+    def __init__(self):
+        # Write-behind cache of hot sessions; evicted entries are flushed before they go
+        self.session_cache = SessionCache(
+            settings.SESSION_CACHE_SIZE, settings.SESSION_CACHE_TTL, on_evict=self._flush_evicted)
+        # One lock per live session: turns of the same conversation run one at a time
+        self._turn_locks = weakref.WeakValueDictionary()
+        # Background unknown-entity extraction, micro-batched across sessions
+        self.extraction_batcher = ExtractionBatcher(
+            extract=self._extract_unknown_batch,
+            apply=self.apply_background_intel,
+            batch_size=settings.EXTRACTION_BATCH_SIZE,
+            window=settings.EXTRACTION_BATCH_WINDOW,
+            max_chars=settings.EXTRACTION_BATCH_CHARS,
+            max_queue=settings.EXTRACTION_QUEUE_SIZE)
+        job_queue.register("summary", self.run_summarizer, concurrency=2)
+
     @property
     def sessions(self):
         return db_instance.get_collection("active_sessions")
 
+    @property
+    def turns(self):
+        """Append-only log of every turn; the session document only keeps the recent window."""
+        return db_instance.get_collection("session_turns")
+
+    def ensure_indexes(self):
+        """Run once at startup, so no turn waits on create_index."""
+        self.turns.create_index([("session_id", 1), ("turn", 1)])
+
     def get_or_create_session(self, session_id: str):
         """
         Retrieves existing session or creates a new one with the
         GRANULAR TRACKING schema.
         """
+        current_state, uow = self.load_session(session_id)
+        uow.flush()
+        return current_state
+
+    def load_session(self, session_id: str):
+        """
+        Like get_or_create_session, but a new session is not inserted yet:
+        returns (state, unit_of_work) and the insert happens with the turn's flush.
+        Served from the session cache when this worker already holds the conversation.
+        """
+        cached = self.session_cache.get(session_id)
+        if cached is not None:
+            return cached.state, cached.uow
+
         current_state = self.sessions.find_one({"_id": session_id})
+        if current_state:
+            if "turn_count" not in current_state:
+                self._externalize_history(current_state)
+            if "report" not in current_state:
+                self._seed_report(current_state)
+            uow = SessionUnitOfWork(self.sessions, session_id, version=current_state.get("version", 0))
+            self.session_cache.put(session_id, CachedSession(current_state, uow))
+            return current_state, uow
 
         if not current_state:
             # Pick a persona at start
@@ -38,6 +101,7 @@ class AgentBrain:
             
             current_state = {
                 "_id": session_id,
+                "version": 0,   # bumped on every write, for optimistic concurrency between workers
                 "created_at": time.time(),
                 "status": "ACTIVE",
                 "scam_confirmed": False,   
@@ -57,17 +121,197 @@ class AgentBrain:
                     }
                 },
                 "extracted_data": {
-                    "upi": [], "bank_account": [], "ip": None, "url": [], "dynamic_intel": [],
+                    "upi": [], "bank_account": [], "ip": [], "url": [], "dynamic_intel": [],
                     "phone": [], "ifsc": [], "email": [], "suspicious_keywords": []
                 },
-                "history": []
+                "history": [],      # last HISTORY_WINDOW turns only, see session_turns
+                "turn_count": 0,
+                "summary": "",      # rolling summary of turns [0, summary_upto)
+                "summary_upto": 0,
+                # Report fields kept up to date by each turn's write, so the GUVI report
+                # is a small projected read (see callback.REPORT_PROJECTION)
+                "report": self._report_fields(0, {}, None)
             }
-            self.sessions.insert_one(current_state)
             print(f"🧠 [BRAIN] Initialized new session: {session_id} with Persona: {selected_persona}")
             
-        return current_state
+        uow = SessionUnitOfWork(self.sessions, session_id, new_state=current_state, version=0)
+        self.session_cache.put(session_id, CachedSession(current_state, uow))
+        return current_state, uow
+
+    def _externalize_history(self, state):
+        """One-off move of a pre-window session's full history array into session_turns."""
+        history = state.get("history", [])
+        window = history[-settings.HISTORY_WINDOW:]
+        if history:
+            # _id derived from (session, turn): a second worker loading the same legacy session
+            # at the same time hits duplicate keys instead of copying every turn again
+            try:
+                self.turns.insert_many([
+                    {"_id": f"{state['_id']}:{i}", "session_id": state["_id"], "turn": i,
+                     "user": t.get("user"), "agent": t.get("agent"), "ts": None}
+                    for i, t in enumerate(history)
+                ], ordered=False)
+            except BulkWriteError as e:
+                if any(err.get("code") != DUPLICATE_KEY for err in e.details.get("writeErrors", [])):
+                    raise
+        # Guarded so two workers loading the same legacy session don't both trim it
+        self.sessions.update_one(
+            {"_id": state["_id"], "turn_count": {"$exists": False}},
+            {"$set": {"history": window, "turn_count": len(history)}}
+        )
+        state["history"], state["turn_count"] = window, len(history)
+        print(f"🧠 [BRAIN] Moved {len(history)} turns of {state['_id']} to session_turns")
+
+    @staticmethod
+    def _report_fields(turns: int, extracted: dict, focus, first_seen: float = None) -> dict:
+        now = time.time()
+        counts = {key: len(values) for key, values in extracted.items() if key != "dynamic_intel" and values}
+        for item in extracted.get("dynamic_intel") or []:
+            key = AgentBrain._count_key(item.get("type"))
+            counts[key] = counts.get(key, 0) + 1
+        return {
+            "messages": turns * 2,  # scammer + agent
+            "intel_counts": counts,  # distinct values extracted, per intel type
+            "first_seen": first_seen or now,
+            "last_seen": now,
+            "focus": focus,
+        }
+
+    def _seed_report(self, state):
+        """One-off: report fields for a session created before they were tracked per turn."""
+        report = self._report_fields(state.get("turn_count", 0), state.get("extracted_data") or {},
+                                     state.get("strategy_state", {}).get("detail_on_focus"), state.get("created_at"))
+        # Guarded like _externalize_history; no version bump, nothing else in the document changes
+        self.sessions.update_one({"_id": state["_id"], "report": {"$exists": False}}, {"$set": {"report": report}})
+        state["report"] = report
+
+    _count_key = staticmethod(count_key)
+
+    def get_transcript(self, session_id: str) -> list:
+        """Full conversation in order, read from the turn log."""
+        return list(self.turns.find(
+            {"session_id": session_id}, {"_id": 0, "user": 1, "agent": 1}
+        ).sort([("turn", 1), ("ts", 1)]))
+
+    def _prompt_history(self, state) -> list:
+        """Recent turns not yet covered by the rolling summary (what the prompt sends raw)."""
+        history = state["history"]
+        first_index = state.get("turn_count", len(history)) - len(history)
+        return history[max(0, state.get("summary_upto", 0) - first_index):]
+
+    async def _schedule_summary(self, session_id: str, state):
+        """Queues the summarizer once SUMMARY_EVERY turns have dropped out of the prompt window."""
+        unsummarized = state.get("turn_count", 0) - settings.PROMPT_TURNS - state.get("summary_upto", 0)
+        if unsummarized >= settings.SUMMARY_EVERY:
+            # One pending summary per session is enough: it covers every turn up to when it runs
+            await job_queue.enqueue("summary", {"session_id": session_id}, dedupe_key=f"summary:{session_id}")
+
+    async def _turns_between(self, state, start: int, end: int) -> list:
+        history = state["history"]
+        first_index = state.get("turn_count", len(history)) - len(history)
+        if start >= first_index:
+            return history[start - first_index:end - first_index]
+        # The summarizer fell further behind than the stored window: read the turn log
+        cursor = self.turns.find(
+            {"session_id": state["_id"], "turn": {"$gte": start, "$lt": end}}, {"_id": 0, "user": 1, "agent": 1}
+        ).sort("turn", 1)
+        return await executor.run(list, cursor)
+
+    async def run_summarizer(self, session_id: str):
+        """
+        Background: folds turns that left the prompt window into the session's rolling
+        summary. The LLM call runs outside the turn lock; the result is only applied if
+        nobody advanced the summary meanwhile.
+        """
+        async with self._turn_lock(session_id):
+            state, uow = await executor.run(self.load_session, session_id)
+            upto = state.get("summary_upto", 0)
+            target = state.get("turn_count", 0) - settings.PROMPT_TURNS
+            if target - upto < settings.SUMMARY_EVERY:
+                return
+            turns = await self._turns_between(state, upto, target)
+            previous = state.get("summary", "")
+
+        summary = await executor.run(llm_service.summarize_conversation, previous, turns)
+        if not summary:
+            # summary_upto stays put, so the job's retry (or the next one) folds the same turns
+            print(f"⚠️ [BRAIN] Summary of {session_id} turns {upto}-{target} failed; keeping them raw")
+            raise RuntimeError(f"Summary of {session_id} failed")
+
+        async with self._turn_lock(session_id):
+            state, uow = await executor.run(self.load_session, session_id)
+            if state.get("summary_upto", 0) != upto:
+                return
+            state["summary"], state["summary_upto"] = summary, target
+            uow.set("summary", summary)
+            uow.set("summary_upto", target)
+            await self._commit(session_id, uow)
+        print(f"📝 [BRAIN] Summarized {session_id} up to turn {target}")
+
+    def _turn_lock(self, session_id: str) -> asyncio.Lock:
+        lock = self._turn_locks.get(session_id)
+        if lock is None:
+            lock = self._turn_locks[session_id] = asyncio.Lock()
+        return lock
+
+    async def _commit(self, session_id: str, uow, force: bool = False):
+        """
+        End-of-turn write. With the cache on, changes are left for the periodic
+        flush (write-behind) unless forced or already older than the flush interval.
+        A version conflict means another worker wrote this session: drop our copy.
+        """
+        cached = self.session_cache.peek(session_id)
+        if cached is not None and cached.uow is uow and not force \
+                and time.time() - (uow.dirty_since or time.time()) < settings.SESSION_FLUSH_INTERVAL:
+            return
+        if not await executor.run(uow.flush):
+            print(f"⚠️ [BRAIN] Session {session_id} was changed by another worker. Reloading next turn.")
+            self.session_cache.invalidate(session_id, conflict=True)
+
+    def _flush_evicted(self, entry: CachedSession):
+        if not entry.uow.flush():
+            self.session_cache.invalidate(entry.uow.session_id, conflict=True)
+
+    async def flush_sessions(self, force: bool = False):
+        """Writes out cached sessions whose changes are older than the flush interval (all of them if forced)."""
+        older_than = 0.0 if force else settings.SESSION_FLUSH_INTERVAL
+        for session_id in self.session_cache.dirty(older_than):
+            await self.flush_session(session_id)
+        await executor.run(self.session_cache.expire)
+
+    async def flush_session(self, session_id: str):
+        """Writes out one session's pending changes now (e.g. before reading it for a report)."""
+        async with self._turn_lock(session_id):
+            cached = self.session_cache.peek(session_id)
+            if cached is not None:
+                await self._commit(session_id, cached.uow, force=True)
+
+    async def flush_loop(self):
+        """Background write-behind loop, started with the app."""
+        while True:
+            await asyncio.sleep(settings.SESSION_FLUSH_INTERVAL)
+            try:
+                await self.flush_sessions()
+            except Exception as e:
+                print(f"❌ [BRAIN] Session flush failed: {e}")
+
+    async def process_turn(self, session_id: str, incoming_text: str) -> str:
+        """
+        Runs one turn. Turns of the same session are serialized in this worker so
+        the cached state and its pending writes are never shared by two turns;
+        across workers, the document version catches anyone who got there first.
+        Each stage is timed into a per-turn trace (see app/utils/metrics.py).
+        """
+        with metrics.trace_turn(session_id):
+            lock = self._turn_lock(session_id)
+            with metrics.span("lock_wait"):
+                await lock.acquire()
+            try:
+                return await self._run_turn(session_id, incoming_text)
+            finally:
+                lock.release()
 
-    def process_turn(self, session_id: str, incoming_text: str, background_tasks=None) -> str:
+    async def _run_turn(self, session_id: str, incoming_text: str) -> str:
         """
         Orchestrates the entire turn:
         1. Load State
@@ -76,128 +320,295 @@ class AgentBrain:
         4. Plan (Strategy)
         5. Generate (LLM)
         6. Update History
+
+        Every blocking Mongo/Groq call is awaited on the bounded executor so the
+        event loop keeps serving other sessions while this one waits.
+
+        Stages are started as soon as their inputs exist rather than in listing order:
+        the regex tier of extraction only needs the message, so it runs alongside the
+        scam check.
+        The critical path is classify -> plan -> generate -> safety.
+
+        Mongo sees at most two round-trips per turn: the load, and one flush of every
+        change the turn buffered on its unit of work (insert for a new session).
+        With the session cache, hot sessions skip the load and several turns share a flush.
         """
-        state = self.get_or_create_session(session_id)
-        
+        with metrics.span("load"):
+            state, uow = await executor.run(self.load_session, session_id)
         
+        # Extraction depends on nothing but the message. Its regex tier is cheap, so it starts
+        # speculatively and overlaps classify_scam; the result is discarded if the message turns
+        # out SAFE. The LLM tier costs a Groq call and waits until the scam is confirmed.
+        regex_tier = asyncio.ensure_future(executor.run(llm_service.extract_regex_tier, incoming_text))
         
         # --- 2. SCAM CHECK ---
         if not state["scam_confirmed"]:
-            is_scam = llm_service.classify_scam(incoming_text)
+            with metrics.span("classify"):
+                is_scam = await executor.run(llm_service.classify_scam, incoming_text)
             if is_scam:
                 state["scam_confirmed"] = True
-                state["persona_locked"] = llm_service.generate_persona(incoming_text)  # lock persona at this point
-                self.sessions.update_one(
-                    {"_id": session_id},
-                    {"$set": {
-                        "scam_confirmed": True,
-                        "persona_locked": state["persona_locked"]}})
+                state["persona_locked"] = llm_service.generate_persona(incoming_text)  # lock persona at this point (local, no I/O)
+                uow.set("scam_confirmed", True)
+                uow.set("persona_locked", state["persona_locked"])
             else:
+                regex_tier.cancel()
                 # If NOT a scam yet, just chat normally
                 print(f"ℹ️ [BRAIN] No scam detected yet. Chatting normally.")
-                reply = llm_service.generate_response(
-                    state["history"], 
-                    state["persona_locked"],     
-                    "",    
-                    incoming_text,
-                    state["scam_confirmed"]
-                )
-                self.save_interaction(session_id, incoming_text, reply)
+                metrics.TURNS.inc(path="normal")
+                with metrics.span("generate"):
+                    reply = await executor.run(
+                        llm_service.generate_response,
+                        self._prompt_history(state), 
+                        state["persona_locked"],     
+                        "",    
+                        incoming_text,
+                        state["scam_confirmed"],
+                        state.get("summary", "")
+                    )
+                self.save_interaction(state, incoming_text, reply, uow)
+                with metrics.span("commit"):
+                    await self._commit(session_id, uow)
+                await self._schedule_summary(session_id, state)
                 return reply
 
                 ##### add self correction logic here also 
         
         
         # If we are here, SCAM IS CONFIRMED.
-        # --- 1. EXTRACT INFORMATION (LLM Based) ---
-        # Replaces old RegexSpy logic
-        intel = llm_service.extract_information(incoming_text)
-        self._update_intelligence(state, intel)
+        metrics.TURNS.inc(path="scam")
+        # --- 1. EXTRACT INFORMATION (RegexSpy, LLM on miss) ---
+        # The regex tier has been in flight since the start of the turn; the LLM
+        # tier only runs when the regexes left entity-like text behind.
+        with metrics.span("extraction_wait"):
+            intel, needs_llm = await regex_tier
+            if needs_llm:
+                intel = await executor.run(llm_service.extract_llm_tier, incoming_text, intel)
+        self._update_intelligence(state, intel, uow)
 
         # --- 1.5. SPY: Background LLM Extraction ---
-        # We run this in background so we don't block the main response
-        if background_tasks:
-            background_tasks.add_task(self.run_background_extraction, session_id, incoming_text)
-        else:
-            # Fallback if no background tasks provided (e.g. testing), run sync or skip? 
-            # Ideally skip or run sync. Letting it run sync for safety if needed, or just skip to keep speed.
-            # Choosing to just print warning and skip to maintain speed as requested.
-            print("⚠️ [BRAIN] No background_tasks object provided. Skipping LLM extraction.")
+        # Queued so we don't block the main response; the batcher folds messages
+        # from many sessions into one LLM request.
+        if not self.extraction_batcher.submit(session_id, incoming_text):
+            print("⚠️ [BRAIN] Extraction batcher not running or full. Skipping LLM extraction.")
 
         ####3 check whether to stop or not 
 
         # --- 3. PLAN STRATEGY ---
-        plan = planner_service.update_and_get_focus(state, incoming_text)
+        with metrics.span("plan"):
+            plan = planner_service.update_and_get_focus(state, incoming_text)
         
-        # Save updated plan state to DB
-        self.sessions.update_one(
-            {"_id": session_id},
-            {"$set": {
-                "strategy_state.targets": plan["targets"],
-                "strategy_state.detail_on_focus": plan["detail_on_focus"]
-            }}
-        )
+        # Save updated plan state (written with the rest of the turn)
+        state["strategy_state"]["detail_on_focus"] = plan["detail_on_focus"]
+        uow.set("strategy_state.targets", plan["targets"])
+        uow.set("strategy_state.detail_on_focus", plan["detail_on_focus"])
+        state["report"]["focus"] = plan["detail_on_focus"]
+        uow.set("report.focus", plan["detail_on_focus"])
         
-        # --- 4. GENERATE RESPONSE ---
-        reply = llm_service.generate_response(
-            state["history"],
-            state["persona_locked"],
-            plan["instruction"],
-            incoming_text,
-            state["scam_confirmed"]
-        )
-        
-        # --- 5. SAFETY CHECK ---
-        # If unsafe, regenerate once with a warning (simple retry)
-        if not llm_service.safety_check(reply):
-            print("⚠️ [BRAIN] Unsafe reply detected. Regenerating...")
-            reply = llm_service.generate_response(   # implement a threshhold of say 3 
-                state["history"],
-                state["persona_locked"],
-                "Previous reply was unsafe. Be safer." + plan["instruction"],   # update with the  error from safety check 
-                incoming_text,
-                state["scam_confirmed"]
-            )
+        # The "ip" objective needs something to click: this session's canary link
+        instruction, link = plan["instruction"], None
+        if plan["detail_on_focus"] == "ip":
+            link = canary_service.link_for(state, uow)
+            instruction = planner_service.get_canary_instruction(link)
+
+        # --- 4. GENERATE RESPONSE + 5. SAFETY CHECK ---
+        with metrics.span("generate"):
+            reply = await self._generate_safe_reply(state, instruction, incoming_text, plan["detail_on_focus"], link)
+        if link and link not in reply:
+            # The model paraphrased or dropped the link; the objective only works with the exact URL
+            reply = f"{reply} {link}"
 
         # --- 6. SAVE INTERACTION ---
-        self.save_interaction(session_id, incoming_text, reply)
+        # Single write for the whole turn (deferred while the session stays cached)
+        self.save_interaction(state, incoming_text, reply, uow)
+        # The mission stays complete on every later turn; only the first of them reports
+        report_due = planner_service.is_mission_complete(state) and not state.get("report_status")
+        if report_due:
+            state["report_status"] = "queued"
+            uow.set("report_status", "queued")
+        # The report reads the session from Mongo, so it must be written out first
+        with metrics.span("commit"):
+            await self._commit(session_id, uow, force=report_due)
+        await self._schedule_summary(session_id, state)
         
         # --- 7. AUTO-REPORT? ---
         # Check if we are done with the mission
-        if planner_service.is_mission_complete(state):
+        if report_due:
             print(f"🏁 [BRAIN] Mission Complete for session {session_id}. Triggering report.")
-            # We import here to avoid circular dependency if any (just in case)
-            from app.api.callback import submit_report
-            submit_report(session_id)
+            # Sent by a report worker (retried if GUVI is down); the turn doesn't wait for it
+            with metrics.span("report"):
+                await job_queue.enqueue("report", {"session_id": session_id}, dedupe_key=f"report:{session_id}")
 
         return reply
 
-    def run_background_extraction(self, session_id: str, text: str):
+    async def _generate_safe_reply(self, state, instruction: str, incoming_text: str, focus=None, link=None) -> str:
         """
-        Runs the LLM-based entity extraction in the background.
+        Generates the reply and safety-checks it.
+        With REPLY_CANDIDATES > 1 the candidates are generated in parallel and each is
+        checked as soon as it arrives; the first one that passes is returned, so an
+        unsafe draft no longer costs a second full generation on the hot path.
+        While the generation circuit is open a canned stalling reply is used instead.
         """
-        # Get known keys from RegexSpy to pass to LLM
-        known_keys = list(RegexSpy.REGEX_PATTERNS.keys())
-        known_keys_str = ",".join(known_keys)
-        
-        print(f"🕵️ [BRAIN] Starting background LLM extraction for session {session_id}...")
-        
-        extra_intel = llm_service.extract_unknown_entities(text, known_keys_str)
-        
-        if extra_intel:
-            # We need to fetch fresh state or just update blindly?
-            # Better to fetch fresh state to ensure we append correctly, or use $addToSet in Mongo
-            # Using _update_intelligence logic but adapting for direct DB update since 'state' might be stale
+        if llm_service.is_degraded("gen"):
+            print("🔌 [BRAIN] LLM unavailable, sending a stalling reply")
+            return planner_service.get_stalling_reply(focus, link, persona=state["persona_locked"])
+
+        def generate(objective):
+            return executor.run(
+                llm_service.generate_response,
+                self._prompt_history(state),
+                state["persona_locked"],
+                objective,
+                incoming_text,
+                state["scam_confirmed"],
+                state.get("summary", "")
+            )
+
+        async def generate_and_check():
+            reply = await generate(instruction)
+            return reply, await executor.run(llm_service.safety_check, reply)
+
+        candidates = [asyncio.ensure_future(generate_and_check()) for _ in range(max(1, settings.REPLY_CANDIDATES))]
+        try:
+            for finished in asyncio.as_completed(candidates):
+                reply, is_safe = await finished
+                if is_safe:
+                    return reply
+        finally:
+            # Late candidates are no longer needed once one has passed
+            for candidate in candidates:
+                candidate.cancel()
+
+        # If every candidate was unsafe, regenerate once with a warning (simple retry)
+        print("⚠️ [BRAIN] Unsafe reply detected. Regenerating...")
+        return await generate("Previous reply was unsafe. Be safer." + instruction)   # update with the  error from safety check 
+
+    def _extract_unknown_batch(self, messages):
+        """Runs on the executor: one LLM request for a batch of [(message_id, text), ...]."""
+        known_keys_str = ",".join(RegexSpy.REGEX_PATTERNS.keys())
+        return llm_service.extract_unknown_entities_batch(messages, known_keys_str)
+
+    async def apply_background_intel(self, found):
+        """
+        Writes a batch of background findings, {session_id: [intel, ...]}.
+        Sessions this worker holds in its cache get the findings folded into their
+        cached state (written with their next flush); all others share one unordered
+        bulk_write of the same pipeline updates the backfill uses. No re-fetch and no
+        upsert: Mongo unions the values into the stored lists and recounts
+        report.intel_counts from them atomically, and the version bump makes any cached
+        copy elsewhere reload.
+        """
+        ops = []
+        for session_id, intel_list in found.items():
+            intel = {}
+            for item in intel_list:
+                for key, values in item.items():
+                    intel.setdefault(key, []).extend(v for v in values if v not in intel[key])
+
+            cached = self.session_cache.peek(session_id)
+            if cached is not None:
+                async with self._turn_lock(session_id):
+                    cached = self.session_cache.peek(session_id)
+                    if cached is not None:
+                        # This worker owns the session: fold the findings into its cached state
+                        self._update_intelligence(cached.state, intel, cached.uow)
+                        continue
+            updates, clean = self._build_intel_update(intel)
+            if updates:
+                ops.append(UpdateOne({"_id": session_id}, build_update(clean)))
+
+        if ops:
+            await executor.run(self.sessions.bulk_write, ops, ordered=False)
+        print(f"✅ [BRAIN] Background extraction applied to {len(found)} sessions ({len(ops)} via bulk write)")
+
+    async def record_canary_hit(self, session_id: str, ip: str, user_agent: str):
+        """
+        Adds a canary visitor's IP and user agent to the session's extracted_data.ip /
+        extracted_data.user_agent, which completes the planner's "ip" objective.
+        A session cached by this worker is updated in memory and written with its next
+        flush; otherwise one atomic pipeline update unions the values in ($ifNull covers
+        sessions created when extracted_data.ip started out as null).
+        """
+        cached = self.session_cache.peek(session_id)
+        if cached is not None:
+            async with self._turn_lock(session_id):
+                cached = self.session_cache.peek(session_id)
+                if cached is not None:
+                    data = cached.state.setdefault("extracted_data", {})
+                    for field, value in (("ip", ip), ("user_agent", user_agent)):
+                        values = data.get(field) or []
+                        if value not in values:
+                            values = values + [value]
+                            if field == "ip":
+                                counts = cached.state.setdefault("report", {}).setdefault("intel_counts", {})
+                                counts["ip"] = counts.get("ip", 0) + 1
+                                cached.uow.inc("report.intel_counts.ip")
+                        data[field] = values
+                        # Whole-list $set: $addToSet fails on the null of older documents
+                        cached.uow.set(f"extracted_data.{field}", values)
+                    return
+        ips = {"$setUnion": [{"$ifNull": ["$extracted_data.ip", []]}, [ip]]}
+        await executor.run(self.sessions.update_one, {"_id": session_id}, [{"$set": {
+            "extracted_data.ip": ips,
+            "extracted_data.user_agent": {"$setUnion": [{"$ifNull": ["$extracted_data.user_agent", []]}, [user_agent]]},
+            "report.intel_counts.ip": {"$size": ips},
+            "version": {"$add": [{"$ifNull": ["$version", 0]}, 1]},
+        }}])
+
+    def _update_intelligence(self, state, intel, uow=None):
+        """
+        Updates internal state with findings from RegexSpy.
+        With a unit of work the Mongo update is buffered for the turn's flush,
+        otherwise it is written straight away.
+        """
+        updates, intel = self._build_intel_update(intel)
+
+        if updates:
+            # Distinct values this update adds, per type, for the report counters
+            counts = self._new_intel_counts(state.get("extracted_data", {}), intel)
+            if counts:
+                updates["$inc"] = {f"report.intel_counts.{key}": n for key, n in counts.items()}
+                report_counts = state.setdefault("report", {}).setdefault("intel_counts", {})
+                for key, n in counts.items():
+                    report_counts[key] = report_counts.get(key, 0) + n
+
+            # Perform the atomic update
+            if uow is not None:
+                uow.merge(updates)
+            else:
+                self.sessions.update_one({"_id": state["_id"]}, updates)
             
-            # Re-fetch state just to be safe and reuse _update_intelligence logic cleanly
-            state = self.get_or_create_session(session_id)
-            self._update_intelligence(state, extra_intel)
-            print(f"✅ [BRAIN] Background extraction complete. Found: {extra_intel.keys()}")
-        else:
-            print(f"ℹ️ [BRAIN] Background extraction finished. Nothing new found.")
-
-    def _update_intelligence(self, state, intel):
-        """Updates internal state with findings from RegexSpy."""
+            # Manually update the local state object so the rest of the turn sees it
+            for key, new_values in intel.items():
+                if key in self.STANDARD_KEYS:
+                    existing = state["extracted_data"].get(key, [])
+                    combined = list(set(existing + new_values))
+                    state["extracted_data"][key] = combined
+                else:
+                    # For dynamic intel, create objects and append
+                    existing = state["extracted_data"].get("dynamic_intel", [])
+                    new_objs = [{"type": key, "value": v} for v in new_values]
+                    
+                    # Simple duplication check locally
+                    for obj in new_objs:
+                        if obj not in existing:
+                            existing.append(obj)
+                    state["extracted_data"]["dynamic_intel"] = existing
+
+    def _new_intel_counts(self, extracted: dict, intel: dict) -> dict:
+        """{intel type: number of values not already in `extracted`}"""
+        counts = {}
+        dynamic = extracted.get("dynamic_intel") or []
+        for key, values in intel.items():
+            if key in self.STANDARD_KEYS:
+                new = set(values) - set(extracted.get(key) or [])
+            else:
+                new = {v for v in values if {"type": key, "value": v} not in dynamic}
+            if new:
+                counts[self._count_key(key)] = len(new)
+        return counts
+
+    def _build_intel_update(self, intel):
+        """Normalizes raw intel and builds the $addToSet update for it. Returns (updates, clean_intel)."""
         
         # --- NORMALIZE INTEL ---
         # LLM might return None (null) or single values. Conver strictly to lists.
@@ -218,16 +629,13 @@ class AgentBrain:
         updates = {}
         has_new_data = False
         
-        # Define standard keys that have their own dedicated fields
-        STANDARD_KEYS = ["upi", "bank_account", "ifsc", "phone", "url", "email", "suspicious_keywords"]
-        
         # Accumulate dynamic objects to avoid overwriting the update key
         all_dynamic_objects = []
 
         for key, new_values in intel.items():
             if not new_values: continue
             
-            if key in STANDARD_KEYS:
+            if key in self.STANDARD_KEYS:
                 # Standard field logic
                 db_key = key
                 if f"$addToSet" not in updates:
@@ -251,33 +659,26 @@ class AgentBrain:
                 updates["$addToSet"] = {}
             updates["$addToSet"]["extracted_data.dynamic_intel"] = {"$each": all_dynamic_objects}
 
-        if has_new_data:
-            # Perform the atomic update
-            self.sessions.update_one({"_id": state["_id"]}, updates)
-            
-            # Manually update the local state object so the rest of the turn sees it
-            for key, new_values in intel.items():
-                if key in STANDARD_KEYS:
-                    existing = state["extracted_data"].get(key, [])
-                    combined = list(set(existing + new_values))
-                    state["extracted_data"][key] = combined
-                else:
-                    # For dynamic intel, create objects and append
-                    existing = state["extracted_data"].get("dynamic_intel", [])
-                    new_objs = [{"type": key, "value": v} for v in new_values]
-                    
-                    # Simple duplication check locally
-                    for obj in new_objs:
-                        if obj not in existing:
-                            existing.append(obj)
-                    state["extracted_data"]["dynamic_intel"] = existing
+        return (updates if has_new_data else {}), intel
 
-    def save_interaction(self, session_id, user_text, agent_text):
-        """Saves the chat turn to history"""
-        self.sessions.update_one(
-            {"_id": session_id},
-            {"$push": {"history": {"user": user_text, "agent": agent_text}}}
-        )
+    def save_interaction(self, state, user_text, agent_text, uow):
+        """
+        Saves the chat turn (buffered on the turn's unit of work): appended to the
+        session_turns log, and to the session's capped recent-turns window.
+        """
+        turn = {"user": user_text, "agent": agent_text}
+        turn_index = state.get("turn_count", 0)
+        uow.append(self.turns, {"session_id": state["_id"], "turn": turn_index, **turn, "ts": time.time()})
+
+        state["history"] = (state["history"] + [turn])[-settings.HISTORY_WINDOW:]
+        state["turn_count"] = turn_index + 1
+        uow.push("history", turn, slice=settings.HISTORY_WINDOW)
+        uow.inc("turn_count")
+        report = state.setdefault("report", {})
+        report["messages"] = report.get("messages", 0) + 2
+        report["last_seen"] = time.time()
+        uow.inc("report.messages", 2)
+        uow.set("report.last_seen", report["last_seen"])
 
 # Create a global instance to be imported by routes
 brain_service = AgentBrain()
\ No newline at end of file
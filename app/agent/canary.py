@@ -0,0 +1,129 @@
+import base64
+import hashlib
+import hmac
+import secrets
+import threading
+import time
+from collections import OrderedDict
+
+from app.core.config import settings
+from app.database.connection import db_instance
+
+
+class CanaryService:
+    """
+    Per-session canary links for the "ip" objective.
+
+    A token is a random nonce followed by a truncated HMAC of that nonce, so the
+    tracker can reject scanner noise and guessed paths without any lookup. Valid
+    tokens map to their session through an in-memory LRU, backed by the
+    `canary_tokens` collection (token as _id) for tokens minted by other workers
+    or before a restart.
+    """
+    NONCE_CHARS = 8
+    SIG_CHARS = 10
+    TOKEN_CHARS = NONCE_CHARS + SIG_CHARS
+
+    def __init__(self, secret: str, base_url: str, max_entries: int):
+        if not secret:
+            print("⚠️ [CANARY] CANARY_SECRET not set; using a random one. Links minted now won't verify "
+                  "after a restart or on other workers")
+            secret = secrets.token_hex(32)
+        self.secret = secret.encode()
+        self.base_url = base_url.rstrip("/")
+        self.max_entries = max_entries
+        self.tokens = OrderedDict()  # token -> session_id
+        # (session_id, ip, user_agent) already recorded, so repeat hits skip the session write
+        self.seen = OrderedDict()
+        self.lock = threading.Lock()
+        self.stats = {"minted": 0, "hits": 0, "attributed": 0, "rejected": 0, "db_lookups": 0, "new_sightings": 0}
+
+    @property
+    def collection(self):
+        return db_instance.get_collection("canary_tokens")
+
+    def ensure_indexes(self):
+        """Run once at startup, so no request waits on create_index."""
+        self.collection.create_index("session_id")
+        db_instance.get_collection("honey_hits").create_index([("session_id", 1), ("timestamp", 1)])
+
+    def _sign(self, nonce: str) -> str:
+        digest = hmac.new(self.secret, nonce.encode(), hashlib.sha256).digest()
+        return base64.urlsafe_b64encode(digest).decode()[:self.SIG_CHARS]
+
+    def verify(self, token: str) -> bool:
+        if len(token) != self.TOKEN_CHARS:
+            return False
+        nonce, sig = token[:self.NONCE_CHARS], token[self.NONCE_CHARS:]
+        return hmac.compare_digest(self._sign(nonce), sig)
+
+    def _remember(self, token: str, session_id: str):
+        with self.lock:
+            self.tokens[token] = session_id
+            self.tokens.move_to_end(token)
+            while len(self.tokens) > self.max_entries:
+                self.tokens.popitem(last=False)
+
+    def link_for(self, state: dict, uow) -> str:
+        """The session's canary link, minting its token on first use (stored with the turn's flush)."""
+        token = state.get("canary_token")
+        if not token:
+            nonce = secrets.token_urlsafe(self.NONCE_CHARS)[:self.NONCE_CHARS]
+            token = nonce + self._sign(nonce)
+            state["canary_token"] = token
+            uow.set("canary_token", token)
+            uow.append(self.collection, {"_id": token, "session_id": state["_id"], "created_at": time.time()})
+            self.stats["minted"] += 1
+        self._remember(token, state["_id"])
+        return f"{self.base_url}/r/{token}/receipt.pdf"
+
+    def token_from_path(self, path: str):
+        """First path segment that is a validly signed token, e.g. "r/<token>/receipt.pdf". CPU only."""
+        self.stats["hits"] += 1
+        for segment in path.split("/"):
+            if len(segment) == self.TOKEN_CHARS and self.verify(segment):
+                return segment
+        self.stats["rejected"] += 1
+        return None
+
+    def cached_session(self, token: str):
+        """Session id for a verified token if it is in memory (no I/O), else None."""
+        with self.lock:
+            session_id = self.tokens.get(token)
+        if session_id is not None:
+            self.stats["attributed"] += 1
+        return session_id
+
+    def resolve(self, token: str):
+        """Session id a verified token belongs to, or None. Blocking on a cache miss (one _id lookup)."""
+        with self.lock:
+            session_id = self.tokens.get(token)
+        if session_id is None:
+            self.stats["db_lookups"] += 1
+            doc = self.collection.find_one({"_id": token}, {"session_id": 1})
+            if doc is None:
+                return None
+            session_id = doc["session_id"]
+            self._remember(token, session_id)
+        self.stats["attributed"] += 1
+        return session_id
+
+    def first_sighting(self, session_id: str, ip: str, user_agent: str) -> bool:
+        """True the first time this visitor hits this session's link (bounded memory)."""
+        key = (session_id, ip, user_agent)
+        with self.lock:
+            if key in self.seen:
+                self.seen.move_to_end(key)
+                return False
+            self.seen[key] = True
+            while len(self.seen) > self.max_entries:
+                self.seen.popitem(last=False)
+        self.stats["new_sightings"] += 1
+        return True
+
+    def snapshot(self) -> dict:
+        with self.lock:
+            return {"cached_tokens": len(self.tokens), **self.stats}
+
+
+canary_service = CanaryService(settings.CANARY_SECRET, settings.CANARY_BASE_URL, settings.CANARY_CACHE_SIZE)
@@ -0,0 +1,96 @@
+import threading
+import time
+from collections import deque
+
+
+class CircuitOpenError(Exception):
+    """Raised instead of calling a provider whose circuit is open."""
+    def __init__(self, name: str, retry_in: float):
+        super().__init__(f"Circuit '{name}' is open for another {retry_in:.1f}s")
+        self.name = name
+        self.retry_in = retry_in
+
+
+class CircuitBreaker:
+    """
+    Error-rate circuit breaker.
+    closed: calls flow, outcomes are tracked over a rolling time window.
+    open: once the failure rate over at least min_calls crosses the threshold,
+          calls are rejected for `cooldown` seconds.
+    half_open: after the cool-down one probe call is let through; success closes
+               the circuit, failure re-opens it.
+    """
+    def __init__(self, name: str, failure_rate: float, min_calls: int, window: float, cooldown: float):
+        self.name = name
+        self.failure_rate = failure_rate
+        self.min_calls = min_calls
+        self.window = window
+        self.cooldown = cooldown
+        self.state = "closed"
+        self.opened_at = 0.0
+        self.probe_in_flight = False
+        self.outcomes = deque()  # (timestamp, ok)
+        self.lock = threading.Lock()
+
+    def _prune(self, now):
+        while self.outcomes and self.outcomes[0][0] < now - self.window:
+            self.outcomes.popleft()
+
+    def allow(self) -> bool:
+        """Whether a call may go out now. In half-open state only a single probe is allowed."""
+        now = time.time()
+        with self.lock:
+            if self.state == "open" and now - self.opened_at >= self.cooldown:
+                self.state = "half_open"
+                self.probe_in_flight = False
+            if self.state == "closed":
+                return True
+            if self.state == "half_open" and not self.probe_in_flight:
+                self.probe_in_flight = True
+                return True
+            return False
+
+    def retry_in(self) -> float:
+        with self.lock:
+            return max(0.0, self.opened_at + self.cooldown - time.time())
+
+    def is_open(self) -> bool:
+        """True while calls are being short-circuited (open, or half-open with the probe out)."""
+        with self.lock:
+            if self.state == "open":
+                return time.time() - self.opened_at < self.cooldown
+            return self.state == "half_open" and self.probe_in_flight
+
+    def record_success(self):
+        now = time.time()
+        with self.lock:
+            if self.state == "half_open":
+                print(f"✅ [BREAKER] {self.name} recovered, closing circuit")
+                self.state = "closed"
+                self.outcomes.clear()
+            self.outcomes.append((now, True))
+            self._prune(now)
+
+    def record_failure(self):
+        now = time.time()
+        with self.lock:
+            if self.state == "half_open":
+                self._trip(now)
+                return
+            self.outcomes.append((now, False))
+            self._prune(now)
+            failures = sum(1 for _, ok in self.outcomes if not ok)
+            if self.state == "closed" and len(self.outcomes) >= self.min_calls \
+                    and failures / len(self.outcomes) >= self.failure_rate:
+                self._trip(now)
+
+    def _trip(self, now):
+        print(f"🔌 [BREAKER] {self.name} tripped, short-circuiting calls for {self.cooldown:.0f}s")
+        self.state = "open"
+        self.opened_at = now
+        self.probe_in_flight = False
+        self.outcomes.clear()
+
+    def snapshot(self) -> dict:
+        with self.lock:
+            return {"state": self.state, "recent_calls": len(self.outcomes)}
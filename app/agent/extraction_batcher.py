@@ -0,0 +1,98 @@
+import asyncio
+import time
+
+
+class ExtractionBatcher:
+    """
+    Micro-batches background entity extraction across sessions.
+    Turns drop (session_id, text) on a bounded queue; one loop collects up to
+    `batch_size` messages (or whatever arrived within `window` seconds of the
+    first one) and sends them to the LLM in a single JSON-mode request with
+    per-message IDs. Findings are grouped per session and handed to `apply`
+    in one call, so the writes can go out as one bulk_write.
+
+    extract(messages) -> {message_id: intel} runs on the executor;
+    apply({session_id: [intel, ...]}) is awaited on the loop.
+    """
+    def __init__(self, extract, apply, batch_size: int, window: float, max_chars: int, max_queue: int):
+        self.extract = extract
+        self.apply = apply
+        self.batch_size = batch_size
+        self.window = window
+        self.max_chars = max_chars
+        self.max_queue = max_queue
+        self.queue = None
+        self.running = False
+        self.stats = {"messages": 0, "batches": 0, "dropped": 0, "failed_batches": 0}
+
+    def submit(self, session_id: str, text: str) -> bool:
+        """Queues a message without waiting. False when the loop isn't running or the queue is full."""
+        if not self.running or not text:
+            return False
+        try:
+            self.queue.put_nowait((session_id, text))
+        except asyncio.QueueFull:
+            # Background enrichment only: shed it rather than slow the turn down
+            self.stats["dropped"] += 1
+            return False
+        return True
+
+    async def _next_batch(self):
+        """Waits for a first message, then gathers more until the size/char/time window closes."""
+        batch = [await self.queue.get()]
+        chars = len(batch[0][1])
+        deadline = time.monotonic() + self.window
+        while len(batch) < self.batch_size and chars < self.max_chars:
+            timeout = deadline - time.monotonic()
+            if timeout <= 0:
+                break
+            try:
+                item = await asyncio.wait_for(self.queue.get(), timeout)
+            except asyncio.TimeoutError:
+                break
+            batch.append(item)
+            chars += len(item[1])
+        return batch
+
+    async def process(self, batch, run):
+        """Extracts one batch (run = awaitable executor runner) and applies the findings."""
+        ids = {f"m{i}": session_id for i, (session_id, _) in enumerate(batch)}
+        messages = [(f"m{i}", text) for i, (_, text) in enumerate(batch)]
+        try:
+            results = await run(self.extract, messages)
+            found = {}
+            for message_id, intel in results.items():
+                if message_id in ids and intel:
+                    found.setdefault(ids[message_id], []).append(intel)
+            if found:
+                await self.apply(found)
+        except Exception as e:
+            self.stats["failed_batches"] += 1
+            print(f"❌ [EXTRACT] Batch of {len(batch)} messages failed: {e}")
+            return
+        self.stats["batches"] += 1
+        self.stats["messages"] += len(batch)
+        print(f"🕵️ [EXTRACT] Batch of {len(batch)} messages from {len(set(ids.values()))} sessions, "
+              f"findings for {len(found)}")
+
+    async def run(self, runner):
+        """Background loop, started with the app; runner(func, *args) awaits func off the loop."""
+        self.queue = asyncio.Queue(maxsize=self.max_queue)
+        self.running = True
+        try:
+            while True:
+                batch = await self._next_batch()
+                await self.process(batch, runner)
+        finally:
+            self.running = False
+
+    async def drain(self, runner):
+        """Processes whatever is still queued (shutdown, after the loop was cancelled)."""
+        self.running = False
+        if self.queue is None:
+            return
+        while not self.queue.empty():
+            batch = []
+            while not self.queue.empty() and len(batch) < self.batch_size:
+                batch.append(self.queue.get_nowait())
+            await self.process(batch, runner)
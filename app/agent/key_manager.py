@@ -0,0 +1,181 @@
+import re
+import threading
+import time
+
+from groq import Groq, DefaultHttpxClient
+
+from app.core.config import settings
+
+# Groq reports reset windows like "2m59.56s", "7.66s" or "120ms"
+_DURATION_PART = re.compile(r"(\d+(?:\.\d+)?)(ms|h|m|s)")
+_UNIT_SECONDS = {"h": 3600.0, "m": 60.0, "s": 1.0, "ms": 0.001}
+
+
+def parse_duration(value) -> float:
+    """Seconds from a Groq rate-limit reset / retry-after header value (0.0 if unparseable)."""
+    if value is None:
+        return 0.0
+    value = str(value).strip()
+    try:
+        return float(value)
+    except ValueError:
+        pass
+    return sum(float(amount) * _UNIT_SECONDS[unit] for amount, unit in _DURATION_PART.findall(value))
+
+
+class KeyPoolExhausted(Exception):
+    """Every key usable for a task is cooling down."""
+    def __init__(self, task: str, retry_in: float):
+        super().__init__(f"All keys for task '{task}' are rate limited for another {retry_in:.2f}s")
+        self.task = task
+        self.retry_in = retry_in
+
+
+class KeySlot:
+    """One API key: its client plus the rate-limit budget learned from response headers."""
+
+    # Below this many tokens a key is treated as spent until its token window resets
+    MIN_TOKEN_HEADROOM = 1000
+    # Cool-down used when a 429 arrives without any reset information
+    DEFAULT_COOLDOWN = 1.0
+
+    def __init__(self, name: str, api_key: str, client=None):
+        self.name = name
+        self.limit_requests = None
+        self.remaining_requests = None
+        self.requests_reset_at = 0.0
+        self.limit_tokens = None
+        self.remaining_tokens = None
+        self.tokens_reset_at = 0.0
+        self.cooldown_until = 0.0
+        # Requests currently running on this key (guarded by the KeyManager lock)
+        self.inflight = 0
+        # Hooks fire on whichever thread made the request
+        self.lock = threading.Lock()
+        # The SDK's own retries would hide 429s from the scheduler, so they are disabled;
+        # the response hook sees every reply (including 429s) and keeps the budget current.
+        self.client = client or Groq(
+            api_key=api_key,
+            max_retries=0,
+            http_client=DefaultHttpxClient(event_hooks={"response": [self._on_response]})
+        )
+
+    def _on_response(self, response):
+        self.observe(response.headers, rate_limited=response.status_code == 429)
+
+    def observe(self, headers, rate_limited: bool = False, now: float = None):
+        """Updates the budget from x-ratelimit-* / retry-after headers."""
+        now = now or time.time()
+        with self.lock:
+            self._observe(headers, now)
+        if rate_limited:
+            retry_after = parse_duration(headers.get("retry-after"))
+            self.cool_down(retry_after or self.DEFAULT_COOLDOWN, now)
+
+    def _observe(self, headers, now: float):
+        if "x-ratelimit-limit-requests" in headers:
+            self.limit_requests = int(headers["x-ratelimit-limit-requests"])
+        if "x-ratelimit-remaining-requests" in headers:
+            self.remaining_requests = int(headers["x-ratelimit-remaining-requests"])
+            self.requests_reset_at = now + parse_duration(headers.get("x-ratelimit-reset-requests"))
+        if "x-ratelimit-limit-tokens" in headers:
+            self.limit_tokens = int(headers["x-ratelimit-limit-tokens"])
+        if "x-ratelimit-remaining-tokens" in headers:
+            self.remaining_tokens = int(headers["x-ratelimit-remaining-tokens"])
+            self.tokens_reset_at = now + parse_duration(headers.get("x-ratelimit-reset-tokens"))
+
+        # Stop using the key before it starts answering 429
+        if self.remaining_requests is not None and self.remaining_requests <= 0:
+            self.cooldown_until = max(self.cooldown_until, self.requests_reset_at)
+        if self.remaining_tokens is not None and self.remaining_tokens < self.MIN_TOKEN_HEADROOM:
+            self.cooldown_until = max(self.cooldown_until, self.tokens_reset_at)
+
+    def cool_down(self, seconds: float, now: float = None):
+        now = now or time.time()
+        with self.lock:
+            self.cooldown_until = max(self.cooldown_until, now + seconds)
+
+    def is_available(self, now: float) -> bool:
+        return self.cooldown_until <= now
+
+    def headroom(self, now: float) -> float:
+        """Fraction (0-1) of the tighter of the request/token budgets still left. Unknown counts as full."""
+        fractions = [1.0]
+        if self.limit_requests and self.remaining_requests is not None and self.requests_reset_at > now:
+            fractions.append(self.remaining_requests / self.limit_requests)
+        if self.limit_tokens and self.remaining_tokens is not None and self.tokens_reset_at > now:
+            fractions.append(self.remaining_tokens / self.limit_tokens)
+        return min(fractions)
+
+
+class KeyManager:
+    """
+    Manages pools of API keys for different tasks.
+    Picks the key with the most rate-limit headroom, skips keys that are cooling
+    down until their reset time, and spills over to the global pool when a
+    task's own pool is saturated.
+    Safe to share between the request threadpool and background workers:
+    selection happens under one lock, and in-flight counts keep concurrent
+    callers from piling onto the same key before its headers come back.
+    """
+    # Headroom is compared in buckets of this size so near-equal keys share load
+    HEADROOM_BUCKET = 0.1
+
+    def __init__(self, key_pools: dict = None):
+        if key_pools is None:
+            key_pools = {
+                "scam": settings.GROQ_KEYS_SCAM,
+                "gen": settings.GROQ_KEYS_GEN,
+                "safe": settings.GROQ_KEYS_SAFE,
+                "extraction": settings.GROQ_KEYS_EXTRACTION,
+                "global": settings.GROQ_KEYS_GLOBAL
+            }
+        self.pools = {task: self._load_pool(task, keys) for task, keys in key_pools.items()}
+        self.pools.setdefault("global", [])
+        # Round-robin cursor per pool, used to break ties between equally fresh keys
+        self.indices = {k: 0 for k in self.pools}
+        self.lock = threading.Lock()
+
+    def _load_pool(self, task, keys_str):
+        if not keys_str: return []
+        # Create clients for valid keys
+        keys = [k.strip() for k in keys_str.split(",") if k.strip()]
+        return [KeySlot(f"{task}#{i}", key) for i, key in enumerate(keys)]
+
+    def _pick(self, pool_name, now, exclude=None):
+        pool = self.pools.get(pool_name) or []
+        available = [slot for slot in pool if slot.is_available(now) and slot is not exclude]
+        if not available:
+            return None
+        start = self.indices[pool_name]
+        self.indices[pool_name] = start + 1
+        # Most headroom wins, then fewest requests in flight; remaining ties rotate
+        order = {id(slot): (i - start) % len(pool) for i, slot in enumerate(pool)}
+        return max(available, key=lambda slot: (
+            int(slot.headroom(now) / self.HEADROOM_BUCKET),
+            -slot.inflight,
+            -order[id(slot)]
+        ))
+
+    def acquire(self, task="global", exclude: KeySlot = None) -> KeySlot:
+        """
+        Returns the best key for the task, or raises KeyPoolExhausted if all are cooling down.
+        Every acquire must be paired with release().
+        """
+        now = time.time()
+        candidates = [task, "global"] if task != "global" and task in self.pools else ["global"]
+        with self.lock:
+            for pool_name in candidates:
+                slot = self._pick(pool_name, now, exclude)
+                if slot is not None:
+                    slot.inflight += 1
+                    return slot
+
+        slots = [slot for name in candidates for slot in self.pools.get(name, [])]
+        if not slots:
+            raise Exception(f"No API Keys configured for task '{task}' or global pool!")
+        raise KeyPoolExhausted(task, min(slot.cooldown_until for slot in slots) - now)
+
+    def release(self, slot: KeySlot):
+        with self.lock:
+            slot.inflight -= 1
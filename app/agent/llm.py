@@ -1,92 +1,238 @@
 
-from groq import Groq
+from groq import RateLimitError, APIStatusError, APITimeoutError, APIConnectionError
 from app.core.config import settings
+from app.utils.regex_spy import RegexSpy
+import contextvars
 import json
 import random
-from huggingface_hub import InferenceClient
-from huggingface_hub.errors import HfHubHTTPError
 import time
-
-class KeyManager:
-    """Manages pools of API keys for different tasks."""
-    def __init__(self):
-        self.pools = {
-            "scam": self._load_pool(settings.GROQ_KEYS_SCAM),
-            "gen": self._load_pool(settings.GROQ_KEYS_GEN),
-            "safe": self._load_pool(settings.GROQ_KEYS_SAFE),
-            "extraction": self._load_pool(settings.GROQ_KEYS_EXTRACTION),
-            "global": self._load_pool(settings.GROQ_KEYS_GLOBAL)
-        }
-        self.indices = {k: 0 for k in self.pools} 
-
-    def _load_pool(self, keys_str):
-        if not keys_str: return []
-        # Create clients for valid keys
-        return [Groq(api_key=k.strip()) for k in keys_str.split(",") if k.strip()]
-
-    def get_client(self, task="global"):
-        # Fallback to global if specific pool empty
-        pool = self.pools.get(task) or self.pools["global"]
-        if not pool: 
-            # If even global is empty, try to create one from legacy single key if needed, or raise
-            if settings.GROQ_API_KEY:
-                 return Groq(api_key=settings.GROQ_API_KEY)
-            raise Exception(f"No API Keys configured for task '{task}' or global pool!")
-        
-        idx = self.indices.get(task, 0)
-        return pool[idx % len(pool)]
-
-    def rotate(self, task="global"):
-        # Move to next key
-        print(f"🔄 [KeyManager] Rotating key for task: {task}")
-        self.indices[task] = self.indices.get(task, 0) + 1
+import threading
+from types import SimpleNamespace
+from concurrent.futures import ThreadPoolExecutor, wait, as_completed
+from app.agent.personas import PERSONA_SYSTEM, BASE_PERSONA
+from app.agent.scam_scorer import ScamScorer
+from app.agent.llm_cache import LLMCache, MISS
+from app.agent.key_manager import KeyManager, KeyPoolExhausted, parse_duration
+from app.agent.circuit_breaker import CircuitBreaker, CircuitOpenError
+from app.utils import metrics
+
+class RetryBudgetExhausted(Exception):
+    """Every retry of an LLM call failed, or the deadline ran out first."""
+
+
+class _UsageProbe:
+    """Wraps a client for one attempt, remembering the model and token usage of the completion it returns."""
+    def __init__(self, client):
+        self.client = client
+        self.model = None
+        self.usage = None
+        self.chat = SimpleNamespace(completions=SimpleNamespace(create=self._create))
+
+    def _create(self, **kwargs):
+        self.model = kwargs.get("model")
+        response = self.client.chat.completions.create(**kwargs)
+        self.usage = getattr(response, "usage", None)
+        return response
 
 
 class LLMService:
     def __init__(self):
         self.key_manager = KeyManager()
+        # Runs attempts that may be hedged onto a second key
+        self._hedge_pool = ThreadPoolExecutor(max_workers=settings.IO_WORKERS or 32, thread_name_prefix="llm-hedge")
         self.main_model = "openai/gpt-oss-20b" 
         self.fast_model = "openai/gpt-oss-20b"
+        # How each check was decided: by a local pre-screen or by an LLM call
+        self.local_stats = {
+            "safety": {"local_safe": 0, "local_unsafe": 0, "llm": 0},
+            "scam": {"local_scam": 0, "local_safe": 0, "llm": 0},
+            "extraction": {"regex_only": 0, "llm": 0}
+        }
+        self._stats_lock = threading.Lock()
+        self.breakers = {}
+        self.cache = LLMCache(settings.LLM_CACHE_SIZE, settings.LLM_CACHE_TTL, shared=settings.LLM_CACHE_SHARED)
 
     def _call_groq(self, task_name, create_func):
         """
-        Generic wrapper to handle rotation and retries.
+        Generic wrapper to handle key selection, retries and hedging.
         create_func: function that takes a client and returns result
+
+        Guarded by a per-task circuit breaker: while the provider is failing,
+        calls raise CircuitOpenError immediately and callers use their local fallbacks.
+        """
+        breaker = self.breaker(task_name)
+        if not breaker.allow():
+            metrics.LLM_CALL_SECONDS.observe(0.0, task=task_name, outcome="circuit_open")
+            raise CircuitOpenError(task_name, breaker.retry_in())
+        started = time.perf_counter()
+        try:
+            result = self._call_with_retries(task_name, create_func)
+        except RetryBudgetExhausted:
+            breaker.record_failure()
+            metrics.LLM_CALL_SECONDS.observe(time.perf_counter() - started, task=task_name, outcome="exhausted")
+            raise
+        except Exception:
+            # The provider answered (bad request, auth...): not a sign of an outage
+            breaker.record_success()
+            metrics.LLM_CALL_SECONDS.observe(time.perf_counter() - started, task=task_name, outcome="error")
+            raise
+        breaker.record_success()
+        metrics.LLM_CALL_SECONDS.observe(time.perf_counter() - started, task=task_name, outcome="ok")
+        return result
+
+    def _call_with_retries(self, task_name, create_func):
+        """
+        A 429 moves straight on to another key (the limited key cools down for its
+        Retry-After). Transient failures (5xx, timeouts, dropped connections) back off
+        exponentially with full jitter, honoring Retry-After. Anything else is raised.
+        All attempts share one deadline budget.
         """
-        max_retries = 3
+        deadline = time.time() + settings.LLM_CALL_DEADLINE
         last_error = None
         
-        for attempt in range(max_retries):
-            # Round-Robin: Rotate BEFORE getting the client to ensure distribution
-            # But ensure we don't skip keys excessively if we just rotated due to error.
-            # Actually, simplest is to just get client, then rotate index for NEXT time.
-            client = self.key_manager.get_client(task_name)
-            
-            # Prepare next key for the *next* call (Round Robin)
-            # We do this immediately so that subequent calls use different keys
-            if attempt == 0: 
-                 self.key_manager.rotate(task_name)
-
+        for attempt in range(settings.LLM_MAX_ATTEMPTS):
             try:
-                return create_func(client)
+                return self._hedged_attempt(task_name, create_func, deadline)
+            except KeyPoolExhausted as e:
+                # Every key is cooling down: wait for the earliest reset instead of firing a doomed request
+                last_error = e
+                delay = e.retry_in
+                print(f"⏳ [LLM] {e}. Waiting...")
             except Exception as e:
-                start_time = time.time()
-                e_str = str(e).lower()
-                if "429" in e_str or "rate limit" in e_str:
-                    print(f"⚠️ [LLM] Rate Limit (429) for {task_name} on attempt {attempt+1}. Rotating key...")
-                    self.key_manager.rotate(task_name)
-                    time.sleep(0.5) 
-                    continue
-                else:
+                kind = self._classify_error(e)
+                if kind == "fatal":
                     print(f"❌ [LLM] Error: {e}")
                     raise e
+                last_error = e
+                if kind == "rate_limit":
+                    print(f"⚠️ [LLM] Rate Limit (429) for {task_name} on attempt {attempt+1}. Switching key...")
+                    continue
+                delay = max(self._backoff(attempt), self._retry_after(e))
+                print(f"⚠️ [LLM] Transient error for {task_name} on attempt {attempt+1}: {e}. Retrying in {delay:.2f}s")
+
+            if time.time() + delay >= deadline:
+                break
+            metrics.LLM_RETRY_SLEEP.inc(delay, task=task_name)
+            time.sleep(delay)
                     
-        raise Exception(f"Max retries exceeded for {task_name}. Last error: {last_error}")
+        raise RetryBudgetExhausted(f"Retry budget exhausted for {task_name}. Last error: {last_error}")
+
+    def breaker(self, task_name) -> CircuitBreaker:
+        with self._stats_lock:
+            if task_name not in self.breakers:
+                self.breakers[task_name] = CircuitBreaker(
+                    task_name,
+                    failure_rate=settings.BREAKER_FAILURE_RATE,
+                    min_calls=settings.BREAKER_MIN_CALLS,
+                    window=settings.BREAKER_WINDOW,
+                    cooldown=settings.BREAKER_COOLDOWN
+                )
+            return self.breakers[task_name]
+
+    def is_degraded(self, task_name) -> bool:
+        """True while calls for this task are short-circuited by its breaker."""
+        return self.breaker(task_name).is_open()
+
+    def _hedged_attempt(self, task_name, create_func, deadline):
+        """
+        One attempt. If it has not answered within LLM_HEDGE_AFTER seconds the same
+        request is also sent on a second key, and the first success wins.
+        """
+        first = self.key_manager.acquire(task_name)
+        if settings.LLM_HEDGE_AFTER <= 0:
+            return self._attempt(task_name, first, create_func, deadline)
+
+        # Attempts run in a copy of the caller's context so they count toward its turn trace
+        futures = [self._hedge_pool.submit(
+            contextvars.copy_context().run, self._attempt, task_name, first, create_func, deadline)]
+        done, _ = wait(futures, timeout=settings.LLM_HEDGE_AFTER)
+        if not done:
+            try:
+                second = self.key_manager.acquire(task_name, exclude=first)
+                print(f"🪁 [LLM] {task_name} slow on key {first.name}, hedging on {second.name}")
+                futures.append(self._hedge_pool.submit(
+                    contextvars.copy_context().run, self._attempt, task_name, second, create_func, deadline))
+            except Exception:
+                pass  # No other key free right now, keep waiting on the first
+
+        error = None
+        for future in as_completed(futures, timeout=max(0.0, deadline - time.time())):
+            try:
+                return future.result()
+            except Exception as e:
+                error = e
+        raise error
+
+    def _attempt(self, task_name, slot, create_func, deadline):
+        started = time.perf_counter()
+        outcome = "ok"
+        probe = None
+        try:
+            # The request may not outlive the overall deadline
+            probe = _UsageProbe(slot.client.with_options(timeout=max(0.1, deadline - time.time())))
+            return create_func(probe)
+        except RateLimitError:
+            outcome = "rate_limit"
+            # The response hook has already cooled this key down from the 429's headers
+            if slot.is_available(time.time()):
+                slot.cool_down(slot.DEFAULT_COOLDOWN)
+            raise
+        except Exception as e:
+            outcome = self._classify_error(e)
+            raise
+        finally:
+            self.key_manager.release(slot)
+            metrics.record_llm_attempt(
+                task_name, slot.name, (probe and probe.model) or "unknown", outcome,
+                time.perf_counter() - started, probe and probe.usage)
+
+    @staticmethod
+    def _classify_error(e) -> str:
+        if isinstance(e, RateLimitError):
+            return "rate_limit"
+        if isinstance(e, (APITimeoutError, APIConnectionError, TimeoutError)):
+            return "transient"
+        if isinstance(e, APIStatusError) and e.status_code >= 500:
+            return "transient"
+        return "fatal"
+
+    @staticmethod
+    def _backoff(attempt: int) -> float:
+        """Exponential backoff with full jitter."""
+        return random.uniform(0, min(settings.LLM_BACKOFF_CAP, settings.LLM_BACKOFF_BASE * 2 ** attempt))
+
+    @staticmethod
+    def _retry_after(e) -> float:
+        response = getattr(e, "response", None)
+        if response is None:
+            return 0.0
+        return parse_duration(response.headers.get("retry-after"))
+
+    def _cached_call(self, task_name, model, messages, create_func):
+        """
+        _call_groq for deterministic (temperature=0) requests: identical prompts are
+        answered from the response cache. Failures are never cached.
+        """
+        key = self.cache.make_key(task_name, model, messages)
+        cached = self.cache.get(key)
+        if cached is not MISS:
+            return cached
+        result = self._call_groq(task_name, create_func)
+        self.cache.set(key, result)
+        return result
 
     def classify_scam(self, text: str) -> bool:
         """
         Determines if the message is a scam attempt or safe.
+        Confident cases are decided by the local ScamScorer; only the
+        uncertain band reaches the LLM classifier.
         """
+        verdict = ScamScorer.verdict(text)
+        if verdict is not None:
+            self._count_local("scam", "local_scam" if verdict else "local_safe")
+            return verdict
+        self._count_local("scam", "llm")
+
         prompt = f"""
         You are a cybersecurity classifier.
 
@@ -112,17 +258,19 @@ class LLMService:
         Respond with ONLY one word: "SCAM" or "SAFE".
         """
         
+        messages = [{"role": "user", "content": prompt}]
+
         def _request(client):
             response = client.chat.completions.create(
                 model=self.fast_model,
-                messages=[{"role": "user", "content": prompt}],
+                messages=messages,
                 temperature=0.0
             )
             data = response.choices[0].message.content.strip().upper()
             return "SCAM" in data
 
         try:
-            return self._call_groq("scam", _request)
+            return self._cached_call("scam", self.fast_model, messages, _request)
         except Exception as e:
             print(f"❌ LLM Classification Error: {e}")
             return True # Fail safe
@@ -175,7 +323,7 @@ class LLMService:
 
         try:
             # Although currently unused in Planner, we update it for completeness
-            return self._call_groq("gen", _request)
+            return self._cached_call("gen", self.fast_model, messages, _request)
         except Exception as e:
             print(f"❌ LLM Classification Error: {e}")
             return "upi" # Default fallback
@@ -186,7 +334,8 @@ class LLMService:
             persona_style: str, 
             objective: str, 
             scammer_text: str,
-            is_scammer: bool
+            is_scammer: bool,
+            summary: str = ""
         ) -> str:
             
         system_prompt = f"""
@@ -223,6 +372,9 @@ class LLMService:
             """
 
         messages = [{"role": "system", "content": system_prompt}]
+        # Turns older than `history` only reach the model through the rolling summary
+        if summary:
+            messages.append({"role": "system", "content": f"Summary of the conversation so far:\n{summary}"})
     
         # Add history
         for turn in history[-10:]: 
@@ -247,10 +399,54 @@ class LLMService:
             return "Oh dear, I seem to be having trouble with my phone currently."
 
 
+    def summarize_conversation(self, summary: str, turns: list) -> str:
+        """
+        Folds older turns into the running conversation summary, so prompts carry a
+        short summary instead of an ever longer transcript. Returns None on failure
+        (the caller keeps the old summary and sends the raw turns instead).
+        """
+        transcript = "\n".join(f"Them: {t['user']}\nMe: {t['agent']}" for t in turns)
+        prompt = f"""
+        You maintain a running summary of a chat between me (a scam-baiting persona) and them (a suspected scammer).
+
+        Current summary:
+        {summary or "(empty)"}
+
+        New messages to fold in:
+        {transcript}
+
+        Write the updated summary in under {settings.SUMMARY_MAX_WORDS} words.
+        Keep: who they claim to be, what they want from me, any payment details, numbers, links or names they gave,
+        what I have already asked for or promised, and the tone of the conversation.
+        Drop greetings and repetition. Output ONLY the summary text.
+        """
+
+        def _request(client):
+            response = client.chat.completions.create(
+                model=self.fast_model,
+                messages=[{"role": "user", "content": prompt}],
+                temperature=0.0
+            )
+            return response.choices[0].message.content.strip()
+
+        try:
+            return self._call_groq("summary", _request)
+        except Exception as e:
+            print(f"❌ LLM Summary Error: {e}")
+            return None
+
     def safety_check(self, response_text: str) -> bool:
         """
         Checks if the generated response reveals AI nature or sensitive info.
+        A local RegexSpy pre-screen decides the clear cases; only ambiguous
+        replies are sent to the LLM reviewer.
         """
+        verdict = RegexSpy.screen_reply(response_text)
+        if verdict != "review":
+            self._count_local("safety", f"local_{verdict}")
+            return verdict == "safe"
+        self._count_local("safety", "llm")
+
         prompt = f"""
         You are a strict safety reviewer.
         Review the reply below and decide if it is 'SAFE' or 'UNSAFE'.
@@ -269,97 +465,34 @@ class LLMService:
         If ANY of these are true, say "UNSAFE". Otherwise say "SAFE".
         """
         
+        messages = [{"role": "user", "content": prompt}]
+
         def _request(client):
             res = client.chat.completions.create(
                 model=self.fast_model,
-                messages=[{"role": "user", "content": prompt}],
+                messages=messages,
                 temperature=0.0
             )
             return "SAFE" in res.choices[0].message.content.strip().upper()
 
         try:
-            return self._call_groq("safe", _request)
+            return self._cached_call("safe", self.fast_model, messages, _request)
         except Exception:
+            # The local pre-screen already rejected anything clearly unsafe
             return True
 
-    def generate_persona(self, message: str) -> str:
-        PERSONA_SYSTEM = {
-        ("lottery", "prize", "won", "claim", "sweepstakes", "congratulations"): """You are a 71 year old retired widow. EXTREMELY gullible and excited. Types "hello sir" and "thank you so much sir". Believes everything. Shares Aadhaar/PAN freely. Calls everyone "dear" and "sir". Says "God bless" constantly.
-    Traits: Thinks lottery is divine blessing. Wants to donate prize to temple. Offers to send sweets to scammer. Confused about internet but tries hard. Asks "sir which button to press?"
-    Goal: Ask "sir what is your good name and phone number?", "I will send fees to your paytm no problem", "dear give me your UPI ID I will pay immediately", "sir what is your office address I will come personally"
-    Only output exact message. English only. Act VERY gullible.""",
-
-        ("package", "delivery", "customs", "courier", "shipment", "parcel"): """You are a 39 year old shop owner. Orders random stuff online but never tracks anything. ZERO organization skills. Believes every delivery message. Panics easily. Says "yes okay" to everything.
-    Traits: Orders so much you cannot remember what. Thinks customs always calls customers. Will pay any fee without checking. Scared package will return. Types "ok brother" and "done sir".
-    Goal: Ask "brother what is your delivery boy number?", "send me your paytm or UPI I will send money now", "give me your manager contact number", "what is your name and company?"
-    Only output exact message. English only. Act VERY disorganized and gullible.""",
-
-        ("virus", "computer", "microsoft", "security", "hacked", "tech support"): """You are a 58 year old government clerk. TERRIFIED of computers. Thinks every popup means hacking. Believes "Microsoft" calls customers. Panics about bank account. Says "oh my god" repeatedly. Zero tech knowledge.
-    Traits: Thinks hackers are watching right now. Believes computer will explode if virus not removed. Ready to pay ANY amount for safety. Calls it "laptop" but pronounces wrong. Trusts anyone saying "I am from Microsoft".
-    Goal: Ask "sir please what is your employee ID?", "sir I will pay right now give me your UPI quickly", "what is your technician number I will save it", "sir give me your company phone number"
-    Only output exact message. English only. Act EXTREMELY panicked and tech-illiterate.""",
-
-        ("investment", "crypto", "bitcoin", "trading", "profit", "forex"): """You are a 32 year old call center employee. Dreams of getting rich quick. Watches motivational videos. Has 2 lakh saved. EXTREMELY greedy. Thinks crypto equals easy money. Says "boss" constantly.
-    Traits: Believes 100% monthly returns possible. Thinks you found secret shortcut to wealth. Will invest life savings immediately. Shares salary details openly. Says "lets do it" to everything.
-    Goal: Ask "brother what is your company name and registration?", "send me your UPI I will invest now", "boss give me your number I will call", "what is your trading license number?"
-    Only output exact message. English only. Act VERY greedy and gullible.""",
-
-        ("job", "hiring", "work from home", "employment", "salary"): """You are a 23 year old unemployed graduate. DESPERATE for any job. Believes "earn 50k from home" ads. Will pay any registration fee. Thinks foreign companies hire randomly. Says "thank you sir" 10 times per message.
-    Traits: Thinks job offers come via WhatsApp. Believes no interview needed for good salary. Ready to pay 5000-10000 registration fee. Shares bank details immediately. Types "please sir" and "I am very hard working sir".
-    Goal: Ask "sir what is your HR ID and company registration?", "sir I will pay fees now give me your UPI", "sir what is your phone number?", "sir can I have your email ID?"
-    Only output exact message. English only. Act EXTREMELY desperate and gullible.""",
-
-        ("dating", "love", "relationship", "lonely", "marry", "beautiful"): """You are a 51 year old lonely widower. Falls in love INSTANTLY. Believes beautiful girl really loves you. Ready to send money immediately. Calls stranger "darling" after 2 messages. Zero dating experience.
-    Traits: Thinks foreign models message you for true love. Believes every sob story. Will send money for medical emergency instantly. Shares bank balance openly. Says "you are my life" to scammer.
-    Goal: Ask "dear what is your real address?", "darling give me your UPI I will send money for you", "sweetheart what is your full name?", "baby send me your phone number I will call"
-    Only output exact message. English only. Act EXTREMELY lonely and gullible.""",
-
-        ("tax", "irs", "arrest", "warrant", "legal action", "refund"): """You are a 54 year old small businessman. TERRIFIED of government. Believes every tax threat. Thinks police coming to arrest immediately. Panics about jail. Says "please sir I am honest citizen sir".
-    Traits: Believes arrest warrant issued for 5000 rupees tax. Thinks income tax office calls customers. Will pay penalty immediately without checking. Do not know your own tax details. Ready to beg.
-    Goal: Ask "sir please what is your officer ID number?", "sir I will pay penalty now give me your UPI", "sir what is your department contact number?", "sir what is your good name?"
-    Only output exact message. English only. Act EXTREMELY scared and gullible.""",
-
-        ("grandson", "accident", "emergency", "bail", "hospital", "help"): """You are a 75 year old loving grandmother. PANICS at family emergency. Believes every accident story. Has fixed deposit of 10-15 lakhs. Will not tell parents as told. Says "oh god" and "my child". Zero verification.
-    Traits: Believes grandson had accident immediately. Thinks police really called you. Will break fixed deposit instantly. Do not question why grandson cannot call directly. Ready to send ANY amount for bail.
-    Goal: Ask "dear what is your police station name?", "I will send money now give me your UPI dear", "what is your badge number?", "dear give me your phone number I will call hospital"
-    Only output exact message. English only. Act EXTREMELY panicked and gullible.""",
-
-        ("interested in", "buying", "purchase", "item listed"): """You are a 31 year old housewife selling old items. VERY naive about online scams. Trusts every buyer message. Believes overpayment mistakes. Says "ok sir no problem". Needs money urgently.
-    Traits: Believes foreign buyers want your old sofa. Thinks courier agents need you to pay fees. Will accept checks or fake payment confirmations. Shares bank details openly. Says "thank you so much god bless you".
-    Goal: Ask "sir what is your name and city?", "sir should I send you my account or you send me your UPI?", "sir what is your phone number?", "sir where do you live?"
-    Only output exact message. English only. Act VERY trusting and gullible.""",
-
-        ("charity", "donation", "help children", "NGO", "fundraiser"): """You are a 63 year old retired religious man. EXTREMELY emotional about helping. Cries at sad stories. Donates to everyone. Believes every sick child story. Says "God will bless". Zero verification.
-    Traits: Believes every NGO is genuine. Thinks God will punish you if you do not donate. Ready to send 50k-1 lakh immediately. Shares PAN and bank details for certificate. Says "this is my duty".
-    Goal: Ask "dear what is your NGO name and registration?", "I will donate give me your UPI ID", "what is your founder name and number?", "dear where is your office I will visit?"
-    Only output exact message. English only. Act EXTREMELY emotional and gullible.""",
-
-        ("account", "blocked", "kyc", "verification", "suspended", "debit card"): """You are a 47 year old homemaker. PANICS at account blocking. Believes every bank SMS. Thinks KYC expires. Will do anything to unblock. Says "please sir my all money is inside". Zero banking knowledge.
-    Traits: Thinks account blocks automatically. Believes bank officials call for verification. Will share OTP if asked sweetly. Ready to pay unblocking fee. Scared of losing savings.
-    Goal: Ask "sir what is your bank employee number?", "sir give me your UPI I will pay charges", "sir what is your branch phone number?", "sir what is your good name?"
-    Only output exact message. English only. Act EXTREMELY panicked and gullible.""",
-
-        ("insurance", "policy", "claim", "expired", "renew", "premium"): """You are a 52 year old auto driver. Scared of policy lapsing. Believes every renewal SMS. Thinks insurance company calls customers. Will pay premium immediately. Says "please renew it sir".
-    Traits: Do not remember policy details. Thinks missing one premium equals total loss. Believes agents personally call for renewal. Ready to pay online without checking. Scared of accidents without insurance.
-    Goal: Ask "sir what is your agent code?", "sir give me your UPI I will pay premium now", "what is your company phone number?", "sir what is your name?"
-    Only output exact message. English only. Act VERY scared and gullible.""",
-
-        ("loan", "credit", "instant approval", "low interest", "personal loan"): """You are a 35 year old person who needs 2 lakh urgently. DESPERATE for quick loan. Believes instant approval ads. Will pay ANY processing fee. Low credit score. Says "please approve it urgent".
-    Traits: Thinks loans approved in 5 minutes. Believes no documents needed. Will pay 10k-20k processing fee upfront. Shares Aadhaar and PAN immediately. Thinks NBFC companies give easy loans.
-    Goal: Ask "sir what is your company registration number?", "I will pay fee give me your UPI", "what is your employee ID?", "give me your number I will call"
-    Only output exact message. English only. Act EXTREMELY desperate and gullible.""",
-
-        ("netflix", "subscription", "account suspended", "payment failed", "streaming"): """You are a 26 year old Netflix addict. PANICS at suspension message. Watches daily. Shares account with 5 friends. Will pay immediately to restore. Says "please fix it urgent".
-    Traits: Thinks Netflix calls customers. Believes account suspended for 500 rupees. Will pay to random UPI. Do not check official app. Says "family is waiting to watch series".
-    Goal: Ask "what is your Netflix employee ID?", "give me your UPI I will pay now", "what is your support number?", "what is your name?"
-    Only output exact message. English only. Act VERY panicked and gullible.""",
-    }
+    def _count_local(self, check: str, outcome: str):
+        with self._stats_lock:
+            self.local_stats[check][outcome] += 1
 
-        BASE_PERSONA = """You are a 40 year old middle class employee. Slightly gullible but asks questions. Polite. Wants to help or solve problems quickly. Says "yes okay". Moderate tech knowledge.
-    Traits: Trusts official sounding people. Will cooperate if convinced. Slightly lazy to verify properly. Wants to finish conversation quickly.
-    Goal: Ask "what is your company or department?", "give me your contact details", "what is your UPI or number?"
-    Only output exact message. English only. Act moderately gullible."""
+    def llm_calls_saved_per_1000(self, check: str = "safety") -> float:
+        """LLM calls avoided by the local pre-screen of `check` ("safety", "scam" or "extraction"), per 1,000 checks."""
+        with self._stats_lock:
+            total = sum(self.local_stats[check].values())
+            saved = total - self.local_stats[check]["llm"]
+        return 1000 * saved / total if total else 0.0
 
+    def generate_persona(self, message: str) -> str:
         def select_persona(message):
             msg_lower = message.lower()
             for trigger_tuple, persona_prompt in PERSONA_SYSTEM.items():
@@ -369,6 +502,49 @@ class LLMService:
             return BASE_PERSONA
         return select_persona(message)
 
+    # LLM extraction field names that map onto RegexSpy's / extracted_data's standard keys
+    LLM_FIELD_MAP = {
+        "upi_id": "upi",
+        "account_number": "bank_account",
+        "ifsc_code": "ifsc",
+        "phone_number": "phone",
+        "alternate_phone_number": "phone",
+        "email": "email",
+        "payment_links": "url",
+        "website": "url",
+    }
+
+    def extract_tiered(self, text: str) -> dict:
+        """
+        Regex-first extraction. RegexSpy resolves the message in microseconds; the
+        LLM extractor is only called when what the regexes left behind still looks
+        like an entity (stray digits, '@', link-like or spelled-out numbers, identity
+        details). LLM fields are mapped onto the standard keys and merged with the
+        regex findings, so both tiers land in extracted_data the same way.
+        """
+        intel, needs_llm = self.extract_regex_tier(text)
+        return self.extract_llm_tier(text, intel) if needs_llm else intel
+
+    def extract_regex_tier(self, text: str) -> tuple:
+        """First tier of extract_tiered: (regex findings, whether the leftover text needs the LLM tier)."""
+        intel, residual = RegexSpy.extract_with_residual(text)
+        if not RegexSpy.entity_signals(residual):
+            self._count_local("extraction", "regex_only")
+            return intel, False
+        return intel, True
+
+    def extract_llm_tier(self, text: str, intel: dict) -> dict:
+        """Second tier of extract_tiered: LLM extraction merged onto the regex findings."""
+        self._count_local("extraction", "llm")
+        merged = {field: list(values) for field, values in intel.items()}
+        for key, value in self.extract_information(text).items():
+            if value in (None, "", [], {}):
+                continue
+            values = value if isinstance(value, list) else [value]
+            target = merged.setdefault(self.LLM_FIELD_MAP.get(key, key), [])
+            target.extend(v for v in values if v not in (None, "") and v not in target)
+        return merged
+
     def extract_information(self, text: str) -> dict:
         """
         Extracts ALL relevant entities using LLM (replaces RegexSpy).
@@ -395,10 +571,12 @@ CONVERSATION:
 {text}
         """
         
+        messages = [{"role": "user", "content": prompt}]
+
         def _request(client):
             response = client.chat.completions.create(
                 model=self.main_model, # Use main model for better reasoning on weird text
-                messages=[{"role": "user", "content": prompt}],
+                messages=messages,
                 temperature=0.0,
                 response_format={"type": "json_object"}
             )
@@ -406,10 +584,73 @@ CONVERSATION:
 
         try:
             # Uses 'extraction' pool
-            output = self._call_groq("extraction", _request)
+            output = self._cached_call("extraction", self.main_model, messages, _request)
             return json.loads(output)
         except Exception as e:
-            print(f"❌ LLM Extraction Error: {e}")
+            # Degraded mode: fall back to the deterministic extractor
+            print(f"❌ LLM Extraction Error: {e}. Falling back to RegexSpy.")
+            return RegexSpy.extract_intelligence(text)
+
+    def extract_unknown_entities(self, text: str, known_keys: str) -> dict:
+        """Entities of types RegexSpy does not know about, for one message (see the batch version)."""
+        return self.extract_unknown_entities_batch([("m0", text)], known_keys).get("m0", {})
+
+    def extract_unknown_entities_batch(self, messages: list, known_keys: str) -> dict:
+        """
+        One JSON-mode request for several scammer messages. messages is
+        [(message_id, text), ...]; returns {message_id: {entity_type: [values]}}
+        with entity types lowercased and snake_cased. Messages with nothing
+        found (or a failed request) are simply absent.
+        """
+        if not messages:
+            return {}
+        numbered = "\n".join(f"[{message_id}] {' '.join(text.split())}" for message_id, text in messages)
+        prompt = f"""
+Each line below is a separate message from a scammer, prefixed with its ID in brackets.
+For every message, extract identifying details that are NOT of these already-handled types: {known_keys}.
+Examples: names, employee IDs, crypto wallets, app names, transaction IDs, addresses, organization names.
+
+RULES:
+- Extract only explicitly stated information
+- Entity types are short lowercase snake_case names
+- Values are lists of strings
+- Leave out messages with nothing to extract
+- Return valid JSON only - no explanations, no markdown
+
+OUTPUT FORMAT:
+{{"results": {{"<message id>": {{"<entity_type>": ["value", ...]}}}}}}
+
+MESSAGES:
+{numbered}
+"""
+        messages_payload = [{"role": "user", "content": prompt}]
+
+        def _request(client):
+            response = client.chat.completions.create(
+                model=self.main_model,
+                messages=messages_payload,
+                temperature=0.0,
+                response_format={"type": "json_object"}
+            )
+            return response.choices[0].message.content.strip()
+
+        try:
+            results = json.loads(self._call_groq("extraction", _request)).get("results") or {}
+        except Exception as e:
+            print(f"❌ [LLM] Batch entity extraction failed for {len(messages)} messages: {e}")
             return {}
 
+        wanted = {message_id for message_id, _ in messages}
+        cleaned = {}
+        for message_id, entities in results.items():
+            if message_id not in wanted or not isinstance(entities, dict):
+                continue
+            for entity_type, values in entities.items():
+                values = values if isinstance(values, list) else [values]
+                values = [str(v).strip() for v in values if v not in (None, "") and str(v).strip()]
+                if values:
+                    key = "_".join(str(entity_type).lower().split())
+                    cleaned.setdefault(message_id, {}).setdefault(key, []).extend(values)
+        return cleaned
+
 llm_service = LLMService()
@@ -0,0 +1,109 @@
+import hashlib
+import json
+import threading
+import time
+from collections import OrderedDict
+from datetime import datetime, timedelta, timezone
+
+from app.database.connection import db_instance
+
+# Returned by get() on a miss (cached values may legitimately be False/None)
+MISS = object()
+
+
+class LLMCache:
+    """
+    Content-addressed cache for deterministic (temperature=0) LLM calls.
+    Tier 1 is an in-process LRU with TTL. Tier 2 (optional) is a shared MongoDB
+    collection, so the same scam template seen by another worker or session
+    never hits the API twice.
+    """
+    def __init__(self, max_entries: int, ttl: float, shared: bool = False):
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self.shared = shared
+        self.entries = OrderedDict()  # key -> (expires_at, value)
+        self.lock = threading.Lock()
+        self.stats = {"hits": 0, "shared_hits": 0, "misses": 0, "evictions": 0, "expirations": 0}
+
+    @staticmethod
+    def make_key(task: str, model: str, messages: list) -> str:
+        """Hash of (task, model, prompt) with whitespace normalized, so reformatted templates still match."""
+        normalized = [[m["role"], " ".join(m["content"].split())] for m in messages]
+        raw = json.dumps([task, model, normalized], ensure_ascii=False)
+        return hashlib.sha256(raw.encode("utf-8")).hexdigest()
+
+    def _count(self, stat: str):
+        with self.lock:
+            self.stats[stat] += 1
+
+    def _collection(self):
+        if not self.shared:
+            return None
+        try:
+            return db_instance.get_collection("llm_cache")
+        except ConnectionError:
+            return None
+
+    def ensure_indexes(self):
+        """Run once at startup, so no LLM call waits on create_index."""
+        collection = self._collection()
+        if collection is not None:
+            # Mongo's TTL monitor drops expired entries for us
+            collection.create_index("expires_at", expireAfterSeconds=0)
+
+    def get(self, key: str):
+        now = time.time()
+        with self.lock:
+            entry = self.entries.get(key)
+            if entry is not None:
+                if entry[0] > now:
+                    self.entries.move_to_end(key)
+                    self.stats["hits"] += 1
+                    return entry[1]
+                del self.entries[key]
+                self.stats["expirations"] += 1
+
+        try:
+            collection = self._collection()
+            doc = collection.find_one({"_id": key}) if collection is not None else None
+        except Exception as e:
+            print(f"⚠️ [LLMCache] Shared tier read failed: {e}")
+            doc = None
+
+        if doc and doc["expires_at"].replace(tzinfo=timezone.utc).timestamp() > now:
+            self._count("shared_hits")
+            self._store_local(key, doc["value"], doc["expires_at"].replace(tzinfo=timezone.utc).timestamp())
+            return doc["value"]
+
+        self._count("misses")
+        return MISS
+
+    def set(self, key: str, value):
+        expires_at = time.time() + self.ttl
+        self._store_local(key, value, expires_at)
+        try:
+            collection = self._collection()
+            if collection is not None:
+                collection.update_one(
+                    {"_id": key},
+                    {"$set": {"value": value, "expires_at": datetime.now(timezone.utc) + timedelta(seconds=self.ttl)}},
+                    upsert=True
+                )
+        except Exception as e:
+            print(f"⚠️ [LLMCache] Shared tier write failed: {e}")
+
+    def _store_local(self, key: str, value, expires_at: float):
+        if self.max_entries <= 0:
+            return
+        with self.lock:
+            self.entries[key] = (expires_at, value)
+            self.entries.move_to_end(key)
+            while len(self.entries) > self.max_entries:
+                self.entries.popitem(last=False)
+                self.stats["evictions"] += 1
+
+    def snapshot(self) -> dict:
+        """Counters plus current size, for the admin endpoint."""
+        with self.lock:
+            return {**self.stats, "size": len(self.entries), "max_entries": self.max_entries, "shared": self.shared}
@@ -1,4 +1,6 @@
 from app.agent.llm import llm_service
+from app.agent.personas import persona_voice
+import random
 class StrategicPlanner:
     def __init__(self):
         # Priority Order: What do we want most?
@@ -101,6 +103,49 @@ class StrategicPlanner:
         }
         return prompts.get(focus, "OBJECTIVE: Chat normally.")
 
+    def get_canary_instruction(self, link):
+        """Instruction for the "ip" objective, carrying the session's canary link."""
+        return (f"OBJECTIVE: Say you have made the payment and ask them to open the payment receipt "
+                f"at {link} to verify it. Write the link exactly as given.")
+
+    def get_stalling_reply(self, focus, link=None, persona=None):
+        """
+        Canned reply used while the LLM provider is down (circuit open).
+        Follows the same objective as _get_instruction_text, in the voice of the
+        session's locked persona, so the chat keeps going in character without the model.
+        """
+        replies = {
+            None: [
+                "sorry {address} my network is very bad, what did you say?",
+                "hello? message not loading properly {address}, can you send again",
+                "one minute please {address}, I am little busy, what is this about?"
+            ],
+            "upi": [
+                "I am ready to pay {address}, please send your UPI ID again, it is not showing",
+                "{address} my GooglePay is asking UPI ID, what should I type?",
+                "which UPI ID I should send to {address}? please write it clearly"
+            ],
+            "bank_account": [
+                "UPI is not working on my phone {address}, give me your account number and IFSC I will do bank transfer",
+                "{address} bank person is asking account number and IFSC code, please send",
+            ],
+            "url": [
+                "where I have to pay {address}? please send the link again",
+                "{address} can you send payment link or QR code, I will do it now"
+            ],
+            "ip": [
+                "I have made the payment {address}, please check the receipt I sent and confirm",
+                "receipt is sent {address}, please open and verify"
+            ]
+        }
+        address, catchphrase = persona_voice(persona)
+        reply = random.choice(replies.get(focus) or replies[None]).format(address=address)
+        if catchphrase:
+            reply = f"{catchphrase}, {reply}"
+        if focus == "ip" and link:
+            reply += f" {link}"
+        return reply
+
     def is_mission_complete(self, state):
         """
         Checks if we have exhausted all our goals (Success or Failure).
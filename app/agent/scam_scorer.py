@@ -0,0 +1,111 @@
+import math
+import re
+from typing import Dict, Optional
+
+from app.utils.regex_spy import RegexSpy
+from app.agent.personas import PERSONA_SYSTEM
+
+
+class ScamScorer:
+    """
+    Local first-stage scam classifier: a hand-weighted logistic model over
+    keyword/regex features. Confident messages are decided here in microseconds;
+    only the uncertain band is sent to the LLM classifier.
+    """
+    BIAS = -2.0
+
+    # Weight per distinct hit, added to the log-odds of SCAM
+    FEATURE_WEIGHTS = {
+        "suspicious_keyword": 1.5,   # RegexSpy.SUSPICIOUS_KEYWORDS
+        "persona_trigger": 0.8,      # trigger words of the scam personas
+        "sensitive_ask": 2.5,
+        "money_request": 2.0,
+        "money": 1.0,
+        "urgency": 1.0,
+        "threat": 1.5,
+        "institution": 1.0,
+        "greeting": -1.0,
+        "personal": -1.0,
+        "advisory": -3.0,            # genuine OTP/bank notices warn against sharing; scams ask for it
+    }
+
+    # Intel that only shows up when someone wants to be paid or clicked
+    INTEL_WEIGHTS = {
+        "url": 2.0,
+        "upi": 2.0,
+        "phone": 1.0,
+        "bank_account": 1.5,
+        "ifsc": 1.5,
+    }
+
+    FEATURE_PATTERNS = {
+        "sensitive_ask": r"\b(?:otp|pin|password|cvv|aadhaar|aadhar|pan card|card number|expiry|login)\b",
+        "money_request": r"\b(?:send|transfer|pay|deposit|invest|return)\b[^.?!]{0,30}\b(?:money|amount|rs\.?|rupees|fees?|charges|\d{3,})",
+        "money": r"(?:₹|\b(?:rs\.?|rupees|inr|payment|pay|fee|fees|charges|transfer|deposit|amount|lakh|crore)\b)",
+        "urgency": r"\b(?:immediately|urgently|asap|right now|within \d+ (?:hours?|minutes?|mins?)|today only|last chance|final notice)\b",
+        "threat": r"\b(?:arrest(?:ed)?|police|legal|penalty|fine|court|jail|bail|fir|cbi|customs duty|disconnected|laundering)\b",
+        "institution": r"\b(?:bank|sbi|hdfc|icici|axis|rbi|customer care|officer|department|income tax|trai|paytm|phonepe)\b",
+        "greeting": r"^\W*(?:hi|hii+|hello|hey|good (?:morning|afternoon|evening|night)|how are you)\b",
+        "personal": r"\b(?:grandma|grandpa|mom|mum|dad|bro|sis|aunty|uncle|dinner|lunch|birthday|missed your call|see you)\b",
+        "advisory": r"\b(?:do not|don'?t|never) share\b",
+    }
+
+    # Probability bands: at or beyond these the local verdict is trusted
+    SCAM_THRESHOLD = 0.9
+    SAFE_THRESHOLD = 0.05
+    # A greeting or a few words say little either way ("hi mum, new number" is how a
+    # scam opens): such messages are never decided SAFE locally
+    SAFE_MIN_WORDS = 6
+
+    _compiled = None
+
+    @classmethod
+    def _patterns(cls):
+        if cls._compiled is None:
+            triggers = {kw.lower() for trigger_tuple in PERSONA_SYSTEM for kw in trigger_tuple}
+            # Suspicious keywords are scored on their own, don't count them twice
+            triggers -= {kw.lower() for kw in RegexSpy.SUSPICIOUS_KEYWORDS}
+            cls._compiled = {
+                "suspicious_keyword": re.compile(
+                    r"\b(?:" + "|".join(map(re.escape, RegexSpy.SUSPICIOUS_KEYWORDS)) + r")\b", re.IGNORECASE),
+                "persona_trigger": re.compile(
+                    r"\b(?:" + "|".join(map(re.escape, sorted(triggers))) + r")\b", re.IGNORECASE),
+            }
+            for name, pattern in cls.FEATURE_PATTERNS.items():
+                cls._compiled[name] = re.compile(pattern, re.IGNORECASE)
+        return cls._compiled
+
+    @classmethod
+    def features(cls, text: str) -> Dict[str, int]:
+        """Counts distinct hits per feature."""
+        counts = {}
+        for name, pattern in cls._patterns().items():
+            hits = {m.group(0).lower() for m in pattern.finditer(text)}
+            if hits:
+                counts[name] = len(hits)
+        for field, values in RegexSpy.extract_intelligence(text).items():
+            if field in cls.INTEL_WEIGHTS:
+                counts[f"intel_{field}"] = len(values)
+        return counts
+
+    @classmethod
+    def score(cls, text: str) -> float:
+        """Probability (0-1) that the message is a scam attempt."""
+        logit = cls.BIAS
+        for name, count in cls.features(text).items():
+            if name.startswith("intel_"):
+                logit += cls.INTEL_WEIGHTS[name[len("intel_"):]] * count
+            else:
+                logit += cls.FEATURE_WEIGHTS[name] * count
+        return 1 / (1 + math.exp(-logit))
+
+    @classmethod
+    def verdict(cls, text: str) -> Optional[bool]:
+        """True (SCAM) / False (SAFE) when confident, None when the LLM should decide."""
+        probability = cls.score(text)
+        if probability >= cls.SCAM_THRESHOLD:
+            return True
+        if probability <= cls.SAFE_THRESHOLD and len(text.split()) >= cls.SAFE_MIN_WORDS \
+                and not cls._patterns()["greeting"].search(text):
+            return False
+        return None
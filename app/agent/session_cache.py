@@ -0,0 +1,104 @@
+import threading
+import time
+from collections import OrderedDict
+
+
+class CachedSession:
+    """A session's in-memory state plus the unit of work holding its unflushed changes."""
+    __slots__ = ("state", "uow", "loaded_at")
+
+    def __init__(self, state: dict, uow):
+        self.state = state
+        self.uow = uow
+        self.loaded_at = time.time()
+
+
+class SessionCache:
+    """
+    In-process LRU/TTL cache of active sessions for write-behind.
+    Hot conversations are served from memory; their changes pile up on the
+    entry's unit of work and are flushed in batches by AgentBrain.
+    Entries are only dropped after their pending changes are written
+    (through `on_evict`), so eviction never loses a turn.
+    The TTL bounds how long a copy is trusted without hearing from Mongo.
+    """
+    def __init__(self, max_entries: int, ttl: float, on_evict=None):
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self.on_evict = on_evict
+        self.entries = OrderedDict()  # session_id -> CachedSession
+        self.lock = threading.Lock()
+        self.stats = {"hits": 0, "misses": 0, "evictions": 0, "expirations": 0, "conflicts": 0}
+
+    @property
+    def enabled(self) -> bool:
+        return self.max_entries > 0
+
+    def get(self, session_id: str):
+        now = time.time()
+        stale = None
+        with self.lock:
+            entry = self.entries.get(session_id)
+            if entry is not None and now - entry.loaded_at >= self.ttl:
+                stale = self.entries.pop(session_id)
+                self.stats["expirations"] += 1
+                entry = None
+            if entry is not None:
+                self.entries.move_to_end(session_id)
+                self.stats["hits"] += 1
+            else:
+                self.stats["misses"] += 1
+        if stale is not None:
+            self._evict(stale)
+        return entry
+
+    def peek(self, session_id: str):
+        """Entry without touching LRU order or stats (None if not cached)."""
+        with self.lock:
+            return self.entries.get(session_id)
+
+    def put(self, session_id: str, entry: CachedSession):
+        if not self.enabled:
+            return
+        evicted = []
+        with self.lock:
+            self.entries[session_id] = entry
+            self.entries.move_to_end(session_id)
+            while len(self.entries) > self.max_entries:
+                evicted.append(self.entries.popitem(last=False)[1])
+                self.stats["evictions"] += 1
+        for old in evicted:
+            self._evict(old)
+
+    def invalidate(self, session_id: str, conflict: bool = False):
+        """Forgets the cached copy so the next turn reloads it from Mongo."""
+        with self.lock:
+            self.entries.pop(session_id, None)
+            if conflict:
+                self.stats["conflicts"] += 1
+
+    def dirty(self, older_than: float = 0.0) -> list:
+        """Ids of sessions with changes recorded more than `older_than` seconds ago."""
+        cutoff = time.time() - older_than
+        with self.lock:
+            return [sid for sid, entry in self.entries.items()
+                    if entry.uow.dirty_since is not None and entry.uow.dirty_since <= cutoff]
+
+    def expire(self):
+        """Drops entries past their TTL (flushing them first)."""
+        now = time.time()
+        with self.lock:
+            stale = [sid for sid, entry in self.entries.items() if now - entry.loaded_at >= self.ttl]
+            expired = [self.entries.pop(sid) for sid in stale]
+            self.stats["expirations"] += len(expired)
+        for entry in expired:
+            self._evict(entry)
+
+    def _evict(self, entry: CachedSession):
+        if self.on_evict is not None and entry.uow.pending:
+            self.on_evict(entry)
+
+    def snapshot(self) -> dict:
+        with self.lock:
+            dirty = sum(1 for entry in self.entries.values() if entry.uow.pending)
+            return {**self.stats, "size": len(self.entries), "dirty": dirty, "max_entries": self.max_entries}
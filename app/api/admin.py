@@ -0,0 +1,64 @@
+from fastapi import APIRouter, Depends
+from fastapi.responses import PlainTextResponse
+from app.api.auth import require_api_key
+from app.agent.llm import llm_service
+from app.agent.brain import brain_service
+from app.core.executor import executor
+from app.core.jobs import job_queue
+from app.core.report_client import report_client
+from app.api.tracking import hit_buffer
+from app.agent.canary import canary_service
+from app.utils.metrics import registry
+
+# Operator endpoints (job payloads and errors name sessions): x-api-key required,
+# including for Prometheus scrapes of /admin/metrics
+router = APIRouter(dependencies=[Depends(require_api_key)])
+
+@router.get("/llm-stats")
+async def llm_stats_endpoint():
+    """
+    Response cache counters, how many checks the local pre-screens decided,
+    and the state of each task's circuit breaker.
+    """
+    return {
+        "cache": llm_service.cache.snapshot(),
+        "local_prescreen": llm_service.local_stats,
+        "breakers": {task: breaker.snapshot() for task, breaker in llm_service.breakers.items()}
+    }
+
+
+@router.get("/session-stats")
+async def session_stats_endpoint():
+    """Write-behind session cache counters (hits, pending flushes, version conflicts)."""
+    return brain_service.session_cache.snapshot()
+
+
+@router.get("/tracker-stats")
+async def tracker_stats_endpoint():
+    """Honeypot hit buffer (buffered, written, overwritten under overload) and canary attribution counters."""
+    return {"buffer": hit_buffer.snapshot(), "canary": canary_service.snapshot()}
+
+
+@router.get("/jobs")
+async def jobs_endpoint():
+    """
+    Background job queue: workers per type, this process's counters, queued/running/dead
+    per type, plus the report client's sent/retried/failed counts.
+    """
+    return {**await executor.run(job_queue.snapshot), "report_client": report_client.snapshot()}
+
+
+@router.get("/jobs/dead")
+async def dead_jobs_endpoint(limit: int = 50):
+    """Most recent dead-lettered jobs with their last error."""
+    jobs = await executor.run(job_queue.store.dead_letters, limit)
+    return [dict(job, _id=str(job["_id"])) for job in jobs]
+
+
+@router.get("/metrics", response_class=PlainTextResponse)
+async def metrics_endpoint():
+    """
+    Prometheus text exposition: per-stage turn latency, Mongo op counts/latency,
+    and Groq attempts, latency, retry sleeps and token usage per task/key/model.
+    """
+    return PlainTextResponse(registry.render(), media_type="text/plain; version=0.0.4")
@@ -0,0 +1,14 @@
+from typing import Optional
+
+from fastapi import Header, HTTPException
+
+from app.core.config import settings
+
+
+def require_api_key(x_api_key: Optional[str] = Header(None)):
+    """
+    Dependency for operator endpoints: the same x-api-key check as /chat, except
+    that it also refuses every request while GUVI_API_KEY is unset.
+    """
+    if not settings.GUVI_API_KEY or x_api_key != settings.GUVI_API_KEY:
+        raise HTTPException(status_code=401, detail="Invalid API Key")
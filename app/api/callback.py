@@ -1,37 +1,48 @@
 
-from fastapi import APIRouter, HTTPException, BackgroundTasks
+from fastapi import APIRouter, Depends, HTTPException
+from pydantic import BaseModel, Field
+from typing import List
+from pymongo import UpdateOne
 from app.database.connection import db_instance
+from app.api.auth import require_api_key
 from app.core.config import settings
-import requests
+from app.core.executor import executor
+from app.core.jobs import PermanentJobError, job_queue
+from app.core.report_client import ReportRejected, report_client
+import asyncio
 import logging
+import time
 
-router = APIRouter()
+router = APIRouter(dependencies=[Depends(require_api_key)])
 logger = logging.getLogger("honeypot")
 
-GUVI_URL = "https://hackathon.guvi.in/api/updateHoneyPotFinalResult"
+# Everything a report needs, without history or the rest of the session document.
+# The "report" subdocument is kept current by each turn's write (see AgentBrain._report_fields);
+# turn_count and strategy_state.detail_on_focus cover sessions that were never seeded with it.
+REPORT_PROJECTION = {
+    "scam_confirmed": 1, "persona_locked": 1, "report_status": 1, "report": 1, "turn_count": 1,
+    "strategy_state.detail_on_focus": 1,
+    "extracted_data.bank_account": 1, "extracted_data.upi": 1, "extracted_data.url": 1,
+    "extracted_data.phone": 1, "extracted_data.suspicious_keywords": 1,
+}
 
-def submit_report(session_id: str):
-    """
-    Constructs the final payload and sends it to GUVI.
-    """
-    db = db_instance.get_collection("active_sessions")
-    session = db.find_one({"_id": session_id})
-    
-    if not session:
-        logger.error(f"Cannot report session {session_id}: Not found")
-        return
 
-    # Calculate metrics
-    history = session.get("history", [])
-    total_messages = len(history) * 2 # user + agent roughly
-    
-    # Format Intelligence (Flatten the lists)
+def build_payload(session: dict) -> dict:
+    """GUVI final-result payload from a session read with REPORT_PROJECTION."""
+    report = session.get("report") or {}
     extracted = session.get("extracted_data", {})
-    
-    payload = {
-        "sessionId": session_id,
+    focus = report.get("focus", session.get("strategy_state", {}).get("detail_on_focus"))
+    counts = ", ".join(f"{key}={n}" for key, n in sorted(report.get("intel_counts", {}).items()))
+    notes = f"Persona {session.get('persona_locked')} engaged scammer. Strategy state: {focus}"
+    if counts:
+        notes += f". Intel collected: {counts}"
+    if report.get("first_seen") and report.get("last_seen"):
+        notes += f". Engaged for {report['last_seen'] - report['first_seen']:.0f}s"
+
+    return {
+        "sessionId": session["_id"],
         "scamDetected": session.get("scam_confirmed", False),
-        "totalMessagesExchanged": total_messages,
+        "totalMessagesExchanged": report.get("messages", session.get("turn_count", 0) * 2),
         "extractedIntelligence": {
             "bankAccounts": extracted.get("bank_account", []),
             "upiIds": extracted.get("upi", []),
@@ -39,25 +50,119 @@ def submit_report(session_id: str):
             "phoneNumbers": extracted.get("phone", []),
             "suspiciousKeywords": extracted.get("suspicious_keywords", [])
         },
-        "agentNotes": f"Persona {session.get('persona_locked')} engaged scammer. Strategy state: {session.get('strategy_state', {}).get('detail_on_focus')}"
+        "agentNotes": notes
     }
 
-    try:
-        if not settings.GUVI_API_KEY:
-            logger.warning("GUVI_API_KEY not set. Skipping report upload.")
-            return
 
-        response = requests.post(GUVI_URL, json=payload, timeout=10)
-        response.raise_for_status()
-        logger.info(f"✅ Successfully reported session {session_id} to GUVI.")
-    except Exception as e:
-        logger.error(f"❌ Failed to report to GUVI: {e}")
+async def submit_reports(session_ids: list, force: bool = False) -> dict:
+    """
+    Builds and sends the reports for many sessions in one pass: one projected find
+    for all of them, the uploads in parallel over the pooled report client, and one
+    bulk_write marking the successful ones as sent.
+    A session is reported once: `report_status` is set to "sent" after a successful
+    upload and later requests for it are skipped, unless `force` (admin re-send).
+    Without GUVI_API_KEY nothing is uploaded and `report_status` is set to "skipped".
+    Returns {session_id: "sent" | "already_sent" | "not_found" | "skipped" |
+    "rejected: <error>" | "failed: <error>"}; only "failed" is worth retrying.
+    """
+    db = db_instance.get_collection("active_sessions")
+    found = await executor.run(lambda: list(db.find({"_id": {"$in": list(session_ids)}}, REPORT_PROJECTION)))
+    sessions = {session["_id"]: session for session in found}
+    results = {}
+    due = []
+    for session_id in session_ids:
+        session = sessions.get(session_id)
+        if session is None:
+            logger.error(f"Cannot report session {session_id}: Not found")
+            results[session_id] = "not_found"
+        elif session.get("report_status") == "sent" and not force:
+            logger.info(f"Session {session_id} already reported. Skipping.")
+            results[session_id] = "already_sent"
+        else:
+            due.append(session)
+
+    if due and not settings.GUVI_API_KEY:
+        logger.warning("GUVI_API_KEY not set. Skipping report upload.")
+        results.update((session["_id"], "skipped") for session in due)
+        await _mark([session["_id"] for session in due], "skipped")
+        return results
+
+    outcomes = await asyncio.gather(*(report_client.send(s["_id"], build_payload(s)) for s in due),
+                                    return_exceptions=True)
+    sent = []
+    for session, outcome in zip(due, outcomes):
+        if isinstance(outcome, ReportRejected):
+            logger.error(f"❌ GUVI rejected the report for {session['_id']}: {outcome}")
+            results[session["_id"]] = f"rejected: {outcome}"
+        elif isinstance(outcome, Exception):
+            logger.error(f"❌ Failed to report {session['_id']} to GUVI: {outcome}")
+            results[session["_id"]] = f"failed: {type(outcome).__name__}: {outcome}"
+        else:
+            logger.info(f"✅ Successfully reported session {session['_id']} to GUVI.")
+            results[session["_id"]] = "sent"
+            sent.append(session["_id"])
+    await _mark(sent, "sent")
+    return results
+
+
+async def _mark(session_ids: list, status: str):
+    """Sets report_status on many sessions in one bulk_write."""
+    if not session_ids:
+        return
+    # Only these fields are written (no version bump), so a cached copy of the session can't conflict
+    now = time.time()
+    db = db_instance.get_collection("active_sessions")
+    await executor.run(db.bulk_write, [
+        UpdateOne({"_id": session_id}, {"$set": {"report_status": status, f"report_{status}_at": now}})
+        for session_id in session_ids
+    ], ordered=False)
+
+
+async def submit_report(session_id: str, force: bool = False):
+    """
+    Constructs the final payload and sends it to GUVI (the "report" job).
+    """
+    result = (await submit_reports([session_id], force))[session_id]
+    if result.startswith("rejected"):
+        # GUVI refused the payload; sending it again won't change that
+        raise PermanentJobError(f"Report for {session_id} {result}")
+    if result.startswith("failed"):
+        # Let the report job retry it
+        raise RuntimeError(f"Report for {session_id} {result}")
+
+
+job_queue.register("report", submit_report, concurrency=2)
 
 
 @router.post("/force-report/{session_id}")
-async def force_report_endpoint(session_id: str, background_tasks: BackgroundTasks):
+async def force_report_endpoint(session_id: str):
     """
     Manually triggers the report generation for testing or admin purposes.
     """
-    background_tasks.add_task(submit_report, session_id)
-    return {"status": "Report submission queued"}
+    # The session may still have unflushed turns in the write-behind cache
+    from app.agent.brain import brain_service
+    await brain_service.flush_session(session_id)
+    job_id = await job_queue.enqueue("report", {"session_id": session_id, "force": True})
+    return {"status": "Report submission queued", "job_id": str(job_id)}
+
+
+class BulkReportRequest(BaseModel):
+    session_ids: List[str] = Field(max_length=settings.REPORT_BULK_MAX)
+    force: bool = False
+
+
+@router.post("/force-report")
+async def bulk_force_report_endpoint(request: BulkReportRequest):
+    """
+    Builds and submits the reports for many sessions now, in one pass (not queued).
+    Sessions already reported are skipped unless `force`.
+    """
+    from app.agent.brain import brain_service
+    session_ids = list(dict.fromkeys(request.session_ids))
+    await asyncio.gather(*(brain_service.flush_session(session_id) for session_id in session_ids))
+    results = await submit_reports(session_ids, request.force)
+    summary = {}
+    for result in results.values():
+        status = result.split(":", 1)[0]
+        summary[status] = summary.get(status, 0) + 1
+    return {"summary": summary, "results": results}
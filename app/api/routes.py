@@ -1,4 +1,4 @@
-from fastapi import APIRouter, HTTPException, BackgroundTasks, Header
+from fastapi import APIRouter, HTTPException, Header
 from pydantic import BaseModel
 from typing import List, Optional
 
@@ -22,7 +22,6 @@ class ScamRequest(BaseModel):
 @router.post("/chat")
 async def chat_endpoint(
     request: ScamRequest, 
-    background_tasks: BackgroundTasks,
     x_api_key: Optional[str] = Header(None) 
 ):
     # 1. Security
@@ -31,7 +30,7 @@ async def chat_endpoint(
 
     # 2. Delegate Logic to Brain
     # The brain now handles everything: State, Scam Check, Planning, Generation, History
-    agent_reply = brain_service.process_turn(request.sessionId, request.message.text, background_tasks)
+    agent_reply = await brain_service.process_turn(request.sessionId, request.message.text)
     
     # 3. Save (Already done inside process_turn, but just ensuring no double save if legacy code existed)
     # brain_service.save_interaction(request.sessionId, incoming_text, agent_reply)
@@ -1,42 +1,118 @@
-
-from fastapi import APIRouter, Request, BackgroundTasks
+from fastapi import APIRouter, Request
+from starlette.responses import Response
 from app.database.connection import db_instance
+from app.database.hit_buffer import HitBuffer
+from app.core.config import settings
+from app.core.executor import executor
+from app.agent.canary import canary_service
+from app.utils.decoys import DecoyArtifacts
 import logging
 import time
 
 router = APIRouter()
 logger = logging.getLogger("honeypot")
 
-def log_ip_capture(path: str, ip: str, user_agent: str):
+# Hits are buffered in memory and written in batches (flushed by a loop started with the app)
+hit_buffer = HitBuffer(
+    lambda: db_instance.get_collection("honey_hits"),
+    max_size=settings.HIT_BUFFER_SIZE,
+    flush_size=settings.HIT_FLUSH_SIZE,
+    flush_interval=settings.HIT_FLUSH_INTERVAL,
+    max_wait=settings.HIT_MAX_WAIT)
+
+# Fake receipt PDF/PNG, rendered once at import (app startup) and served as-is
+decoys = DecoyArtifacts()
+
+async def log_ip_capture(path: str, ip: str, user_agent: str):
     """
-    Logs the captured IP to an active session?
-    Ideally we need to associate this click with a sessionId.
-    Since the link is generic, maybe we extract sessionId from query param?
-    Or if we can't, we just store it in a 'honey_hits' collection.
+    Records a hit on the honeypot. Links sent by the agent carry a signed canary
+    token (see app/agent/canary.py), which ties the hit to its session: the
+    visitor's IP is added to that session's extracted_data.ip. Hits on any other
+    path are kept in honey_hits without a session.
     """
-    # Try to find a recent session expecting IP? 
-    # For this hackathon, let's assume valid links have ?s=session_id
-    # But user said: "whatever is written after / ... will do same ip address capturing"
-    
-    db = db_instance.get_collection("honey_hits")
+    session_id = None
+    token = canary_service.token_from_path(path)
+    if token is not None:
+        session_id = canary_service.cached_session(token) or await executor.run(canary_service.resolve, token)
+    if session_id and canary_service.first_sighting(session_id, ip, user_agent):
+        # Lazy import: the brain imports half the app
+        from app.agent.brain import brain_service
+        await brain_service.record_canary_hit(session_id, ip, user_agent)
+
     hit = {
         "path": path,
         "ip": ip,
         "user_agent": user_agent,
+        "session_id": session_id,
         "timestamp": time.time()
     }
-    db.insert_one(hit)
-    logger.info(f"🕸️ HONEYPOT HIT: {ip} on {path}")
+    await hit_buffer.put(hit)
+    # Per-hit logging at debug: a scanner can send thousands of these a second
+    logger.debug(f"🕸️ HONEYPOT HIT: {ip} on {path} (session {session_id})")
+
 
 @router.get("/{full_path:path}")
-async def capture_scammer(request: Request, full_path: str, background_tasks: BackgroundTasks):
+async def capture_scammer(request: Request, full_path: str):
     """
     Catch-all route to simulate 'receipt.pdf' or whatever.
     """
     client_ip = request.client.host
     user_agent = request.headers.get("user-agent", "unknown")
     
-    background_tasks.add_task(log_ip_capture, full_path, client_ip, user_agent)
-    
-    # Return a fake PDF or generic message
-    return {"message": "File is corrupted. Please try again.", "error_code": "PDF_LOAD_FAIL"}
+    await log_ip_capture(full_path, client_ip, user_agent)
+
+    if settings.TRACKER_MODE == "json":
+        # Legacy: generic error message
+        return {"message": "File is corrupted. Please try again.", "error_code": "PDF_LOAD_FAIL"}
+
+    # Decoy mode: a plain Response around prebuilt bytes, no JSON encoding on this path.
+    # Reopening the link is still a hit, but the body only goes out once per client.
+    decoy = decoys.for_path(full_path)
+    if request.headers.get("if-none-match") == decoy.etag:
+        return Response(status_code=304, headers=decoy.headers)
+    return Response(decoy.body, media_type=decoy.media_type, headers=decoy.headers)
+
+
+class DecoyFastPath:
+    """
+    ASGI middleware in front of the router for decoy mode. Scanner and canary GETs
+    (any path whose first segment isn't one of the app's own routes) are answered
+    straight from the prebuilt artifacts: no route matching, dependency solving or
+    Request object, and the body is the same bytes object every time. Everything
+    else, and every request in json mode, goes through FastAPI as usual.
+    """
+    def __init__(self, app):
+        self.app = app
+        self.reserved = None
+
+    def _reserved_segments(self, app) -> set:
+        """First path segments of the app's own endpoints (chat, admin, health, docs...)."""
+        paths = list(app.openapi()["paths"]) + [app.docs_url, app.redoc_url, app.openapi_url]
+        segments = {path.lstrip("/").split("/", 1)[0] for path in paths if path}
+        return {segment for segment in segments if segment and not segment.startswith("{")}
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http" or scope["method"] not in ("GET", "HEAD") or settings.TRACKER_MODE != "decoy":
+            return await self.app(scope, receive, send)
+        if self.reserved is None:
+            self.reserved = self._reserved_segments(scope["app"])
+        path = scope["path"].lstrip("/")
+        if path.split("/", 1)[0] in self.reserved:
+            return await self.app(scope, receive, send)
+
+        user_agent, if_none_match = "unknown", None
+        for name, value in scope["headers"]:
+            if name == b"user-agent":
+                user_agent = value.decode("latin-1")
+            elif name == b"if-none-match":
+                if_none_match = value.decode("latin-1")
+        client = scope.get("client")
+        await log_ip_capture(path, client[0] if client else "unknown", user_agent)
+
+        decoy = decoys.for_path(path)
+        if if_none_match == decoy.etag:
+            await send({"type": "http.response.start", "status": 304, "headers": decoy.raw_headers_304})
+            await send({"type": "http.response.body", "body": b""})
+            return
+        await send({"type": "http.response.start", "status": 200, "headers": decoy.raw_headers})
+        await send({"type": "http.response.body", "body": decoy.body if scope["method"] == "GET" else b""})
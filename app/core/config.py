@@ -10,6 +10,80 @@ class Settings:
     
     # API Config
     PORT: int = int(os.getenv("PORT", 8000))
+    # Threads used to run blocking Mongo/LLM calls off the event loop (0 = run inline)
+    IO_WORKERS: int = int(os.getenv("IO_WORKERS", 256))
+    # Reply candidates generated in parallel per turn; the first one passing the safety check wins
+    REPLY_CANDIDATES: int = int(os.getenv("REPLY_CANDIDATES", 1))
+
+    # Response cache for deterministic LLM calls (classification, safety, extraction)
+    LLM_CACHE_SIZE: int = int(os.getenv("LLM_CACHE_SIZE", 10000))
+    LLM_CACHE_TTL: int = int(os.getenv("LLM_CACHE_TTL", 3600))
+    LLM_CACHE_SHARED: bool = os.getenv("LLM_CACHE_SHARED", "false").lower() == "true"
+
+    # Groq retry policy: total time budget per call, attempts, backoff (seconds)
+    LLM_CALL_DEADLINE: float = float(os.getenv("LLM_CALL_DEADLINE", 30))
+    LLM_MAX_ATTEMPTS: int = int(os.getenv("LLM_MAX_ATTEMPTS", 4))
+    LLM_BACKOFF_BASE: float = float(os.getenv("LLM_BACKOFF_BASE", 0.25))
+    LLM_BACKOFF_CAP: float = float(os.getenv("LLM_BACKOFF_CAP", 4))
+    # Send a slow call again on a second key after this many seconds (0 = never hedge)
+    LLM_HEDGE_AFTER: float = float(os.getenv("LLM_HEDGE_AFTER", 5))
+    # Per-task circuit breaker: trip at this failure rate over the window (needs BREAKER_MIN_CALLS calls)
+    BREAKER_FAILURE_RATE: float = float(os.getenv("BREAKER_FAILURE_RATE", 0.5))
+    BREAKER_MIN_CALLS: int = int(os.getenv("BREAKER_MIN_CALLS", 5))
+    BREAKER_WINDOW: float = float(os.getenv("BREAKER_WINDOW", 60))
+    BREAKER_COOLDOWN: float = float(os.getenv("BREAKER_COOLDOWN", 30))
+    # Write-behind session cache: entries kept in memory (0 = read/write Mongo every turn),
+    # how long a cached copy is trusted, and how long changes may sit unflushed (seconds)
+    SESSION_CACHE_SIZE: int = int(os.getenv("SESSION_CACHE_SIZE", 1000))
+    SESSION_CACHE_TTL: float = float(os.getenv("SESSION_CACHE_TTL", 300))
+    SESSION_FLUSH_INTERVAL: float = float(os.getenv("SESSION_FLUSH_INTERVAL", 2))
+    # Recent turns kept on the session document; the full transcript lives in session_turns
+    HISTORY_WINDOW: int = int(os.getenv("HISTORY_WINDOW", 12))
+    # Rolling summary: raw turns sent with each prompt, older turns are folded into the
+    # session summary in batches of SUMMARY_EVERY, kept under SUMMARY_MAX_WORDS.
+    # PROMPT_TURNS + SUMMARY_EVERY must fit in HISTORY_WINDOW (see validate)
+    PROMPT_TURNS: int = int(os.getenv("PROMPT_TURNS", 3))
+    SUMMARY_EVERY: int = int(os.getenv("SUMMARY_EVERY", 8))
+    SUMMARY_MAX_WORDS: int = int(os.getenv("SUMMARY_MAX_WORDS", 60))
+    # Background unknown-entity extraction: messages per LLM request, how long the first
+    # message waits for company (seconds), prompt size cap (chars), and queue bound
+    EXTRACTION_BATCH_SIZE: int = int(os.getenv("EXTRACTION_BATCH_SIZE", 10))
+    EXTRACTION_BATCH_WINDOW: float = float(os.getenv("EXTRACTION_BATCH_WINDOW", 0.5))
+    EXTRACTION_BATCH_CHARS: int = int(os.getenv("EXTRACTION_BATCH_CHARS", 6000))
+    EXTRACTION_QUEUE_SIZE: int = int(os.getenv("EXTRACTION_QUEUE_SIZE", 1000))
+    # Durable background jobs: "mongo" (jobs collection) or "memory"; workers per job type
+    # as "report=2,summary=2"; lease a worker holds on a job (renewed while it runs);
+    # attempts before a job is dead-lettered and the first retry delay (doubles each time)
+    JOB_BACKEND: str = os.getenv("JOB_BACKEND", "mongo")
+    JOB_CONCURRENCY: str = os.getenv("JOB_CONCURRENCY", "")
+    JOB_POLL_INTERVAL: float = float(os.getenv("JOB_POLL_INTERVAL", 1))
+    JOB_LEASE: float = float(os.getenv("JOB_LEASE", 60))
+    JOB_MAX_ATTEMPTS: int = int(os.getenv("JOB_MAX_ATTEMPTS", 5))
+    JOB_RETRY_BASE: float = float(os.getenv("JOB_RETRY_BASE", 2))
+    JOB_SHUTDOWN_GRACE: float = float(os.getenv("JOB_SHUTDOWN_GRACE", 10))
+    # Honeypot hit buffer: max hits held in memory, write batch size, max seconds a hit
+    # waits to be written, and how long a request may wait for room before the oldest is dropped
+    HIT_BUFFER_SIZE: int = int(os.getenv("HIT_BUFFER_SIZE", 10000))
+    HIT_FLUSH_SIZE: int = int(os.getenv("HIT_FLUSH_SIZE", 500))
+    HIT_FLUSH_INTERVAL: float = float(os.getenv("HIT_FLUSH_INTERVAL", 1))
+    HIT_MAX_WAIT: float = float(os.getenv("HIT_MAX_WAIT", 0.05))
+    # Canary links for the "ip" objective: public base URL of this app, signing secret
+    # (its own value, the same on every worker; never the inbound API key), tokens/visitors
+    # remembered in memory
+    CANARY_BASE_URL: str = os.getenv("CANARY_BASE_URL", "http://localhost:8000")
+    CANARY_SECRET: str = os.getenv("CANARY_SECRET", "")
+    CANARY_CACHE_SIZE: int = int(os.getenv("CANARY_CACHE_SIZE", 100000))
+    # Catch-all tracker response: "decoy" serves a fake receipt PDF/PNG, "json" the old error body
+    TRACKER_MODE: str = os.getenv("TRACKER_MODE", "decoy")
+    # GUVI final-result callback: endpoint, per-request timeout, pooled keep-alive connections,
+    # and quick retries (with backoff base in seconds) before the report job's own retry takes over
+    GUVI_REPORT_URL: str = os.getenv("GUVI_REPORT_URL", "https://hackathon.guvi.in/api/updateHoneyPotFinalResult")
+    REPORT_TIMEOUT: float = float(os.getenv("REPORT_TIMEOUT", 10))
+    REPORT_MAX_CONNECTIONS: int = int(os.getenv("REPORT_MAX_CONNECTIONS", 10))
+    REPORT_RETRIES: int = int(os.getenv("REPORT_RETRIES", 2))
+    REPORT_BACKOFF_BASE: float = float(os.getenv("REPORT_BACKOFF_BASE", 0.5))
+    # Most sessions one POST /admin/force-report may name
+    REPORT_BULK_MAX: int = int(os.getenv("REPORT_BULK_MAX", 500))
     
     # Database Config
     MONGO_URI: str = os.getenv("MONGO_URI")
@@ -30,5 +104,14 @@ class Settings:
     HG_KEY2: str = os.getenv("HG_KEY2")
     HG_KEY1: str = os.getenv("HG_KEY1")
     HG_KEY2: str = os.getenv("HG_KEY2")
+
+    def validate(self):
+        """Settings that only make sense together; checked once at startup."""
+        if self.PROMPT_TURNS + self.SUMMARY_EVERY > self.HISTORY_WINDOW:
+            # The prompt only sees the window: a turn that leaves it before the summary
+            # has folded it in would never reach the model again
+            raise ValueError(f"PROMPT_TURNS ({self.PROMPT_TURNS}) + SUMMARY_EVERY ({self.SUMMARY_EVERY}) "
+                             f"must not exceed HISTORY_WINDOW ({self.HISTORY_WINDOW})")
+
 # Create a single instance to import elsewhere
 settings = Settings()
\ No newline at end of file
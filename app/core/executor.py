@@ -0,0 +1,35 @@
+import asyncio
+import contextvars
+import functools
+from concurrent.futures import ThreadPoolExecutor
+
+from app.core.config import settings
+
+
+class BoundedExecutor:
+    """
+    Runs blocking calls (pymongo, Groq) off the event loop on a capped thread pool,
+    so one slow LLM call no longer stalls every other session on the worker.
+    max_workers=0 runs calls inline on the loop (legacy blocking behaviour, handy for debugging).
+    """
+    def __init__(self, max_workers: int):
+        self.max_workers = max_workers
+        self.pool = None
+        if max_workers > 0:
+            self.pool = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="honeypot-io")
+
+    async def run(self, func, *args, **kwargs):
+        """Awaits func(*args, **kwargs) executed on the pool (in a copy of the caller's context, like asyncio.to_thread)."""
+        if self.pool is None:
+            return func(*args, **kwargs)
+        loop = asyncio.get_running_loop()
+        ctx = contextvars.copy_context()
+        return await loop.run_in_executor(self.pool, functools.partial(ctx.run, func, *args, **kwargs))
+
+    def shutdown(self):
+        if self.pool is not None:
+            self.pool.shutdown(wait=False, cancel_futures=True)
+
+
+# Shared by every request on this worker
+executor = BoundedExecutor(settings.IO_WORKERS)
@@ -0,0 +1,342 @@
+"""
+Durable background jobs.
+
+Work that used to ride on FastAPI BackgroundTasks (reports, rolling summaries,
+honeypot hit logging) is enqueued here instead. Jobs live in the `jobs`
+collection, so they survive a restart. Workers on any instance claim them with
+a lease, and a crashed worker's jobs are picked up again once the lease runs
+out. Each job type has its own worker count, retry budget and lease. Failures
+are retried with exponential backoff; jobs that use up their attempts, or whose
+handler raises PermanentJobError, are kept with status "dead" for inspection
+(see /admin/jobs).
+
+JOB_BACKEND=memory swaps the collection for an in-process store (tests, local runs).
+"""
+import asyncio
+import itertools
+import os
+import socket
+import threading
+import time
+
+from pymongo import ReturnDocument
+from pymongo.errors import DuplicateKeyError
+
+from app.core.config import settings
+from app.core.executor import executor
+from app.utils import metrics
+
+# Longest pause between retries of a failing job (seconds)
+MAX_RETRY_DELAY = 300
+
+
+class PermanentJobError(Exception):
+    """Raised by a handler for a failure retrying can't fix; the job is dead-lettered straight away."""
+
+
+class MongoJobStore:
+    """Jobs as documents: claim is one find_one_and_update, so two workers never get the same job."""
+
+    def __init__(self, get_collection):
+        self.get_collection = get_collection
+
+    @property
+    def jobs(self):
+        return self.get_collection()
+
+    def ensure_indexes(self):
+        self.jobs.create_index([("type", 1), ("status", 1), ("run_at", 1)])
+        # At most one queued job per dedupe key (e.g. one pending summary per session)
+        self.jobs.create_index("dedupe_key", unique=True,
+                               partialFilterExpression={"status": "queued", "dedupe_key": {"$type": "string"}})
+
+    def enqueue(self, job: dict):
+        try:
+            return self.jobs.insert_one(job).inserted_id
+        except DuplicateKeyError:
+            return None
+
+    def claim(self, job_type: str, owner: str, lease: float):
+        now = time.time()
+        return self.jobs.find_one_and_update(
+            {"type": job_type, "$or": [
+                {"status": "queued", "run_at": {"$lte": now}},
+                # The worker holding it went away without finishing
+                {"status": "running", "lease_until": {"$lt": now}},
+            ]},
+            {"$set": {"status": "running", "owner": owner, "lease_until": now + lease},
+             "$inc": {"attempts": 1}},
+            sort=[("run_at", 1)],
+            return_document=ReturnDocument.AFTER
+        )
+
+    def extend(self, job_id, owner: str, lease: float):
+        self.jobs.update_one({"_id": job_id, "owner": owner}, {"$set": {"lease_until": time.time() + lease}})
+
+    def complete(self, job_id, owner: str):
+        self.jobs.delete_one({"_id": job_id, "owner": owner})
+
+    def fail(self, job_id, owner: str, error: str, retry_at=None):
+        if retry_at is None:
+            update = {"$set": {"status": "dead", "last_error": error, "failed_at": time.time()}}
+        else:
+            update = {"$set": {"status": "queued", "run_at": retry_at, "last_error": error}}
+        update["$unset"] = {"owner": "", "lease_until": ""}
+        try:
+            self.jobs.update_one({"_id": job_id, "owner": owner}, update)
+        except DuplicateKeyError:
+            # A job with the same dedupe_key was queued while this one ran; it does the same work
+            self.jobs.delete_one({"_id": job_id, "owner": owner})
+
+    def counts(self) -> dict:
+        counts = {}
+        for row in self.jobs.aggregate([{"$group": {"_id": {"type": "$type", "status": "$status"}, "n": {"$sum": 1}}}]):
+            counts.setdefault(row["_id"]["type"], {})[row["_id"]["status"]] = row["n"]
+        return counts
+
+    def dead_letters(self, limit: int = 50) -> list:
+        return list(self.jobs.find({"status": "dead"}).sort("failed_at", -1).limit(limit))
+
+
+class MemoryJobStore:
+    """Same contract as MongoJobStore, kept in process (lost on restart)."""
+
+    def __init__(self):
+        self.jobs = {}
+        self.lock = threading.Lock()
+        self._ids = itertools.count(1)
+
+    def ensure_indexes(self):
+        pass
+
+    def _queued_duplicate(self, job: dict) -> bool:
+        key = job.get("dedupe_key")
+        return bool(key) and any(j.get("dedupe_key") == key and j["status"] == "queued" and j is not job
+                                 for j in self.jobs.values())
+
+    def enqueue(self, job: dict):
+        with self.lock:
+            if self._queued_duplicate(job):
+                return None
+            job = dict(job, _id=next(self._ids))
+            self.jobs[job["_id"]] = job
+            return job["_id"]
+
+    def claim(self, job_type: str, owner: str, lease: float):
+        now = time.time()
+        with self.lock:
+            ready = [j for j in self.jobs.values() if j["type"] == job_type and (
+                (j["status"] == "queued" and j["run_at"] <= now) or
+                (j["status"] == "running" and j["lease_until"] < now))]
+            if not ready:
+                return None
+            job = min(ready, key=lambda j: j["run_at"])
+            job.update(status="running", owner=owner, lease_until=now + lease, attempts=job["attempts"] + 1)
+            return dict(job)
+
+    def extend(self, job_id, owner: str, lease: float):
+        with self.lock:
+            job = self.jobs.get(job_id)
+            if job and job.get("owner") == owner:
+                job["lease_until"] = time.time() + lease
+
+    def complete(self, job_id, owner: str):
+        with self.lock:
+            if self.jobs.get(job_id, {}).get("owner") == owner:
+                del self.jobs[job_id]
+
+    def fail(self, job_id, owner: str, error: str, retry_at=None):
+        with self.lock:
+            job = self.jobs.get(job_id)
+            if not job or job.get("owner") != owner:
+                return
+            job.pop("owner", None)
+            job.pop("lease_until", None)
+            job["last_error"] = error
+            if retry_at is None:
+                job.update(status="dead", failed_at=time.time())
+            elif self._queued_duplicate(job):
+                # Same rule as Mongo's unique dedupe_key index: the queued job covers this one
+                del self.jobs[job_id]
+            else:
+                job.update(status="queued", run_at=retry_at)
+
+    def counts(self) -> dict:
+        counts = {}
+        with self.lock:
+            for job in self.jobs.values():
+                by_status = counts.setdefault(job["type"], {})
+                by_status[job["status"]] = by_status.get(job["status"], 0) + 1
+        return counts
+
+    def dead_letters(self, limit: int = 50) -> list:
+        with self.lock:
+            dead = [dict(j) for j in self.jobs.values() if j["status"] == "dead"]
+        return sorted(dead, key=lambda j: j["failed_at"], reverse=True)[:limit]
+
+
+class JobType:
+    def __init__(self, name, handler, concurrency, max_attempts, lease):
+        self.name = name
+        self.handler = handler
+        self.concurrency = concurrency
+        self.max_attempts = max_attempts
+        self.lease = lease
+
+
+def parse_concurrency(value: str) -> dict:
+    """"report=2,summary=4" -> {"report": 2, "summary": 4}"""
+    limits = {}
+    for part in (value or "").split(","):
+        name, _, count = part.partition("=")
+        if name.strip() and count.strip():
+            limits[name.strip()] = int(count)
+    return limits
+
+
+class JobQueue:
+    """
+    Handlers are registered per job type at import time and called with the job's
+    payload as keyword arguments; coroutine handlers are awaited on the loop,
+    plain functions run on the bounded executor. start() launches `concurrency`
+    workers per type; they poll the store, or wake straight away when this
+    process enqueues something.
+    """
+    def __init__(self, store):
+        self.store = store
+        self.types = {}
+        self.owner = f"{socket.gethostname()}:{os.getpid()}"
+        self.workers = []
+        self.wakeups = {}
+        self.stopping = False
+        self.stats = {"enqueued": 0, "deduplicated": 0, "done": 0, "retried": 0, "dead": 0}
+
+    def ensure_indexes(self):
+        """Run once at startup, before anything is enqueued: the dedupe rule relies on the unique index."""
+        self.store.ensure_indexes()
+
+    def register(self, name: str, handler, concurrency: int = 1, max_attempts: int = None, lease: float = None):
+        concurrency = parse_concurrency(settings.JOB_CONCURRENCY).get(name, concurrency)
+        self.types[name] = JobType(name, handler, concurrency,
+                                   max_attempts or settings.JOB_MAX_ATTEMPTS, lease or settings.JOB_LEASE)
+
+    async def enqueue(self, job_type: str, payload: dict = None, dedupe_key: str = None, delay: float = 0):
+        """Stores a job; returns its id, or None if an identical one (same dedupe_key) is already queued."""
+        now = time.time()
+        job = {"type": job_type, "payload": payload or {}, "status": "queued", "attempts": 0,
+               "run_at": now + delay, "created_at": now}
+        if dedupe_key:
+            job["dedupe_key"] = dedupe_key
+        job_id = await executor.run(self.store.enqueue, job)
+        if job_id is None:
+            self.stats["deduplicated"] += 1
+            return None
+        self.stats["enqueued"] += 1
+        wakeup = self.wakeups.get(job_type)
+        if wakeup is not None and not delay:
+            wakeup.set()
+        return job_id
+
+    def start(self):
+        self.stopping = False
+        for job_type in self.types.values():
+            self.wakeups[job_type.name] = asyncio.Event()
+            for _ in range(job_type.concurrency):
+                self.workers.append(asyncio.create_task(self._worker(job_type)))
+        print(f"🧰 [JOBS] {len(self.workers)} workers for {', '.join(self.types)}")
+
+    async def stop(self, grace: float = None):
+        """Lets running jobs finish for up to `grace` seconds; anything cut off is retried after its lease."""
+        self.stopping = True
+        for wakeup in self.wakeups.values():
+            wakeup.set()
+        if self.workers:
+            _, pending = await asyncio.wait(self.workers, timeout=settings.JOB_SHUTDOWN_GRACE if grace is None else grace)
+            for task in pending:
+                task.cancel()
+            await asyncio.gather(*self.workers, return_exceptions=True)
+        self.workers = []
+
+    async def _worker(self, job_type: JobType):
+        wakeup = self.wakeups[job_type.name]
+        while not self.stopping:
+            try:
+                job = await executor.run(self.store.claim, job_type.name, self.owner, job_type.lease)
+            except Exception as e:
+                print(f"❌ [JOBS] Claim failed for {job_type.name}: {e}")
+                job = None
+            if job is None:
+                wakeup.clear()
+                try:
+                    await asyncio.wait_for(wakeup.wait(), settings.JOB_POLL_INTERVAL)
+                except asyncio.TimeoutError:
+                    pass
+                continue
+            try:
+                await self.run_job(job_type, job)
+            except Exception as e:
+                # The store failed while finishing the job (complete/fail). The worker stays
+                # up; the job is claimed again once its lease runs out.
+                print(f"❌ [JOBS] {job_type.name} worker error on {job['_id']}: {type(e).__name__}: {e}")
+                await asyncio.sleep(settings.JOB_POLL_INTERVAL)
+
+    async def _keep_lease(self, job_type: JobType, job_id):
+        while True:
+            await asyncio.sleep(job_type.lease / 3)
+            try:
+                await executor.run(self.store.extend, job_id, self.owner, job_type.lease)
+            except Exception as e:
+                print(f"⚠️ [JOBS] Extending the lease of {job_id} failed: {e}")
+
+    async def run_job(self, job_type: JobType, job: dict):
+        started = time.perf_counter()
+        if job["attempts"] > job_type.max_attempts:
+            # Claimed again after its lease ran out each time: the job keeps killing its worker
+            await executor.run(self.store.fail, job["_id"], self.owner, job.get("last_error") or "lease expired")
+            self._record(job_type, "dead", started)
+            return
+
+        heartbeat = asyncio.create_task(self._keep_lease(job_type, job["_id"]))
+        try:
+            if asyncio.iscoroutinefunction(job_type.handler):
+                await job_type.handler(**job["payload"])
+            else:
+                await executor.run(job_type.handler, **job["payload"])
+        except Exception as e:
+            error = f"{type(e).__name__}: {e}"
+            if isinstance(e, PermanentJobError) or job["attempts"] >= job_type.max_attempts:
+                print(f"💀 [JOBS] {job_type.name} {job['_id']} dead after {job['attempts']} attempts: {error}")
+                await executor.run(self.store.fail, job["_id"], self.owner, error)
+                self._record(job_type, "dead", started)
+            else:
+                delay = min(settings.JOB_RETRY_BASE * 2 ** (job["attempts"] - 1), MAX_RETRY_DELAY)
+                print(f"⚠️ [JOBS] {job_type.name} {job['_id']} failed (attempt {job['attempts']}): {error}. "
+                      f"Retrying in {delay:.0f}s")
+                await executor.run(self.store.fail, job["_id"], self.owner, error, time.time() + delay)
+                self._record(job_type, "retried", started)
+            return
+        finally:
+            heartbeat.cancel()
+        await executor.run(self.store.complete, job["_id"], self.owner)
+        self._record(job_type, "done", started)
+
+    def _record(self, job_type: JobType, outcome: str, started: float):
+        self.stats[outcome] += 1
+        metrics.JOBS.inc(type=job_type.name, outcome=outcome)
+        metrics.JOB_SECONDS.observe(time.perf_counter() - started, type=job_type.name)
+
+    def snapshot(self) -> dict:
+        return {
+            "backend": type(self.store).__name__,
+            "workers": {name: t.concurrency for name, t in self.types.items()},
+            "process": dict(self.stats),
+            "queue": self.store.counts(),
+        }
+
+
+def _job_collection():
+    from app.database.connection import db_instance
+    return db_instance.get_collection("jobs")
+
+
+job_queue = JobQueue(MemoryJobStore() if settings.JOB_BACKEND == "memory" else MongoJobStore(_job_collection))
@@ -0,0 +1,98 @@
+import asyncio
+import random
+
+import httpx
+
+from app.core.config import settings
+from app.agent.key_manager import parse_duration
+
+
+class ReportRejected(Exception):
+    """The report endpoint answered with a non-retryable status (4xx other than 408/429)."""
+
+
+class ReportClient:
+    """
+    Shared keep-alive HTTP client for the GUVI final-result callback.
+
+    One pooled httpx.AsyncClient per event loop instead of a new connection per
+    report. At most `max_connections` requests are in flight; the rest wait on a
+    semaphore in front of the pool (cheaper than queueing inside httpx's pool,
+    which slows down sharply with many waiters) and a request backing off gives
+    up its slot while it sleeps. Transient failures (connection errors, timeouts,
+    408/429/5xx) are retried a few times with jittered backoff, honoring
+    Retry-After; when those run out the error goes back to the report job, which
+    retries on its own, slower schedule.
+    """
+    RETRY_STATUSES = {408, 429}
+
+    def __init__(self, url: str, timeout: float, max_connections: int, retries: int, backoff_base: float,
+                 transport=None):
+        self.url = url
+        self.timeout = timeout
+        self.max_connections = max_connections
+        self.retries = retries
+        self.backoff_base = backoff_base
+        self.transport = transport  # tests / benches point this at a stand-in server
+        self._client = None
+        self._slots = None
+        self._loop = None
+        self.stats = {"sent": 0, "retries": 0, "failed": 0, "rejected": 0}
+
+    def _get_client(self) -> httpx.AsyncClient:
+        loop = asyncio.get_running_loop()
+        if self._client is None or self._loop is not loop:
+            limits = httpx.Limits(max_connections=self.max_connections,
+                                  max_keepalive_connections=self.max_connections)
+            self._client = httpx.AsyncClient(timeout=self.timeout, limits=limits, transport=self.transport)
+            self._slots = asyncio.Semaphore(self.max_connections)
+            self._loop = loop
+        return self._client
+
+    def _backoff(self, attempt: int, response=None) -> float:
+        delay = random.uniform(0, self.backoff_base * 2 ** attempt)
+        if response is not None:
+            delay = max(delay, parse_duration(response.headers.get("retry-after")))
+        return delay
+
+    async def send(self, session_id: str, payload: dict):
+        """POSTs one report. The session id doubles as the idempotency key for the receiver."""
+        client = self._get_client()
+        headers = {"Idempotency-Key": session_id}
+        for attempt in range(self.retries + 1):
+            response = None
+            try:
+                async with self._slots:
+                    response = await client.post(self.url, json=payload, headers=headers)
+                if response.status_code < 400:
+                    self.stats["sent"] += 1
+                    return response
+                if response.status_code < 500 and response.status_code not in self.RETRY_STATUSES:
+                    self.stats["rejected"] += 1
+                    raise ReportRejected(f"{response.status_code} from report endpoint: {response.text[:200]}")
+                error = httpx.HTTPStatusError(f"{response.status_code} from report endpoint",
+                                              request=response.request, response=response)
+            except httpx.TransportError as e:
+                error = e
+            if attempt == self.retries:
+                break
+            self.stats["retries"] += 1
+            await asyncio.sleep(self._backoff(attempt, response))
+        self.stats["failed"] += 1
+        raise error
+
+    async def close(self):
+        if self._client is not None:
+            await self._client.aclose()
+            self._client = None
+
+    def snapshot(self) -> dict:
+        return {"url": self.url, "max_connections": self.max_connections, **self.stats}
+
+
+report_client = ReportClient(
+    settings.GUVI_REPORT_URL,
+    timeout=settings.REPORT_TIMEOUT,
+    max_connections=settings.REPORT_MAX_CONNECTIONS,
+    retries=settings.REPORT_RETRIES,
+    backoff_base=settings.REPORT_BACKOFF_BASE)
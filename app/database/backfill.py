@@ -0,0 +1,193 @@
+"""
+Bulk re-extraction of stored conversations with RegexSpy.
+
+Run after adding a pattern to RegexSpy.REGEX_PATTERNS to backfill it over
+every stored scammer message:
+
+    python -m app.database.backfill --fields crypto_wallet --workers 4
+
+Messages are streamed from Mongo with a cursor and a projection (never loaded
+all at once), extracted in batches on a process pool, and written back with
+unordered bulk_write updates that union the values into the stored lists.
+Progress is checkpointed per batch, so an interrupted run resumes where it
+stopped; the union makes replaying a batch harmless.
+"""
+import argparse
+import time
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+
+from pymongo import UpdateOne
+
+from app.utils.regex_spy import RegexSpy
+
+# Intel keys with their own field under extracted_data (see AgentBrain.STANDARD_KEYS);
+# anything else is stored as {"type", "value"} objects in dynamic_intel
+STANDARD_KEYS = {"upi", "bank_account", "ifsc", "phone", "url", "email", "suspicious_keywords"}
+
+
+def extract_batch(batch, fields=None):
+    """
+    Worker side: runs RegexSpy over [(session_id, text), ...] and merges the
+    findings per session. Returns {session_id: {field: [values]}}.
+    """
+    found = {}
+    for session_id, text in batch:
+        if not text:
+            continue
+        for field, values in RegexSpy.extract_intelligence(text).items():
+            if fields and field not in fields:
+                continue
+            merged = found.setdefault(session_id, {}).setdefault(field, {})
+            merged.update(dict.fromkeys(values))
+    return {sid: {f: list(v) for f, v in intel.items()} for sid, intel in found.items()}
+
+
+def count_key(intel_type) -> str:
+    """Intel type as a report.intel_counts field name (LLM-named types could contain '.' or '$')."""
+    return str(intel_type).replace(".", "_").replace("$", "_")
+
+
+def _union(field: str, values: list) -> dict:
+    # $ifNull: older documents start some lists out as null. $literal: a value like "$500"
+    # would otherwise be read as a field path
+    return {"$setUnion": [{"$ifNull": [f"${field}", []]}, {"$literal": values}]}
+
+
+def build_update(intel: dict) -> list:
+    """
+    Pipeline update adding one session's findings. Each list is unioned with the
+    stored one and report.intel_counts is recomputed from the result, so the
+    counters match extracted_data however many of the values were already there.
+    The version bump makes cached copies reload.
+    """
+    fields = {}
+    dynamic = []
+    for field, values in intel.items():
+        if field in STANDARD_KEYS:
+            merged = fields[f"extracted_data.{field}"] = _union(f"extracted_data.{field}", values)
+            fields[f"report.intel_counts.{field}"] = {"$size": merged}
+        else:
+            dynamic.extend({"type": field, "value": v} for v in values)
+    if dynamic:
+        merged = fields["extracted_data.dynamic_intel"] = _union("extracted_data.dynamic_intel", dynamic)
+        for intel_type in dict.fromkeys(item["type"] for item in dynamic):
+            fields[f"report.intel_counts.{count_key(intel_type)}"] = {"$size": {"$filter": {
+                "input": merged, "cond": {"$eq": ["$$this.type", {"$literal": intel_type}]}}}}
+    fields["version"] = {"$add": [{"$ifNull": ["$version", 0]}, 1]}
+    return [{"$set": fields}]
+
+
+class Backfill:
+    """
+    source="turns" reads the session_turns log; source="history" reads legacy
+    sessions that still keep their whole conversation in active_sessions.history.
+    Both are walked in _id order so the checkpoint is simply the last _id done.
+    """
+    def __init__(self, db, source: str = "turns", fields=None, batch_size: int = 1000,
+                 workers: int = 4, job: str = None):
+        self.db = db
+        self.source = source
+        self.fields = set(fields) if fields else None
+        self.batch_size = batch_size
+        self.workers = workers
+        self.job = job or f"regex_backfill:{source}:{','.join(sorted(self.fields or ['all']))}"
+        self.stats = {"messages": 0, "batches": 0, "sessions_updated": 0}
+
+    @property
+    def checkpoints(self):
+        return self.db["backfill_checkpoints"]
+
+    def _load_checkpoint(self):
+        doc = self.checkpoints.find_one({"_id": self.job})
+        return doc["last_id"] if doc else None
+
+    def _save_checkpoint(self, last_id):
+        self.checkpoints.update_one(
+            {"_id": self.job},
+            {"$set": {"last_id": last_id, "updated_at": time.time()}, "$inc": {
+                "messages": self.stats["messages"], "sessions_updated": self.stats["sessions_updated"]}},
+            upsert=True
+        )
+        self.stats["messages"] = self.stats["sessions_updated"] = 0
+
+    def _cursor(self, after):
+        query = {"_id": {"$gt": after}} if after is not None else {}
+        if self.source == "turns":
+            cursor = self.db["session_turns"].find(query, {"session_id": 1, "user": 1})
+        else:
+            query["turn_count"] = {"$exists": False}
+            cursor = self.db["active_sessions"].find(query, {"history.user": 1})
+        return cursor.sort("_id", 1).batch_size(self.batch_size)
+
+    def batches(self, after=None):
+        """Yields (last_id, [(session_id, text), ...]) of about batch_size messages each."""
+        batch, last_id = [], None
+        for doc in self._cursor(after):
+            if self.source == "turns":
+                batch.append((doc["session_id"], doc.get("user")))
+            else:
+                batch.extend((doc["_id"], turn.get("user")) for turn in doc.get("history", []))
+            last_id = doc["_id"]
+            if len(batch) >= self.batch_size:
+                yield last_id, batch
+                batch = []
+        if batch:
+            yield last_id, batch
+
+    def _write(self, last_id, batch_size, found):
+        ops = [UpdateOne({"_id": sid}, build_update(intel)) for sid, intel in found.items() if intel]
+        if ops:
+            self.db["active_sessions"].bulk_write(ops, ordered=False)
+        self.stats["messages"] += batch_size
+        self.stats["sessions_updated"] += len(ops)
+        self.stats["batches"] += 1
+        self._save_checkpoint(last_id)
+
+    def run(self, resume: bool = True):
+        after = self._load_checkpoint() if resume else None
+        print(f"🔁 [BACKFILL] {self.job} starting after {after}")
+        started = time.time()
+        total = 0
+
+        if self.workers <= 0:
+            for last_id, batch in self.batches(after):
+                self._write(last_id, len(batch), extract_batch(batch, self.fields))
+                total += len(batch)
+        else:
+            # Results are consumed in submission order so the checkpoint never skips
+            # an unfinished batch; at most 2 batches per worker are in flight.
+            with ProcessPoolExecutor(max_workers=self.workers) as pool:
+                pending = deque()
+                for last_id, batch in self.batches(after):
+                    pending.append((last_id, len(batch), pool.submit(extract_batch, batch, self.fields)))
+                    if len(pending) >= self.workers * 2:
+                        last, size, future = pending.popleft()
+                        self._write(last, size, future.result())
+                        total += size
+                while pending:
+                    last, size, future = pending.popleft()
+                    self._write(last, size, future.result())
+                    total += size
+
+        elapsed = time.time() - started
+        print(f"✅ [BACKFILL] {self.job}: {total} messages in {self.stats['batches']} batches, "
+              f"{elapsed:.1f}s ({total / max(elapsed, 1e-9):.0f} msg/s)")
+        return total
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Re-run RegexSpy over stored conversations")
+    parser.add_argument("--source", choices=["turns", "history"], default="turns")
+    parser.add_argument("--fields", nargs="*", help="only backfill these fields (default: all)")
+    parser.add_argument("--batch-size", type=int, default=1000)
+    parser.add_argument("--workers", type=int, default=4, help="extraction processes (0 = inline)")
+    parser.add_argument("--restart", action="store_true", help="ignore the saved checkpoint")
+    args = parser.parse_args()
+
+    from app.database.connection import db_instance
+    db_instance.connect()
+    try:
+        Backfill(db_instance.db, args.source, args.fields, args.batch_size, args.workers).run(resume=not args.restart)
+    finally:
+        db_instance.disconnect()
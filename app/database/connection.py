@@ -1,6 +1,7 @@
 from pymongo import MongoClient
 from pymongo.errors import ConnectionFailure
 from app.core.config import settings
+from app.utils.metrics import MongoCommandMetrics
 import sys
 
 class Database:
@@ -12,7 +13,8 @@ class Database:
         if not self.client:
             try:
                 print("🔌 Connecting to MongoDB...")
-                self.client = MongoClient(settings.MONGO_URI)
+                # Op counts and latency for /admin/metrics
+                self.client = MongoClient(settings.MONGO_URI, event_listeners=[MongoCommandMetrics()])
                 self.db = self.client[settings.DB_NAME]
                 
                 # Test the connection specifically
@@ -0,0 +1,112 @@
+import asyncio
+from collections import deque
+
+from pymongo.errors import BulkWriteError
+
+from app.core.executor import executor
+from app.database.unit_of_work import DUPLICATE_KEY
+
+
+class HitBuffer:
+    """
+    In-process buffer for honeypot hits.
+    The tracker route appends a hit and returns; a background loop writes the
+    buffer out with one insert_many(ordered=False) once `flush_size` hits are
+    waiting or `flush_interval` seconds have passed, whichever comes first.
+
+    Bounded at `max_size`: when Mongo falls behind, producers wait up to
+    `max_wait` seconds for a flush to make room (backpressure), after which
+    the oldest hit is overwritten, ring-buffer style, so a flood can never
+    grow memory without limit.
+    """
+    def __init__(self, get_collection, max_size: int, flush_size: int, flush_interval: float, max_wait: float):
+        self.get_collection = get_collection
+        self.max_size = max_size
+        self.flush_size = flush_size
+        self.flush_interval = flush_interval
+        self.max_wait = max_wait
+        self.hits = deque()
+        self._wakeup = None   # set when flush_size hits are waiting
+        self._drained = None  # set after each flush
+        self._flush_lock = None
+        self.stats = {"accepted": 0, "written": 0, "overwritten": 0, "flushes": 0, "failed_flushes": 0,
+                      "backpressure_waits": 0}
+
+    def _events(self):
+        if self._wakeup is None:
+            self._wakeup, self._drained, self._flush_lock = asyncio.Event(), asyncio.Event(), asyncio.Lock()
+
+    async def put(self, hit: dict):
+        self._events()
+        if len(self.hits) >= self.max_size:
+            self.stats["backpressure_waits"] += 1
+            self._wakeup.set()
+            self._drained.clear()
+            try:
+                await asyncio.wait_for(self._drained.wait(), self.max_wait)
+            except asyncio.TimeoutError:
+                pass
+            if len(self.hits) >= self.max_size:
+                self.hits.popleft()
+                self.stats["overwritten"] += 1
+        self.hits.append(hit)
+        self.stats["accepted"] += 1
+        if len(self.hits) >= self.flush_size:
+            self._wakeup.set()
+
+    async def flush(self) -> int:
+        """Writes out everything buffered so far. Returns the number of hits written."""
+        self._events()
+        async with self._flush_lock:
+            if not self.hits:
+                return 0
+            batch = list(self.hits)
+            self.hits.clear()
+            self._drained.set()
+            try:
+                await executor.run(self.get_collection().insert_many, batch, ordered=False)
+            except BulkWriteError as e:
+                # Duplicate keys are hits a previous, interrupted flush already stored
+                failed = [batch[err["index"]] for err in e.details.get("writeErrors", [])
+                          if err.get("code") != DUPLICATE_KEY]
+                self._requeue(failed, e)
+                written = len(batch) - len(failed)
+                self.stats["flushes"] += 1
+                self.stats["written"] += written
+                return written
+            except Exception as e:
+                # insert_many has set an _id on every hit, so the ones that did get
+                # in before the error come back as duplicates on the retry
+                self._requeue(batch, e)
+                return 0
+            self.stats["flushes"] += 1
+            self.stats["written"] += len(batch)
+            return len(batch)
+
+    def _requeue(self, batch: list, error):
+        """Puts unwritten hits back in front of newer ones, as far as the bound allows."""
+        if not batch:
+            return
+        self.stats["failed_flushes"] += 1
+        room = self.max_size - len(self.hits)
+        if room > 0:
+            self.hits.extendleft(reversed(batch[-room:]))
+        self.stats["overwritten"] += max(len(batch) - max(room, 0), 0)
+        print(f"❌ [TRACKER] Writing {len(batch)} hits failed: {error}")
+
+    async def run(self):
+        """Background flush loop, started with the app."""
+        self._events()
+        while True:
+            waiter = asyncio.ensure_future(self._wakeup.wait())
+            try:
+                await asyncio.wait({waiter}, timeout=self.flush_interval)
+            finally:
+                waiter.cancel()
+            self._wakeup.clear()
+            # Shielded: cancelling the loop at shutdown must not drop a batch mid-write
+            # (the final flush() waits for it on the lock)
+            await asyncio.shield(self.flush())
+
+    def snapshot(self) -> dict:
+        return {"buffered": len(self.hits), "max_size": self.max_size, **self.stats}
@@ -0,0 +1,211 @@
+import threading
+import time
+
+from pymongo.errors import BulkWriteError, DuplicateKeyError, PyMongoError
+
+# Mongo's duplicate key error code
+DUPLICATE_KEY = 11000
+
+
+class SessionUnitOfWork:
+    """
+    Collects every change a turn makes to one session document and writes them
+    in a single update_one at the end of the turn.
+
+    Callers keep mutating their in-memory state as before and record the matching
+    Mongo operator here. A session that does not exist in Mongo yet is inserted
+    whole at flush time (so creating it costs no extra round-trip).
+    Documents for side collections (e.g. the append-only turn log) can be queued
+    too; they go out as one insert_many per collection in the same flush.
+
+    With a `version`, writes are optimistic: the update only matches the document
+    version this buffer was built on and bumps it. If another worker got there
+    first, the buffer is rebased onto the stored document (see _rebase) and
+    written with the new version as guard, up to CONFLICT_RETRIES times; flush()
+    then returns False so the caller reloads its copy.
+    """
+    # Guarded rebase attempts on a version conflict before only the commutative part is written
+    CONFLICT_RETRIES = 3
+    # $set fields that merge as a maximum (timestamps) when rebasing
+    MAX_FIELDS = ("report.last_seen",)
+
+    def __init__(self, collection, session_id: str, new_state: dict = None, version: int = None):
+        self.collection = collection
+        self.session_id = session_id
+        # Full document to insert if the session was created during this turn
+        self.new_state = new_state
+        self.version = version
+        self.updates = {}
+        self.appends = {}  # collection name -> (collection, [docs])
+        # When the oldest unflushed change was recorded (None = clean)
+        self.dirty_since = time.time() if new_state is not None else None
+        self.lock = threading.RLock()
+
+    def _touch(self):
+        if self.dirty_since is None:
+            self.dirty_since = time.time()
+
+    def set(self, field: str, value):
+        with self.lock:
+            self.updates.setdefault("$set", {})[field] = value
+            self._touch()
+
+    def add_to_set(self, field: str, values: list):
+        """$addToSet with $each; repeated calls for the same field are merged."""
+        with self.lock:
+            current = self.updates.setdefault("$addToSet", {}).setdefault(field, {"$each": []})
+            current["$each"].extend(v for v in values if v not in current["$each"])
+            self._touch()
+
+    def push(self, field: str, value, slice: int = None):
+        """$push with $each; `slice` keeps only the last N elements of the array (capped window)."""
+        with self.lock:
+            current = self.updates.setdefault("$push", {}).setdefault(field, {"$each": []})
+            current["$each"].append(value)
+            if slice is not None:
+                current["$slice"] = -slice
+            self._touch()
+
+    def inc(self, field: str, amount: int = 1):
+        with self.lock:
+            inc = self.updates.setdefault("$inc", {})
+            inc[field] = inc.get(field, 0) + amount
+            self._touch()
+
+    def append(self, collection, doc: dict):
+        """Queues a document for insertion into another collection at flush time."""
+        with self.lock:
+            self.appends.setdefault(collection.name, (collection, []))[1].append(doc)
+            self._touch()
+
+    def merge(self, update: dict):
+        """Folds a raw update document ($set / $addToSet-$each / $push / $inc) into the buffer."""
+        with self.lock:
+            for field, value in update.get("$set", {}).items():
+                self.set(field, value)
+            for field, spec in update.get("$addToSet", {}).items():
+                self.add_to_set(field, spec["$each"] if isinstance(spec, dict) else [spec])
+            for field, spec in update.get("$push", {}).items():
+                window = -spec["$slice"] if isinstance(spec, dict) and "$slice" in spec else None
+                for item in (spec["$each"] if isinstance(spec, dict) else [spec]):
+                    self.push(field, item, slice=window)
+            for field, amount in update.get("$inc", {}).items():
+                self.inc(field, amount)
+
+    @property
+    def pending(self) -> bool:
+        return self.new_state is not None or bool(self.updates) or bool(self.appends)
+
+    def flush(self) -> bool:
+        """
+        Writes everything buffered so far (one round-trip per collection), then clears the buffer.
+        Returns False if the document had been changed by someone else since it was loaded.
+        """
+        with self.lock:
+            if not self.pending:
+                return True
+            clean = True
+            self._insert_appends()
+            if self.new_state is not None:
+                try:
+                    # The in-memory state already carries every buffered change
+                    self.collection.insert_one(self.new_state)
+                    self.new_state, self.updates = None, {}
+                    self.dirty_since = time.time() if self.appends else None
+                    return True
+                except DuplicateKeyError:
+                    # Another request created the session first; apply our changes on top
+                    self.new_state = None
+                    clean = False
+            if self.updates:
+                clean = self._write(self.updates) and clean
+            self.updates = {}
+            # Side documents that didn't make it stay queued for the next flush
+            self.dirty_since = time.time() if self.appends else None
+            return clean
+
+    def _insert_appends(self):
+        """
+        One insert_many(ordered=False) per side collection. A failure here never
+        blocks the session write: documents that may not have been stored stay
+        queued. insert_many has already given them an _id, so on the retry the
+        ones that did get in come back as duplicate key errors and count as written.
+        """
+        appends, self.appends = self.appends, {}
+        for name, (collection, docs) in appends.items():
+            try:
+                collection.insert_many(docs, ordered=False)
+            except BulkWriteError as e:
+                failed = {err["index"] for err in e.details.get("writeErrors", []) if err.get("code") != DUPLICATE_KEY}
+                if failed:
+                    print(f"⚠️ [UOW] {len(failed)} of {len(docs)} {name} documents not written; retrying next flush")
+                    self.appends[name] = (collection, [doc for i, doc in enumerate(docs) if i in failed])
+            except PyMongoError as e:
+                print(f"⚠️ [UOW] Writing {len(docs)} {name} documents failed ({e}); retrying next flush")
+                self.appends[name] = (collection, docs)
+
+    def _write(self, updates: dict) -> bool:
+        if self.version is None:
+            self.collection.update_one({"_id": self.session_id}, updates)
+            return True
+
+        if self._guarded_write(updates, self.version):
+            self.version += 1
+            return True
+
+        fields = {field: 1 for field in updates.get("$set", {})}
+        current = None
+        for _ in range(self.CONFLICT_RETRIES):
+            current = self.collection.find_one({"_id": self.session_id}, {**fields, "version": 1})
+            if current is None:
+                break
+            version = current.get("version") or 0
+            if self._guarded_write(self._rebase(updates, current), version):
+                self.version = version + 1
+                return False
+        # Still racing: write the rebase from the last reload without the guard
+        rebased = self._rebase(updates, current)
+        if rebased:
+            self.collection.update_one({"_id": self.session_id}, rebased)
+        return False
+
+    def _guarded_write(self, updates: dict, version: int) -> bool:
+        updates = {**updates, "$inc": {**updates.get("$inc", {}), "version": 1}}
+        # Documents written before versioning have no field; treat that as version 0
+        expected = {"$in": [0, None]} if version == 0 else version
+        return self.collection.update_one({"_id": self.session_id, "version": expected}, updates).matched_count != 0
+
+    def _rebase(self, updates: dict, current) -> dict:
+        """
+        The part of `updates` that is still right on top of a document another worker
+        changed since this buffer's copy was loaded. $inc, $addToSet and $push commute
+        and are kept. $set values were computed from the stale copy, so: lists are
+        unioned in ($addToSet), MAX_FIELDS become $max, and any other field is only set
+        where the stored document has no value yet; otherwise the newer write wins.
+        With `current` None (nothing reloaded) only the commuting part is returned.
+        """
+        rebased = {}
+        for op in ("$inc", "$push"):
+            if op in updates:
+                rebased[op] = dict(updates[op])
+        add = {field: {"$each": list(spec["$each"])} for field, spec in updates.get("$addToSet", {}).items()}
+        for field, value in updates.get("$set", {}).items():
+            stored = _get_path(current, field) if current is not None else None
+            if field in self.MAX_FIELDS:
+                rebased.setdefault("$max", {})[field] = value
+            elif current is not None and stored is None:
+                rebased.setdefault("$set", {})[field] = value
+            elif isinstance(value, list) and (current is None or isinstance(stored, list)):
+                each = add.setdefault(field, {"$each": []})["$each"]
+                each.extend(v for v in value if v not in each)
+        if add:
+            rebased["$addToSet"] = add
+        return rebased
+
+
+def _get_path(doc: dict, field: str):
+    for part in field.split("."):
+        if not isinstance(doc, dict):
+            return None
+        doc = doc.get(part)
+    return doc
@@ -1,18 +1,51 @@
 from fastapi import FastAPI
 from contextlib import asynccontextmanager
+import asyncio
 from app.database.connection import db_instance
+from app.core.executor import executor
+from app.core.jobs import job_queue
+from app.core.report_client import report_client
+from app.core.config import settings
 
 # Lifespan events allow us to run code on startup and shutdown
 @asynccontextmanager
 async def lifespan(app: FastAPI):
     # --- STARTUP ---
+    settings.validate()
     db_instance.connect()
+    from app.agent.brain import brain_service
+    from app.api.tracking import hit_buffer
+    from app.agent.canary import canary_service
+    from app.agent.llm import llm_service
+    # Index builds are blocking calls; do them here rather than inside a request
+    brain_service.ensure_indexes()
+    canary_service.ensure_indexes()
+    job_queue.ensure_indexes()
+    llm_service.cache.ensure_indexes()
+    session_flusher = asyncio.create_task(brain_service.flush_loop())
+    extraction_loop = asyncio.create_task(brain_service.extraction_batcher.run(executor.run))
+    job_queue.start()
+    hit_flusher = asyncio.create_task(hit_buffer.run())
     yield
     # --- SHUTDOWN ---
+    # Write out buffered honeypot hits
+    hit_flusher.cancel()
+    await asyncio.gather(hit_flusher, return_exceptions=True)
+    await hit_buffer.flush()
+    # Finish queued extraction, then write out cached sessions before the executor and DB go away
+    extraction_loop.cancel()
+    await asyncio.gather(extraction_loop, return_exceptions=True)
+    await brain_service.extraction_batcher.drain(executor.run)
+    session_flusher.cancel()
+    await job_queue.stop()
+    await report_client.close()
+    await brain_service.flush_sessions(force=True)
+    executor.shutdown()
     db_instance.disconnect()
 
 from app.api import routes
 from app.api import callback
+from app.api import admin
 from app.api import tracking
 
 app = FastAPI(title="Agentic Honeypot API", version="1.0.0", lifespan=lifespan)
@@ -20,7 +53,10 @@ app = FastAPI(title="Agentic Honeypot API", version="1.0.0", lifespan=lifespan)
 # Include routers - Order matters! Specific routes first, catch-all last.
 app.include_router(routes.router)
 app.include_router(callback.router, prefix="/admin")
+app.include_router(admin.router, prefix="/admin")
 app.include_router(tracking.router) # Catch-all is here
+# Decoy hits are answered before routing (see DecoyFastPath)
+app.add_middleware(tracking.DecoyFastPath)
 
 @app.get("/health")
 def health_check():
@@ -0,0 +1,103 @@
+import hashlib
+import struct
+import time
+import zlib
+
+
+class Decoy:
+    """One prebuilt artifact: body bytes plus the response headers that never change."""
+    __slots__ = ("body", "media_type", "etag", "headers", "raw_headers", "raw_headers_304")
+
+    def __init__(self, body: bytes, media_type: str, filename: str):
+        self.body = body
+        self.media_type = media_type
+        self.etag = '"' + hashlib.sha256(body).hexdigest()[:32] + '"'
+        self.headers = {
+            "ETag": self.etag,
+            "Cache-Control": "private, max-age=300",
+            "Content-Disposition": f'inline; filename="{filename}"',
+        }
+        # Pre-encoded for raw ASGI responses
+        common = [(k.lower().encode(), v.encode()) for k, v in self.headers.items()]
+        self.raw_headers = [(b"content-type", media_type.encode()),
+                            (b"content-length", str(len(body)).encode())] + common
+        self.raw_headers_304 = common
+
+
+def _pdf_receipt(reference: str, amount: str, date: str) -> bytes:
+    """A one-page PDF 'payment receipt' (hand-assembled, valid xref table, no PDF library)."""
+    lines = [
+        ("F2", 18, "Payment Receipt"),
+        ("F1", 11, "Transaction successful"),
+        ("F1", 11, f"Reference No: {reference}"),
+        ("F1", 11, f"Amount: INR {amount}"),
+        ("F1", 11, f"Date: {date}"),
+        ("F1", 11, "Mode: UPI / IMPS"),
+        ("F1", 9, "This is a system generated receipt and does not require a signature."),
+    ]
+    text = ["BT", "72 760 Td"]
+    for font, size, line in lines:
+        escaped = line.replace("\\", "\\\\").replace("(", "\\(").replace(")", "\\)")
+        text += [f"/{font} {size} Tf", f"({escaped}) Tj", f"0 -{size + 12} Td"]
+    text.append("ET")
+    stream = "\n".join(text).encode("latin-1")
+
+    objects = [
+        b"<< /Type /Catalog /Pages 2 0 R >>",
+        b"<< /Type /Pages /Kids [3 0 R] /Count 1 >>",
+        b"<< /Type /Page /Parent 2 0 R /MediaBox [0 0 595 842] /Contents 4 0 R "
+        b"/Resources << /Font << /F1 5 0 R /F2 6 0 R >> >> >>",
+        b"<< /Length " + str(len(stream)).encode() + b" >>\nstream\n" + stream + b"\nendstream",
+        b"<< /Type /Font /Subtype /Type1 /BaseFont /Helvetica >>",
+        b"<< /Type /Font /Subtype /Type1 /BaseFont /Helvetica-Bold >>",
+    ]
+    out = bytearray(b"%PDF-1.4\n%\xe2\xe3\xcf\xd3\n")
+    offsets = []
+    for number, body in enumerate(objects, start=1):
+        offsets.append(len(out))
+        out += f"{number} 0 obj\n".encode() + body + b"\nendobj\n"
+    xref = len(out)
+    out += f"xref\n0 {len(objects) + 1}\n0000000000 65535 f \n".encode()
+    for offset in offsets:
+        out += f"{offset:010d} 00000 n \n".encode()
+    out += f"trailer\n<< /Size {len(objects) + 1} /Root 1 0 R >>\nstartxref\n{xref}\n%%EOF\n".encode()
+    return bytes(out)
+
+
+def _png_receipt(width: int = 360, height: int = 200) -> bytes:
+    """A greyscale 'screenshot' of a receipt: header band and text-like bars on white."""
+    rows = []
+    for y in range(height):
+        row = bytearray(b"\xff" * width)
+        if 16 <= y < 40:
+            row[:] = b"\x2e" * width  # header band
+        elif 56 <= y < height - 16 and (y - 56) % 22 < 8:
+            bar = (width - 48) * (3 + (y // 22) % 4) // 6
+            row[24:24 + bar] = b"\xa0" * bar
+        rows.append(b"\x00" + bytes(row))  # filter type 0 per scanline
+
+    def chunk(kind: bytes, data: bytes) -> bytes:
+        return struct.pack(">I", len(data)) + kind + data + struct.pack(">I", zlib.crc32(kind + data) & 0xFFFFFFFF)
+
+    header = struct.pack(">IIBBBBB", width, height, 8, 0, 0, 0, 0)  # 8-bit greyscale
+    return (b"\x89PNG\r\n\x1a\n" + chunk(b"IHDR", header) +
+            chunk(b"IDAT", zlib.compress(b"".join(rows), 9)) + chunk(b"IEND", b""))
+
+
+class DecoyArtifacts:
+    """
+    Fake files served by the tracker, generated once when the app starts and then
+    handed out as the same bytes object on every hit (no per-request rendering,
+    encoding or copying). Image extensions get the PNG, everything else the PDF receipt.
+    """
+    IMAGE_EXTENSIONS = (".png", ".jpg", ".jpeg", ".gif", ".webp")
+
+    def __init__(self):
+        started = time.time()
+        reference = f"UTR{int(started) % 10**9:09d}{int(started * 1000) % 1000:03d}"
+        date = time.strftime("%d %b %Y, %H:%M", time.localtime(started))
+        self.pdf = Decoy(_pdf_receipt(reference, "4,999.00", date), "application/pdf", "receipt.pdf")
+        self.png = Decoy(_png_receipt(), "image/png", "receipt.png")
+
+    def for_path(self, path: str) -> Decoy:
+        return self.png if path.lower().endswith(self.IMAGE_EXTENSIONS) else self.pdf
@@ -0,0 +1,211 @@
+import bisect
+import contextvars
+import threading
+import time
+from contextlib import contextmanager
+
+from pymongo import monitoring
+
+# Latency buckets in seconds: Mongo ops sit at the low end, LLM calls and whole turns at the top
+DEFAULT_BUCKETS = (0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30)
+
+
+def _escape(value) -> str:
+    return str(value).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+def _format_labels(names, values) -> str:
+    if not names:
+        return ""
+    return "{" + ",".join(f'{n}="{_escape(v)}"' for n, v in zip(names, values)) + "}"
+
+
+class Counter:
+    def __init__(self, name: str, documentation: str, labelnames=()):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self.values = {}
+        self.lock = threading.Lock()
+
+    def inc(self, amount: float = 1, **labels):
+        key = tuple(labels.get(n, "") for n in self.labelnames)
+        with self.lock:
+            self.values[key] = self.values.get(key, 0) + amount
+
+    def render(self) -> list:
+        lines = [f"# HELP {self.name} {self.documentation}", f"# TYPE {self.name} counter"]
+        with self.lock:
+            for key, value in sorted(self.values.items()):
+                lines.append(f"{self.name}{_format_labels(self.labelnames, key)} {value}")
+        return lines
+
+
+class Histogram:
+    def __init__(self, name: str, documentation: str, labelnames=(), buckets=DEFAULT_BUCKETS):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self.buckets = tuple(buckets)
+        self.series = {}  # label values -> [bucket counts..., sum, count]
+        self.lock = threading.Lock()
+
+    def observe(self, value: float, **labels):
+        key = tuple(labels.get(n, "") for n in self.labelnames)
+        index = bisect.bisect_left(self.buckets, value)
+        with self.lock:
+            series = self.series.setdefault(key, [0] * (len(self.buckets) + 2))
+            if index < len(self.buckets):
+                series[index] += 1
+            series[-2] += value
+            series[-1] += 1
+
+    def render(self) -> list:
+        lines = [f"# HELP {self.name} {self.documentation}", f"# TYPE {self.name} histogram"]
+        names = self.labelnames + ("le",)
+        with self.lock:
+            for key, series in sorted(self.series.items()):
+                cumulative = 0
+                for bound, count in zip(self.buckets, series):
+                    cumulative += count
+                    lines.append(f"{self.name}_bucket{_format_labels(names, key + (bound,))} {cumulative}")
+                lines.append(f"{self.name}_bucket{_format_labels(names, key + ('+Inf',))} {series[-1]}")
+                lines.append(f"{self.name}_sum{_format_labels(self.labelnames, key)} {series[-2]}")
+                lines.append(f"{self.name}_count{_format_labels(self.labelnames, key)} {series[-1]}")
+        return lines
+
+
+class Registry:
+    """Minimal Prometheus registry (text exposition format 0.0.4), no client library needed."""
+    def __init__(self):
+        self.metrics = []
+
+    def counter(self, name, documentation, labelnames=()) -> Counter:
+        metric = Counter(name, documentation, labelnames)
+        self.metrics.append(metric)
+        return metric
+
+    def histogram(self, name, documentation, labelnames=(), buckets=DEFAULT_BUCKETS) -> Histogram:
+        metric = Histogram(name, documentation, labelnames, buckets)
+        self.metrics.append(metric)
+        return metric
+
+    def render(self) -> str:
+        return "\n".join(line for metric in self.metrics for line in metric.render()) + "\n"
+
+
+registry = Registry()
+
+STAGE_SECONDS = registry.histogram(
+    "honeypot_stage_seconds", "Time spent in each process_turn stage", ["stage"])
+TURNS = registry.counter(
+    "honeypot_turns_total", "Chat turns handled", ["path"])
+MONGO_SECONDS = registry.histogram(
+    "honeypot_mongo_seconds", "MongoDB command latency", ["command"])
+MONGO_OPS = registry.counter(
+    "honeypot_mongo_ops_total", "MongoDB commands by outcome", ["command", "outcome"])
+LLM_CALL_SECONDS = registry.histogram(
+    "honeypot_llm_call_seconds", "Whole LLM call including retries and backoff sleeps", ["task", "outcome"])
+LLM_ATTEMPT_SECONDS = registry.histogram(
+    "honeypot_llm_attempt_seconds", "Single Groq request latency", ["task", "key", "model", "outcome"])
+LLM_ATTEMPTS = registry.counter(
+    "honeypot_llm_attempts_total", "Groq requests sent (one call may need several)", ["task", "key", "outcome"])
+LLM_RETRY_SLEEP = registry.counter(
+    "honeypot_llm_retry_sleep_seconds_total", "Time spent sleeping between retries", ["task"])
+LLM_TOKENS = registry.counter(
+    "honeypot_llm_tokens_total", "Tokens reported by Groq usage", ["task", "model", "kind"])
+JOBS = registry.counter(
+    "honeypot_jobs_total", "Background jobs run, by outcome (done, retried, dead)", ["type", "outcome"])
+JOB_SECONDS = registry.histogram(
+    "honeypot_job_seconds", "Background job run time", ["type"])
+
+
+# --- Per-turn trace -------------------------------------------------------
+# Set for the duration of a turn; BoundedExecutor copies the context into its
+# threads, so Mongo and Groq calls made for the turn add to the same trace.
+_current_trace = contextvars.ContextVar("turn_trace", default=None)
+
+
+class TurnTrace:
+    def __init__(self, session_id: str):
+        self.session_id = session_id
+        self.stages = {}
+        self.mongo_ops = 0
+        self.mongo_seconds = 0.0
+        self.llm_attempts = 0
+        self.prompt_tokens = 0
+        self.completion_tokens = 0
+        self.lock = threading.Lock()
+
+    def add(self, **amounts):
+        with self.lock:
+            for field, amount in amounts.items():
+                setattr(self, field, getattr(self, field) + amount)
+
+    def summary(self) -> str:
+        stages = " ".join(f"{name}={seconds * 1000:.0f}ms" for name, seconds in self.stages.items())
+        return (f"{stages} | mongo {self.mongo_ops} ops {self.mongo_seconds * 1000:.0f}ms"
+                f" | llm {self.llm_attempts} calls {self.prompt_tokens}+{self.completion_tokens} tokens")
+
+
+@contextmanager
+def trace_turn(session_id: str):
+    trace = TurnTrace(session_id)
+    token = _current_trace.set(trace)
+    started = time.perf_counter()
+    try:
+        yield trace
+    finally:
+        elapsed = time.perf_counter() - started
+        trace.stages["total"] = elapsed
+        STAGE_SECONDS.observe(elapsed, stage="total")
+        _current_trace.reset(token)
+        print(f"📊 [TRACE] {session_id}: {trace.summary()}")
+
+
+@contextmanager
+def span(stage: str):
+    """Times one stage of the current turn (works across awaits)."""
+    started = time.perf_counter()
+    try:
+        yield
+    finally:
+        elapsed = time.perf_counter() - started
+        STAGE_SECONDS.observe(elapsed, stage=stage)
+        trace = _current_trace.get()
+        if trace is not None:
+            trace.stages[stage] = trace.stages.get(stage, 0.0) + elapsed
+
+
+def record_llm_attempt(task: str, key: str, model: str, outcome: str, seconds: float, usage=None):
+    LLM_ATTEMPTS.inc(task=task, key=key, outcome=outcome)
+    LLM_ATTEMPT_SECONDS.observe(seconds, task=task, key=key, model=model, outcome=outcome)
+    prompt = getattr(usage, "prompt_tokens", 0) or 0
+    completion = getattr(usage, "completion_tokens", 0) or 0
+    if usage is not None:
+        LLM_TOKENS.inc(prompt, task=task, model=model, kind="prompt")
+        LLM_TOKENS.inc(completion, task=task, model=model, kind="completion")
+    trace = _current_trace.get()
+    if trace is not None:
+        trace.add(llm_attempts=1, prompt_tokens=prompt, completion_tokens=completion)
+
+
+class MongoCommandMetrics(monitoring.CommandListener):
+    """pymongo command listener: op counts and latency per command name."""
+
+    def started(self, event):
+        pass
+
+    def succeeded(self, event):
+        self._record(event, "ok")
+
+    def failed(self, event):
+        self._record(event, "error")
+
+    def _record(self, event, outcome):
+        seconds = event.duration_micros / 1e6
+        MONGO_OPS.inc(command=event.command_name, outcome=outcome)
+        MONGO_SECONDS.observe(seconds, command=event.command_name)
+        trace = _current_trace.get()
+        if trace is not None:
+            trace.add(mongo_ops=1, mongo_seconds=seconds)
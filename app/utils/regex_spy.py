@@ -1,4 +1,5 @@
 
+import bisect
 import re
 from typing import List, Dict, Any
 
@@ -41,40 +42,172 @@ class RegexSpy:
         "expire", "click here", "refund", "lottery", "winner", "prize"
     ]
 
+    # --- OUTGOING REPLY SCREEN ---
+    # Things our own persona must never send: real-looking secrets or leaked prompt/instructions
+    UNSAFE_REPLY_PATTERNS = {
+        # A bare "pin" is too loose ("pin code 110001" is an address): it needs a credential context
+        "otp": [
+            r"\b(?:otp|one[\s-]time[\s-]password|verification code|m-?pin|(?:atm|upi|card)\s*pin)\b\D{0,20}\b\d{4,8}\b",
+            r"\bpin\s*(?:is|:|=)\s*\d{4,8}\b"
+        ],
+        # Grouped 16-digit card, or any 13-19 digit run right after the word "card" (Luhn checked)
+        "card_number": [
+            r"\b\d{4}[\s-]\d{4}[\s-]\d{4}[\s-]\d{1,7}\b",
+            r"(?<=card)\D{0,20}\b(\d{13,19})\b"
+        ],
+        "aadhaar": [
+            r"(?<!\d[\s-])\b[2-9]\d{3}[\s-]\d{4}[\s-]\d{4}\b(?![\s-]\d)",
+            r"(?<=aadhaar)\D{0,20}\b[2-9]\d{11}\b",
+            r"(?<=aadhar)\D{0,20}\b[2-9]\d{11}\b"
+        ],
+        "pan": [
+            r"\b[A-Z]{5}\d{4}[A-Z]\b"
+        ],
+        "instruction_leak": [
+            r"\bas an ai\b",
+            r"\b(?:i am|i'm|im) (?:an? |just an? )?(?:ai|bot|chatbot|language model|honeypot)\b",
+            r"\b(?:system prompt|my instructions|absolute rules|role-?play(?:ing)?)\b",
+            r"\b(?:objective|mode|persona)\s*:",
+            r"\bscammer mode\b"
+        ]
+    }
+
+    # Replies matching these are not clearly safe: leave the verdict to the LLM reviewer
+    REVIEW_REPLY_PATTERNS = [
+        r"\d{4,}",
+        r"[{}<>`\[\]]",
+        r"\b(?:ai|bot|model|prompt|json|instructions?|system|robot|chatgpt|gpt|llm|automated)\b",
+        r"\b(?:kill|die|idiot|stupid|bastard|fuck\w*|shit|bitch)\b"
+    ]
+
+    SAFE_REPLY_MAX_LENGTH = 300
+
+    # --- UNRESOLVED ENTITY SIGNALS ---
+    # Looked for in what is left of a message after the extraction patterns took their
+    # matches: entity-like text the regexes could not resolve, worth an LLM extraction call
+    _NUMBER_WORD = r"(?:zero|oh|one|two|three|four|five|six|seven|eight|nine|double|triple)"
+    ENTITY_SIGNAL_PATTERNS = {
+        # Digit runs the regexes did not claim (IDs, OTPs, partial account numbers);
+        # shorter runs are amounts, years and times
+        "digits": r"\d{6,}",
+        # Numbers typed with separators to dodge filters: 98 76 54 32 10, 9-8-7-6...
+        "spaced_digits": r"\b\d{1,4}(?:[\s.\-/]+\d{1,4}){2,}\b",
+        # Spelled-out numbers: "nine eight seven six..."
+        "spelled_digits": r"\b" + _NUMBER_WORD + r"(?:[\s,\-]+" + _NUMBER_WORD + r"){2,}\b",
+        "at_sign": r"@|\[at\]|\(at\)|\bat the rate\b",
+        # Links written without a scheme or obfuscated: bit.ly/x, site dot com, hxxp
+        "url_like": r"\b[\w-]+\.(?:com|in|net|org|co|xyz|info|io|ly|me|link|app|online|site)\b|\bdot com\b|\bhxxps?\b",
+        # Identity details only the LLM can pull out (names, employee IDs, addresses)
+        "identity": r"\b(?:my name is|name is|employee id|emp id|badge|officer id|id no|reference no|ref no|address is|branch)\b",
+    }
+
+    @staticmethod
+    def _luhn_valid(number: str) -> bool:
+        digits = [int(d) for d in number if d.isdigit()]
+        checksum = 0
+        for i, d in enumerate(reversed(digits)):
+            if i % 2 == 1:
+                d = d * 2
+                if d > 9:
+                    d -= 9
+            checksum += d
+        return checksum % 10 == 0
+
+    @classmethod
+    def screen_reply(cls, text: str) -> str:
+        """
+        Deterministic pre-screen for an outgoing agent reply.
+        Returns "unsafe" (regenerate), "safe" (no LLM review needed)
+        or "review" (ambiguous, ask the LLM safety checker).
+        """
+        lowered = text.lower()
+
+        for field, patterns in cls.UNSAFE_REPLY_PATTERNS.items():
+            for pattern in patterns:
+                # PAN is upper-case by definition, everything else is matched case-insensitively
+                target = text if field == "pan" else lowered
+                for match in re.finditer(pattern, target):
+                    if field == "card_number" and not cls._luhn_valid(match.group(match.lastindex or 0)):
+                        continue
+                    return "unsafe"
+
+        if len(text) > cls.SAFE_REPLY_MAX_LENGTH:
+            return "review"
+        for pattern in cls.REVIEW_REPLY_PATTERNS:
+            if re.search(pattern, lowered):
+                return "review"
+        return "safe"
+
+    _compiled_extraction = None
+
+    @classmethod
+    def _extraction_patterns(cls):
+        """(field, compiled pattern) in EXTRACTION_ORDER, compiled once."""
+        if cls._compiled_extraction is None:
+            cls._compiled_extraction = [
+                # Inline (?i) is redundant with the flag and not allowed mid-pattern
+                (field, re.compile(pattern.replace("(?i)", ""), re.IGNORECASE))
+                for field in cls.EXTRACTION_ORDER
+                for pattern in cls.REGEX_PATTERNS.get(field, [])
+            ]
+        return cls._compiled_extraction
+
     @classmethod
     def extract_intelligence(cls, text: str) -> Dict[str, Any]:
+        """Scans text for all intelligence types (see extract_with_residual)."""
+        return cls.extract_with_residual(text)[0]
+
+    @classmethod
+    def extract_with_residual(cls, text: str):
         """
         Scans text for all intelligence types and returns a dictionary
-        compatible with the brain's 'extracted_data' schema.
+        compatible with the brain's 'extracted_data' schema, plus the residual
+        text (the message with every matched span blanked out).
+
+        Fields are matched in EXTRACTION_ORDER against the original text; a match
+        overlapping a span already claimed by an earlier field is skipped
+        (e.g. the phone number inside a URL), so the scan stays linear in the
+        text instead of rewriting it after every match.
         """
         extracted = {}
-        working_text = text
+        # Claimed spans, kept sorted and non-overlapping
+        starts, ends = [], []
 
-        for field in cls.EXTRACTION_ORDER:
-            for pattern in cls.REGEX_PATTERNS.get(field, []):
-                matches = re.findall(pattern, working_text, flags=re.IGNORECASE)
-
-                if not matches:
+        for field, pattern in cls._extraction_patterns():
+            for match in pattern.finditer(text):
+                start, end = match.span()
+                i = bisect.bisect_right(starts, start)
+                if (i and ends[i - 1] > start) or (i < len(starts) and starts[i] < end):
                     continue
+                starts.insert(i, start)
+                ends.insert(i, end)
+                # dict as an ordered set: first-seen order, no duplicates
+                extracted.setdefault(field, {})[match.group(0)] = None
 
-                cleaned = set()
-                for match in matches:
-                    if isinstance(match, tuple):
-                        match = match[0]
-                    cleaned.add(match)
-                    # Remove from text to avoid overlapping matches (e.g. phone in url)
-                    working_text = working_text.replace(match, " ")
+        extracted = {field: list(values) for field, values in extracted.items()}
 
-                if cleaned:
-                    extracted[field] = list(cleaned)
+        residual, cursor = [], 0
+        for start, end in zip(starts, ends):
+            residual.append(text[cursor:start])
+            cursor = end
+        residual.append(text[cursor:])
+        residual = " ".join(residual)
 
         # Add suspicious keywords check separately as it's not a regex extraction in the same way
-        suspicious = [
-            kw for kw in cls.SUSPICIOUS_KEYWORDS 
-            if kw.lower() in text.lower()
-        ]
+        lowered = text.lower()
+        suspicious = [kw for kw in cls.SUSPICIOUS_KEYWORDS if kw.lower() in lowered]
         if suspicious:
             extracted["suspicious_keywords"] = suspicious
 
-        return extracted
-        
+        return extracted, residual
+
+    _compiled_signals = None
+
+    @classmethod
+    def entity_signals(cls, residual: str) -> List[str]:
+        """Names of ENTITY_SIGNAL_PATTERNS found in residual text (empty = regexes resolved everything)."""
+        if cls._compiled_signals is None:
+            cls._compiled_signals = {
+                name: re.compile(pattern, re.IGNORECASE) for name, pattern in cls.ENTITY_SIGNAL_PATTERNS.items()
+            }
+        return [name for name, pattern in cls._compiled_signals.items() if pattern.search(residual)]
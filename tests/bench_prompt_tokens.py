@@ -0,0 +1,110 @@
+import sys
+import os
+from types import SimpleNamespace
+from unittest.mock import patch
+
+# Add project root to path
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from app.core.config import settings
+from app.agent.llm import llm_service
+from app.agent.brain import brain_service
+from app.agent.personas import PERSONA_SYSTEM
+
+# Replay of a long engagement: the scammer keeps pushing, the persona keeps stalling
+SCAMMER_LINES = [
+    "Dear customer your SBI account will be blocked today due to pending KYC update",
+    "I am calling from SBI head office, my employee ID is SBI-4471, please cooperate",
+    "To stop the block you must pay verification charge of Rs 499 immediately",
+    "Send the amount to our verification UPI sbi.kyc.verify@okaxis and share screenshot",
+    "Why are you delaying? Your account will be frozen in 30 minutes",
+    "If UPI not working then transfer to account 50100234567891 IFSC HDFC0001234",
+    "Also download the AnyDesk app from http://sbi-kyc-update.in/support to complete",
+    "Sir please do fast, my senior officer is asking for your status",
+    "Tell me the OTP you received, it is required for the reversal of the charge",
+    "Do not tell anyone about this, it is confidential bank procedure",
+]
+AGENT_LINES = [
+    "oh god sir please dont block my account, all my money is inside",
+    "sir what is your good name? my son says always ask name",
+    "ok sir I will pay, which app should I use sir?",
+    "sir the UPI is showing some error, can you send again?",
+    "please wait sir my phone is very slow, I am old man",
+    "sir which bank branch is this account? I want to tell my son",
+    "the link is not opening sir, it says page not found",
+    "ok ok I am trying, please tell your senior name also",
+    "sir no OTP came yet, should I wait?",
+    "yes sir I will not tell anyone, you are helping me",
+]
+TURNS = 40
+
+
+def estimate_tokens(messages) -> int:
+    """~4 characters per token, the usual rule of thumb for English with GPT-style tokenizers."""
+    return sum(len(m["content"]) for m in messages) // 4
+
+
+class PromptRecorder:
+    """Stands in for _call_groq: records the prompt each call would have sent."""
+    def __init__(self):
+        self.prompts = []
+
+    def __call__(self, task, create_func):
+        def create(model, messages, **kwargs):
+            self.prompts.append((task, messages))
+            return SimpleNamespace(choices=[SimpleNamespace(message=SimpleNamespace(content="summary"))])
+        return create_func(SimpleNamespace(chat=SimpleNamespace(completions=SimpleNamespace(create=create))))
+
+
+def fake_summary(previous: str, turns: list) -> str:
+    """Worst case for the 'after' numbers: the summary always uses its full word budget."""
+    words = (previous + " " + " ".join(t["user"] + " " + t["agent"] for t in turns)).split()
+    return " ".join(words[:settings.SUMMARY_MAX_WORDS])
+
+
+def replay(with_summary: bool):
+    recorder = PromptRecorder()
+    persona = list(PERSONA_SYSTEM.values())[0]
+    state = {"_id": "bench", "history": [], "turn_count": 0, "summary": "", "summary_upto": 0}
+    reply_tokens, history_tokens, summary_tokens = [], [], 0
+
+    with patch.object(llm_service, "_call_groq", recorder):
+        for i in range(TURNS):
+            scammer_text = SCAMMER_LINES[i % len(SCAMMER_LINES)]
+            history = brain_service._prompt_history(state) if with_summary else state["history"]
+            llm_service.generate_response(history, persona, "", scammer_text, True,
+                                          state["summary"] if with_summary else "")
+            reply_tokens.append(estimate_tokens(recorder.prompts[-1][1]))
+            # Everything after the fixed system prompt: summary, raw turns, latest message
+            history_tokens.append(estimate_tokens(recorder.prompts[-1][1][1:]))
+
+            turn = {"user": scammer_text, "agent": AGENT_LINES[i % len(AGENT_LINES)]}
+            state["history"] = (state["history"] + [turn])[-settings.HISTORY_WINDOW:]
+            state["turn_count"] += 1
+
+            # What the background summarizer would do after this turn
+            target = state["turn_count"] - settings.PROMPT_TURNS
+            if with_summary and target - state["summary_upto"] >= settings.SUMMARY_EVERY:
+                first_index = state["turn_count"] - len(state["history"])
+                turns = state["history"][state["summary_upto"] - first_index:target - first_index]
+                llm_service.summarize_conversation(state["summary"], turns)
+                summary_tokens += estimate_tokens(recorder.prompts[-1][1])
+                state["summary"], state["summary_upto"] = fake_summary(state["summary"], turns), target
+
+    return reply_tokens, history_tokens, summary_tokens
+
+
+def report(label, reply_tokens, history_tokens, summary_tokens):
+    total = sum(reply_tokens) + summary_tokens
+    tail = history_tokens[TURNS // 2:]
+    print(f"[{label:<15}] avg {total / TURNS:7.1f} tokens/turn (incl. {summary_tokens / TURNS:5.1f} summarizer), "
+          f"conversation part of reply prompt avg {sum(tail) / len(tail):6.1f} / max {max(history_tokens)}")
+    return total / TURNS
+
+
+if __name__ == "__main__":
+    print(f"Replaying {TURNS} turns (window={settings.HISTORY_WINDOW}, prompt turns={settings.PROMPT_TURNS}, "
+          f"summary every {settings.SUMMARY_EVERY} turns, <= {settings.SUMMARY_MAX_WORDS} words)")
+    before = report("raw window", *replay(with_summary=False))
+    after = report("rolling summary", *replay(with_summary=True))
+    print(f"Prompt tokens per turn: {before:.0f} -> {after:.0f} ({(1 - after / before) * 100:.0f}% fewer)")
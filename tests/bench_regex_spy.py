@@ -0,0 +1,81 @@
+import sys
+import os
+import re
+import json
+import random
+import timeit
+
+# Add project root to path
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from app.utils.regex_spy import RegexSpy
+
+CORPUS = os.path.join(os.path.dirname(__file__), "data", "scam_corpus.jsonl")
+
+
+def legacy_extract(text):
+    """The previous implementation: uncompiled findall per field plus working_text.replace per match."""
+    extracted = {}
+    working_text = text
+    for field in RegexSpy.EXTRACTION_ORDER:
+        for pattern in RegexSpy.REGEX_PATTERNS.get(field, []):
+            matches = re.findall(pattern, working_text, flags=re.IGNORECASE)
+            if not matches:
+                continue
+            cleaned = set()
+            for match in matches:
+                if isinstance(match, tuple):
+                    match = match[0]
+                cleaned.add(match)
+                working_text = working_text.replace(match, " ")
+            if cleaned:
+                extracted[field] = list(cleaned)
+    suspicious = [kw for kw in RegexSpy.SUSPICIOUS_KEYWORDS if kw.lower() in text.lower()]
+    if suspicious:
+        extracted["suspicious_keywords"] = suspicious
+    return extracted
+
+
+def pasted_chats(size: int) -> str:
+    """Scam messages from the labelled corpus pasted back to back (forwarded chat dumps)."""
+    with open(CORPUS, encoding="utf-8") as f:
+        lines = [json.loads(line)["text"] for line in f if line.strip()]
+    text = []
+    while sum(map(len, text)) < size:
+        text.extend(lines)
+    return " ".join(text)[:size]
+
+
+def contact_dump(entries: int) -> str:
+    """A scammer pasting a long list of 'payment partners': many distinct matches."""
+    rng = random.Random(7)
+    rows = []
+    for i in range(entries):
+        rows.append(
+            f"Agent {i}: pay to agent{i}.kyc@okaxis or call +91 9{rng.randrange(10**8, 10**9)}, "
+            f"a/c {rng.randrange(10**11, 10**12)} IFSC SBIN0{rng.randrange(10**5, 10**6)} "
+            f"link https://verify-{i}.example.in/kyc?ref={i} urgent"
+        )
+    return "\n".join(rows)
+
+
+def compare(label, text, repeat):
+    legacy = timeit.timeit(lambda: legacy_extract(text), number=repeat) / repeat
+    compiled = timeit.timeit(lambda: RegexSpy.extract_intelligence(text), number=repeat) / repeat
+    print(f"[{label:<24}] {len(text) / 1024:7.1f} KB  legacy {legacy * 1000:9.1f} ms  "
+          f"compiled {compiled * 1000:7.1f} ms  ({legacy / compiled:5.1f}x)")
+
+    old, new = legacy_extract(text), RegexSpy.extract_intelligence(text)
+    for field in sorted(set(old) | set(new)):
+        missing = set(old.get(field, [])) - set(new.get(field, []))
+        added = set(new.get(field, [])) - set(old.get(field, []))
+        if missing or added:
+            print(f"    {field}: {len(missing)} only in legacy, {len(added)} only in compiled "
+                  f"(e.g. {sorted(added or missing)[:2]})")
+
+
+if __name__ == "__main__":
+    compare("pasted chats 20 KB", pasted_chats(20_000), 20)
+    compare("pasted chats 200 KB", pasted_chats(200_000), 5)
+    compare("contact dump 200 rows", contact_dump(200), 5)
+    compare("contact dump 2000 rows", contact_dump(2000), 1)
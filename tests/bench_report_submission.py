@@ -0,0 +1,80 @@
+import sys
+import os
+import time
+import random
+import asyncio
+from concurrent.futures import ThreadPoolExecutor
+
+# Add project root to path
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+import requests
+
+from app.core.report_client import ReportClient
+from guvi_stub import StubGuvi
+
+# Stand-in GUVI: round-trip latency, share of requests failing with 503, and load shape
+LATENCY = 0.02
+FAIL_RATE = 0.1
+REPORTS = 400
+WORKERS = 8
+
+
+def payload(i):
+    return {"sessionId": f"bench-{i}", "scamDetected": True, "totalMessagesExchanged": 12,
+            "extractedIntelligence": {"upiIds": ["crook@okaxis"], "phoneNumbers": ["9876543210"]},
+            "agentNotes": "Persona grandma engaged scammer."}
+
+
+def legacy(stub):
+    """The previous submit_report: requests.post with a fresh connection, no retries."""
+    bounced = 0
+
+    def post(i):
+        nonlocal bounced
+        try:
+            requests.post(stub.url, json=payload(i), timeout=10).raise_for_status()
+        except Exception:
+            bounced += 1  # back to the job queue, next attempt JOB_RETRY_BASE seconds later
+
+    started = time.perf_counter()
+    with ThreadPoolExecutor(WORKERS) as pool:
+        list(pool.map(post, range(REPORTS)))
+    return time.perf_counter() - started, bounced
+
+
+async def pooled(stub):
+    client = ReportClient(stub.url, timeout=10, max_connections=WORKERS, retries=2, backoff_base=0.05)
+    bounced = 0
+
+    async def post(i):
+        nonlocal bounced
+        try:
+            await client.send(f"bench-{i}", payload(i))
+        except Exception:
+            bounced += 1
+
+    started = time.perf_counter()
+    await asyncio.gather(*(post(i) for i in range(REPORTS)))
+    elapsed = time.perf_counter() - started
+    await client.close()
+    return elapsed, bounced
+
+
+def run(label, bench):
+    random.seed(7)
+    stub = StubGuvi(latency=LATENCY, fail_rate=FAIL_RATE).start()
+    try:
+        elapsed, bounced = bench(stub)
+    finally:
+        stub.stop()
+    print(f"[{label:<7}] {REPORTS} reports in {elapsed:5.2f}s -> {REPORTS / elapsed:6.1f}/s | "
+          f"connections {stub.stats['connections']:4d}, requests {stub.stats['requests']}, "
+          f"delivered {len(stub.reports)}, bounced to job retry {bounced}, duplicates {stub.duplicates}")
+
+
+if __name__ == "__main__":
+    print(f"Stand-in GUVI: {LATENCY * 1000:.0f} ms latency, {FAIL_RATE:.0%} of requests fail with 503, "
+          f"{WORKERS} concurrent submissions")
+    run("legacy", legacy)
+    run("pooled", lambda stub: asyncio.run(pooled(stub)))
@@ -0,0 +1,69 @@
+import sys
+import os
+from unittest.mock import patch
+
+# Add project root to path
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from app.agent.llm import llm_service
+from app.agent.llm_cache import LLMCache
+
+# Replies in the style our personas actually produce (replayed from test conversations)
+AGENT_REPLIES = [
+    "Hello, who is this?",
+    "What is this regarding?",
+    "Sorry, I don't think we've spoken before",
+    "I'm a bit busy, what do you need?",
+    "oh god sir please dont block my account, all my money is inside",
+    "sir what is your good name?",
+    "sir give me your UPI I will pay charges now",
+    "ok sir which button to press?? i am not understanding",
+    "hello sir thank you so much sir, God bless you",
+    "brother what is your delivery boy number?",
+    "send me your paytm or UPI I will send money now",
+    "dear what is your NGO name and registration?",
+    "boss give me your number I will call",
+    "sir I am honest citizen sir please dont arrest me",
+    "darling give me your UPI I will send money for you",
+    "ok done sir, it is showing error. can you send again?",
+    "sir the link is not opening on my phone",
+    "what is your branch phone number sir? my son will call",
+    "is this 9876543210 your number sir?",
+    "sir I sent 500 rupees to scammer@okaxis, please check",
+    "my otp is 482913 sir, now unblock",
+    "sir my card 4111 1111 1111 1111 please check",
+    "aadhaar is 2345 6789 0123 sir",
+    "As an AI language model I cannot share that",
+    "OBJECTIVE: Ask for their UPI ID",
+    "sir is your account 123456789012 correct?",
+    "I am so stupid with these phones sir",
+    "sir please wait my phone battery is low",
+    "yes okay, what is your company or department?",
+    "thank you sir, what is your employee ID?",
+]
+
+
+def replay(turns: int = 1000):
+    llm_calls = 0
+
+    def fake_call_groq(task_name, create_func):
+        nonlocal llm_calls
+        llm_calls += 1
+        return True
+
+    # Replies repeat every len(AGENT_REPLIES) turns; with the response cache on, repeats
+    # would never reach the reviewer and the count would credit the cache, not the prefilter
+    with patch.object(llm_service, "_call_groq", fake_call_groq), \
+            patch.object(llm_service, "cache", LLMCache(max_entries=0, ttl=0)):
+        for i in range(turns):
+            llm_service.safety_check(AGENT_REPLIES[i % len(AGENT_REPLIES)])
+
+    print(f"Safety checks: {turns}")
+    stats = llm_service.local_stats["safety"]
+    print(f"Decided locally: safe={stats['local_safe']} unsafe={stats['local_unsafe']}")
+    print(f"Sent to LLM reviewer: {llm_calls}")
+    print(f"LLM calls saved per 1,000 turns: {llm_service.llm_calls_saved_per_1000():.0f}")
+
+
+if __name__ == "__main__":
+    replay()
@@ -0,0 +1,47 @@
+import sys
+import os
+import json
+from collections import Counter
+from unittest.mock import patch
+
+# Add project root to path
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from app.agent.llm import llm_service
+from app.utils.regex_spy import RegexSpy
+
+CORPUS = os.path.join(os.path.dirname(__file__), "data", "scam_corpus.jsonl")
+
+# Scammer turns where the entity is disguised so only the LLM can read it
+OBFUSCATED = [
+    "call me on nine eight seven six five four three two one zero",
+    "my number is 98 76 54 32 10 sir",
+    "upi is ramkumar at okaxis dot com",
+    "open sbi-kyc dot in slash verify",
+    "my name is Rahul Sharma from SBI head office",
+]
+
+
+def replay(rounds: int = 10):
+    with open(CORPUS, encoding="utf-8") as f:
+        messages = [json.loads(line)["text"] for line in f if line.strip()]
+    messages += OBFUSCATED
+    signals = Counter()
+
+    with patch.object(llm_service, "extract_information", return_value={}):
+        for _ in range(rounds):
+            for text in messages:
+                intel, residual = RegexSpy.extract_with_residual(text)
+                signals.update(RegexSpy.entity_signals(residual))
+                llm_service.extract_tiered(text)
+
+    stats = llm_service.local_stats["extraction"]
+    print(f"Messages replayed: {len(messages) * rounds} ({len(messages)} distinct)")
+    print(f"Resolved by RegexSpy alone: {stats['regex_only']}")
+    print(f"Sent to LLM extractor: {stats['llm']}  (signals: {dict(signals)})")
+    print(f"LLM extraction calls avoided per 1,000 messages: "
+          f"{llm_service.llm_calls_saved_per_1000('extraction'):.0f}")
+
+
+if __name__ == "__main__":
+    replay()
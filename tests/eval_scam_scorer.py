@@ -0,0 +1,60 @@
+import sys
+import os
+import json
+
+# Add project root to path
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from app.agent.scam_scorer import ScamScorer
+
+DATA = os.path.join(os.path.dirname(__file__), "data")
+# The scorer's weights and thresholds were tuned by hand against this corpus, so its
+# numbers on it are optimistic; they are only printed with --tuning
+CORPUS = os.path.join(DATA, "scam_corpus.jsonl")
+# Messages never looked at while tuning. Keep it that way: when a weight changes
+# because of a message here, move that message to the tuning corpus
+HELD_OUT = os.path.join(DATA, "scam_heldout.jsonl")
+
+
+def evaluate(path: str = HELD_OUT, verbose: bool = False):
+    """
+    Offline evaluation of the local scam scorer over a labelled corpus
+    (one {"text": ..., "label": "SCAM" | "SAFE"} object per line).
+    Only locally decided messages count towards precision/recall; the rest
+    would go to the LLM classifier.
+    """
+    with open(path, encoding="utf-8") as f:
+        samples = [json.loads(line) for line in f if line.strip()]
+
+    tp = fp = tn = fn = uncertain = 0
+    for sample in samples:
+        is_scam = sample["label"].upper() == "SCAM"
+        verdict = ScamScorer.verdict(sample["text"])
+        if verbose or (verdict is not None and verdict != is_scam):
+            print(f"  p={ScamScorer.score(sample['text']):.3f} verdict={verdict} label={sample['label']}: {sample['text'][:70]}")
+        if verdict is None:
+            uncertain += 1
+        elif verdict and is_scam:
+            tp += 1
+        elif verdict and not is_scam:
+            fp += 1
+        elif not verdict and is_scam:
+            fn += 1
+        else:
+            tn += 1
+
+    decided = len(samples) - uncertain
+    precision = tp / (tp + fp) if tp + fp else 0.0
+    recall = tp / (tp + fn) if tp + fn else 0.0
+    print(f"Messages: {len(samples)}  decided locally: {decided}  sent to LLM: {uncertain}")
+    print(f"SCAM precision: {precision:.3f}  recall (of locally decided): {recall:.3f}")
+    print(f"Confusion: tp={tp} fp={fp} tn={tn} fn={fn}")
+    print(f"LLM classification calls avoided: {decided}/{len(samples)} ({100 * decided / len(samples):.1f}%)")
+    return precision, recall, decided
+
+
+if __name__ == "__main__":
+    paths = [arg for arg in sys.argv[1:] if not arg.startswith("-")]
+    path = paths[0] if paths else CORPUS if "--tuning" in sys.argv else HELD_OUT
+    print(f"Corpus: {os.path.relpath(path)}")
+    evaluate(path, verbose="-v" in sys.argv)
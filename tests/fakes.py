@@ -0,0 +1,68 @@
+import sys
+import os
+import itertools
+from abc import ABC, abstractmethod
+from types import SimpleNamespace
+
+import httpx
+from pymongo.errors import AutoReconnect, BulkWriteError
+
+# Add project root to path
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from app.agent.key_manager import KeyManager
+from app.agent.llm import LLMService
+
+# Shared fakes for the verify_* tests
+REQUEST = httpx.Request("POST", "https://api.groq.com/openai/v1/chat/completions")
+
+
+class FakeGroqClient(ABC):
+    """The part of a Groq client _call_groq uses; subclasses decide what each completion does."""
+    def __init__(self):
+        self.chat = SimpleNamespace(completions=SimpleNamespace(create=self.create))
+
+    def with_options(self, **kwargs):
+        return self
+
+    @abstractmethod
+    def create(self, **kwargs):
+        """One chat.completions.create call: return the completion or raise the API error."""
+
+
+def make_service(pools: dict, client_for) -> LLMService:
+    """LLMService on its own KeyManager(pools), each key slot served by client_for(slot)."""
+    service = LLMService()
+    service.key_manager = KeyManager(pools)
+    for pool in service.key_manager.pools.values():
+        for slot in pool:
+            slot.client = client_for(slot)
+    return service
+
+
+def call_groq(service, task: str = "gen"):
+    return service._call_groq(task, lambda client: client.chat.completions.create(model="m", messages=[]))
+
+
+class FakeInsertMany:
+    """insert_many like pymongo's: sets _id on the caller's documents, then may fail part-way."""
+    def __init__(self, name: str = "fake"):
+        self.name = name
+        self.stored = {}
+        self.fail_after = None
+        self._ids = itertools.count()
+
+    def insert_many(self, docs, ordered=True):
+        errors = []
+        for i, doc in enumerate(docs):
+            doc.setdefault("_id", next(self._ids))
+            if self.fail_after is not None and i >= self.fail_after:
+                self.fail_after = None
+                raise AutoReconnect("connection reset")
+            if doc["_id"] in self.stored:
+                errors.append({"index": i, "code": 11000, "errmsg": "duplicate key"})
+            else:
+                self.stored[doc["_id"]] = doc
+        if errors:
+            raise BulkWriteError({"writeErrors": errors})
+
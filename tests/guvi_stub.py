@@ -0,0 +1,119 @@
+import sys
+import os
+import json
+import time
+import random
+import argparse
+import threading
+from collections import Counter
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+# Add project root to path
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+
+class StubGuvi:
+    """
+    Local stand-in for the GUVI final-result endpoint (stdlib only, real sockets,
+    HTTP/1.1 keep-alive). Adds latency, fails the first `fail_first` requests and
+    then a random `fail_rate` of them with `fail_status`, and counts connections
+    opened and reports received per session (duplicates included).
+
+        python tests/guvi_stub.py --port 9100 --fail-rate 0.2
+        GUVI_REPORT_URL=http://127.0.0.1:9100/ uvicorn app.main:app
+    """
+    def __init__(self, latency: float = 0.0, fail_rate: float = 0.0, fail_first: int = 0,
+                 fail_status: int = 503, retry_after: str = None, port: int = 0):
+        self.latency = latency
+        self.fail_rate = fail_rate
+        self.fail_first = fail_first
+        self.fail_status = fail_status
+        self.retry_after = retry_after
+        self.reports = Counter()  # sessionId -> accepted reports
+        self.stats = Counter()
+        self.lock = threading.Lock()
+        self.server = ThreadingHTTPServer(("127.0.0.1", port), self._handler())
+        self.server.daemon_threads = True
+        self.thread = None
+
+    @property
+    def url(self) -> str:
+        return f"http://127.0.0.1:{self.server.server_address[1]}/api/updateHoneyPotFinalResult"
+
+    def _handler(self):
+        stub = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = "HTTP/1.1"
+            # Headers and body go out as separate writes; without this, Nagle plus delayed
+            # ACKs add ~40 ms to every request on a kept-alive connection
+            disable_nagle_algorithm = True
+
+            def setup(self):
+                super().setup()
+                with stub.lock:
+                    stub.stats["connections"] += 1
+
+            def do_POST(self):
+                payload = json.loads(self.rfile.read(int(self.headers.get("content-length", 0))) or b"{}")
+                if stub.latency:
+                    time.sleep(stub.latency)
+                with stub.lock:
+                    stub.stats["requests"] += 1
+                    failing = stub.stats["requests"] <= stub.fail_first or random.random() < stub.fail_rate
+                    if failing:
+                        stub.stats["failed"] += 1
+                    elif "sessionId" not in payload:
+                        stub.stats["bad_request"] += 1
+                    else:
+                        stub.reports[payload["sessionId"]] += 1
+                if failing:
+                    self._reply(stub.fail_status, {"error": "stub failure"},
+                                {"Retry-After": stub.retry_after} if stub.retry_after else {})
+                elif "sessionId" not in payload:
+                    self._reply(400, {"error": "sessionId missing"})
+                else:
+                    self._reply(200, {"status": "ok"})
+
+            def _reply(self, status, body, headers=None):
+                data = json.dumps(body).encode()
+                self.send_response(status)
+                self.send_header("Content-Type", "application/json")
+                self.send_header("Content-Length", str(len(data)))
+                for name, value in (headers or {}).items():
+                    self.send_header(name, value)
+                self.end_headers()
+                self.wfile.write(data)
+
+            def log_message(self, *args):
+                pass
+
+        return Handler
+
+    @property
+    def duplicates(self) -> int:
+        return sum(count - 1 for count in self.reports.values() if count > 1)
+
+    def start(self):
+        self.thread = threading.Thread(target=self.server.serve_forever, daemon=True)
+        self.thread.start()
+        return self
+
+    def stop(self):
+        self.server.shutdown()
+        self.server.server_close()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Local stand-in for the GUVI report endpoint")
+    parser.add_argument("--port", type=int, default=9100)
+    parser.add_argument("--latency", type=float, default=0.02)
+    parser.add_argument("--fail-rate", type=float, default=0.0)
+    parser.add_argument("--fail-status", type=int, default=503)
+    args = parser.parse_args()
+    stub = StubGuvi(args.latency, args.fail_rate, fail_status=args.fail_status, port=args.port)
+    print(f"📮 [STUB] GUVI stand-in listening on {stub.url}")
+    try:
+        stub.server.serve_forever()
+    except KeyboardInterrupt:
+        print(f"📮 [STUB] {dict(stub.stats)}, duplicates {stub.duplicates}")
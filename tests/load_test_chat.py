@@ -0,0 +1,83 @@
+import sys
+import os
+import time
+import asyncio
+import statistics
+from unittest.mock import MagicMock, patch
+
+# Add project root to path
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+import httpx
+
+from app.core.config import settings
+from app.core.executor import BoundedExecutor
+from app.agent.llm import llm_service
+
+# Simulated latencies (seconds) for the external services
+LLM_LATENCY = 0.05
+MONGO_LATENCY = 0.005
+SESSIONS = 100
+
+
+def _slow(value, delay):
+    def _call(*args, **kwargs):
+        time.sleep(delay)
+        return value
+    return _call
+
+
+def _fake_collection():
+    collection = MagicMock()
+    collection.find_one.side_effect = _slow(None, MONGO_LATENCY)
+    collection.insert_one.side_effect = _slow(None, MONGO_LATENCY)
+    collection.update_one.side_effect = _slow(None, MONGO_LATENCY)
+    return collection
+
+
+async def _run(mode: str, workers: int):
+    """Fires one turn for SESSIONS distinct sessions at once and measures throughput."""
+    from app.main import app
+
+    fake_db = MagicMock()
+    fake_db.get_collection.return_value = _fake_collection()
+
+    with patch.object(settings, 'GUVI_API_KEY', "load-test-key"), \
+         patch('app.agent.brain.db_instance', fake_db), \
+         patch('app.api.callback.db_instance', fake_db), \
+         patch('app.agent.brain.executor', BoundedExecutor(workers)), \
+         patch.object(llm_service, 'classify_scam', _slow(True, LLM_LATENCY)), \
+         patch.object(llm_service, 'extract_regex_tier', _slow(({}, True), 0)), \
+         patch.object(llm_service, 'extract_llm_tier', _slow({}, LLM_LATENCY)), \
+         patch.object(llm_service, 'extract_unknown_entities_batch', _slow({}, LLM_LATENCY)), \
+         patch.object(llm_service, 'generate_response', _slow("hello sir who is this", LLM_LATENCY)), \
+         patch.object(llm_service, 'safety_check', _slow(True, LLM_LATENCY)):
+
+        transport = httpx.ASGITransport(app=app)
+        async with httpx.AsyncClient(transport=transport, base_url="http://test", timeout=None) as client:
+            latencies = []
+
+            async def one_session(i):
+                payload = {
+                    "sessionId": f"load-{mode}-{i}",
+                    "message": {"sender": "scammer", "text": "Your account is blocked, verify KYC now", "timestamp": 0},
+                }
+                started = time.perf_counter()
+                res = await client.post("/chat", json=payload, headers={"x-api-key": "load-test-key"})
+                latencies.append(time.perf_counter() - started)
+                res.raise_for_status()
+
+            started = time.perf_counter()
+            await asyncio.gather(*(one_session(i) for i in range(SESSIONS)))
+            elapsed = time.perf_counter() - started
+
+    print(f"[{mode:8}] {SESSIONS} sessions in {elapsed:6.2f}s -> {SESSIONS / elapsed:7.1f} turns/s "
+          f"(p50 {statistics.median(latencies):.2f}s, max {max(latencies):.2f}s)")
+
+
+if __name__ == "__main__":
+    print(f"Simulated LLM latency {LLM_LATENCY}s, Mongo latency {MONGO_LATENCY}s, {SESSIONS} concurrent sessions")
+    # Before: blocking calls run inline on the event loop (IO_WORKERS=0)
+    asyncio.run(_run("blocking", 0))
+    # After: blocking calls are offloaded onto the bounded executor
+    asyncio.run(_run("async", settings.IO_WORKERS))
@@ -0,0 +1,115 @@
+import sys
+import os
+import unittest
+
+# Add project root to path
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from app.database.backfill import Backfill, extract_batch, build_update
+
+
+class FakeCursor:
+    def __init__(self, docs):
+        self.docs = docs
+
+    def sort(self, key, direction):
+        self.docs = sorted(self.docs, key=lambda d: d[key], reverse=direction < 0)
+        return self
+
+    def batch_size(self, n):
+        return self
+
+    def __iter__(self):
+        return iter(self.docs)
+
+
+class FakeCollection:
+    """Just enough of a pymongo collection for the backfill job."""
+    def __init__(self, docs=()):
+        self.docs = {d["_id"]: d for d in docs}
+        self.bulk_ops = []
+        self.fail_after_writes = None
+
+    def find(self, query, projection=None):
+        docs = list(self.docs.values())
+        after = query.get("_id", {}).get("$gt")
+        if after is not None:
+            docs = [d for d in docs if d["_id"] > after]
+        if "turn_count" in query:
+            docs = [d for d in docs if "turn_count" not in d]
+        return FakeCursor(docs)
+
+    def find_one(self, query):
+        return self.docs.get(query["_id"])
+
+    def update_one(self, query, update, upsert=False):
+        doc = self.docs.setdefault(query["_id"], {"_id": query["_id"]})
+        doc.update(update.get("$set", {}))
+
+    def bulk_write(self, ops, ordered=True):
+        if self.fail_after_writes is not None and len(self.bulk_ops) >= self.fail_after_writes:
+            raise ConnectionError("mongo went away")
+        self.bulk_ops.append(ops)
+
+
+def make_db(turns):
+    return {
+        "session_turns": FakeCollection(turns),
+        "active_sessions": FakeCollection(),
+        "backfill_checkpoints": FakeCollection(),
+    }
+
+
+def scam_turns(sessions=50, per_session=20):
+    turns = []
+    for i in range(sessions * per_session):
+        sid = f"s{i % sessions}"
+        text = f"pay to agent{i % sessions}@okaxis now" if i % 7 == 0 else "sir please hurry up"
+        turns.append({"_id": i, "session_id": sid, "turn": i // sessions, "user": text, "agent": "ok"})
+    return turns
+
+
+class TestBackfill(unittest.TestCase):
+    def test_extract_and_update_shape(self):
+        found = extract_batch([("s1", "pay ram@okhdfc, wallet 1A1zP1"), ("s1", "ram@okhdfc again")], fields={"upi"})
+        self.assertEqual(found, {"s1": {"upi": ["ram@okhdfc"]}})
+        [stage] = build_update({"upi": ["ram@okhdfc"], "crypto_wallet": ["1A1zP1"]})
+        upi = stage["$set"]["extracted_data.upi"]
+        self.assertEqual(upi, {"$setUnion": [{"$ifNull": ["$extracted_data.upi", []]}, {"$literal": ["ram@okhdfc"]}]})
+        dynamic = stage["$set"]["extracted_data.dynamic_intel"]
+        self.assertEqual(dynamic["$setUnion"][1], {"$literal": [{"type": "crypto_wallet", "value": "1A1zP1"}]})
+        # Counts are recomputed from the merged lists, not incremented by what this batch found
+        self.assertEqual(stage["$set"]["report.intel_counts.upi"], {"$size": upi})
+        self.assertEqual(stage["$set"]["report.intel_counts.crypto_wallet"]["$size"]["$filter"]["input"], dynamic)
+        self.assertIn("version", stage["$set"])
+        print("✅ Batch extraction and update shape correct")
+
+    def test_process_pool_backfill(self):
+        print("\n--- Testing Bulk Backfill ---")
+        db = make_db(scam_turns())
+        job = Backfill(db, source="turns", fields=["upi"], batch_size=100, workers=2)
+        self.assertEqual(job.run(), 1000)
+
+        updated = {op._filter["_id"] for ops in db["active_sessions"].bulk_ops for op in ops}
+        expected = {f"s{i % 50}" for i in range(1000) if i % 7 == 0}
+        self.assertEqual(updated, expected)
+        self.assertEqual(db["backfill_checkpoints"].find_one({"_id": job.job})["last_id"], 999)
+        print(f"✅ {len(updated)} sessions updated in {len(db['active_sessions'].bulk_ops)} bulk writes")
+
+    def test_resume_from_checkpoint(self):
+        print("\n--- Testing Checkpoint Resume ---")
+        db = make_db(scam_turns())
+        db["active_sessions"].fail_after_writes = 3
+        with self.assertRaises(ConnectionError):
+            Backfill(db, fields=["upi"], batch_size=100, workers=0).run()
+        checkpoint = db["backfill_checkpoints"].find_one({"_id": "regex_backfill:turns:upi"})["last_id"]
+        self.assertEqual(checkpoint, 299, "Checkpoint should stop at the last written batch")
+
+        db["active_sessions"].fail_after_writes = None
+        resumed = Backfill(db, fields=["upi"], batch_size=100, workers=0).run()
+        self.assertEqual(resumed, 700, "Resumed run re-read finished batches")
+        print("✅ Resumed after batch 3")
+
+
+if __name__ == '__main__':
+    unittest.main()
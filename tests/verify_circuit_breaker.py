@@ -0,0 +1,99 @@
+import sys
+import os
+import time
+import asyncio
+import unittest
+from unittest.mock import patch
+
+import httpx
+from groq import InternalServerError
+
+# Add project root to path
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from app.core.config import settings
+from app.agent.circuit_breaker import CircuitBreaker, CircuitOpenError
+from app.agent.brain import brain_service
+from app.agent.planner import planner_service
+from app.agent.personas import BASE_PERSONA, PERSONA_SYSTEM
+from fakes import REQUEST, FakeGroqClient, make_service
+
+
+class DownGroq(FakeGroqClient):
+    """Fake client for a provider that is down: every call is a 503."""
+    def __init__(self):
+        super().__init__()
+        self.calls = 0
+
+    def create(self, **kwargs):
+        self.calls += 1
+        raise InternalServerError("503", response=httpx.Response(503, request=REQUEST), body=None)
+
+
+WIDOW = next(prompt for triggers, prompt in PERSONA_SYSTEM.items() if "lottery" in triggers)
+
+
+class TestCircuitBreaker(unittest.TestCase):
+    def test_state_transitions(self):
+        breaker = CircuitBreaker("t", failure_rate=0.5, min_calls=4, window=60, cooldown=0.1)
+        breaker.record_success()
+        breaker.record_failure()
+        breaker.record_failure()
+        self.assertEqual(breaker.state, "closed", "Tripped before min_calls")
+        breaker.record_failure()
+        self.assertEqual(breaker.state, "open")
+        self.assertFalse(breaker.allow())
+
+        time.sleep(0.15)
+        self.assertTrue(breaker.allow(), "Probe not allowed after cool-down")
+        self.assertFalse(breaker.allow(), "Only one probe allowed while half-open")
+        breaker.record_success()
+        self.assertEqual(breaker.state, "closed")
+        print("✅ Breaker transitions correct")
+
+    def test_open_circuit_uses_local_fallbacks(self):
+        print("\n--- Testing Degraded Mode ---")
+        down = DownGroq()
+        service = make_service({"global": "k1"}, lambda slot: down)
+
+        with patch.object(settings, "LLM_CALL_DEADLINE", 0.05), \
+             patch.object(settings, "LLM_HEDGE_AFTER", 0), \
+             patch.object(settings, "BREAKER_MIN_CALLS", 3):
+            for _ in range(3):
+                with self.assertRaises(Exception):
+                    service._call_groq("gen", lambda client: client.chat.completions.create())
+            calls_before = down.calls
+
+            with self.assertRaises(CircuitOpenError):
+                service._call_groq("gen", lambda client: client.chat.completions.create())
+            self.assertEqual(down.calls, calls_before, "Open circuit still called the provider")
+            self.assertTrue(service.is_degraded("gen"))
+
+            # Extraction falls back to RegexSpy once its own circuit has tripped
+            for _ in range(3):
+                service.extract_information(f"pay {_} to ram123@okhdfc")
+            started = time.time()
+            intel = service.extract_information("send to ram123@okhdfc")
+            self.assertEqual(intel.get("upi"), ["ram123@okhdfc"])
+            self.assertLess(time.time() - started, 0.05)
+
+            # The brain answers with a canned stalling reply straight away
+            state = {"history": [], "persona_locked": WIDOW, "scam_confirmed": True}
+            with patch("app.agent.brain.llm_service", service):
+                started = time.time()
+                reply = asyncio.run(brain_service._generate_safe_reply(state, "", "hello", "upi"))
+            self.assertLess(time.time() - started, 0.05)
+            self.assertTrue(reply.startswith("God bless you"), "Stalling reply out of the locked persona")
+        print(f"✅ Degraded reply: {reply}")
+
+    def test_stalling_reply_stays_in_persona(self):
+        reply = planner_service.get_stalling_reply("upi", persona=WIDOW)
+        self.assertTrue(reply.startswith("God bless you, ") and "dear" in reply)
+        self.assertTrue(planner_service.get_stalling_reply("upi", persona=BASE_PERSONA).startswith("yes okay, "))
+        # Neutral first-contact persona: no catchphrase, still a usable reply
+        self.assertIn("sir", planner_service.get_stalling_reply(None, persona="neutral prompt"))
+        print("✅ Stalling replies keep the persona's voice")
+
+
+if __name__ == '__main__':
+    unittest.main()
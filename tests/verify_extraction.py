@@ -2,6 +2,7 @@ import sys
 import os
 import asyncio
 import re
+from unittest.mock import patch
 
 # Add the project root to the python path
 sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
@@ -49,6 +50,55 @@ def test_llm_extraction():
     else:
         print("⚠️ LLM Extraction might have failed or found nothing (check output)")
         
+def test_regex_overlaps():
+    print("\n--- Testing Regex Overlap Handling ---")
+    text = ("Pay at https://sbi-kyc.in/pay?ph=9876543211 or www.sbi-help.in, "
+            "mail help@sbi-care.com, UPI refund@okaxis, call 9876543210")
+    extracted = RegexSpy.extract_intelligence(text)
+    print(f"Extracted: {extracted}")
+    # Every URL pattern contributes (www. used to overwrite the https:// matches)
+    assert set(extracted["url"]) == {"https://sbi-kyc.in/pay?ph=9876543211", "www.sbi-help.in,"}
+    assert extracted["email"] == ["help@sbi-care.com"]
+    assert extracted["upi"] == ["refund@okaxis"], "Email or URL text re-matched as UPI"
+    # The number inside the URL belongs to the URL
+    assert extracted["phone"] == ["9876543210"]
+    print("✅ Overlap test passed")
+
+def test_tiered_extraction():
+    print("\n--- Testing Regex-First Extraction ---")
+    # Fully resolved by the regexes: the LLM is never called
+    with patch.object(llm_service, "extract_information") as llm:
+        intel = llm_service.extract_tiered("pay to ram123@okhdfc now, call 9876543210")
+        llm.assert_not_called()
+    assert intel["upi"] == ["ram123@okhdfc"] and intel["phone"] == ["9876543210"]
+
+    # Spelled-out number left behind: LLM runs and its fields merge onto the standard keys
+    with patch.object(llm_service, "extract_information", return_value={
+            "phone_number": "9876543210", "upi_id": "ram123@okhdfc", "crypto_wallet": ["1A1zP1"]}) as llm:
+        intel = llm_service.extract_tiered("upi ram123@okhdfc, call nine eight seven six five four three two one zero")
+        llm.assert_called_once()
+    assert intel["upi"] == ["ram123@okhdfc"], "Regex and LLM findings not de-duplicated"
+    assert intel["phone"] == ["9876543210"]
+    assert intel["crypto_wallet"] == ["1A1zP1"]
+    print("✅ Tiered extraction test passed")
+
+def test_reply_screen():
+    print("\n--- Testing Reply Safety Pre-Screen ---")
+    assert RegexSpy.screen_reply("Hello, who is this?") == "safe"
+    assert RegexSpy.screen_reply("sir give me your UPI I will pay charges") == "safe"
+    assert RegexSpy.screen_reply("my otp is 482913 sir") == "unsafe", "OTP not caught"
+    assert RegexSpy.screen_reply("my atm pin 4821 sir") == "unsafe", "ATM PIN not caught"
+    assert RegexSpy.screen_reply("pin is 4821") == "unsafe", "PIN not caught"
+    assert RegexSpy.screen_reply("sir my pin code 110001, Delhi") != "unsafe", "Postal PIN code treated as a secret"
+    assert RegexSpy.screen_reply("card 4111 1111 1111 1111") == "unsafe", "Card not caught"
+    assert RegexSpy.screen_reply("card 4111 1111 1111 1112") == "review", "Luhn-invalid card treated as real"
+    assert RegexSpy.screen_reply("aadhaar 2345 6789 0123") == "unsafe", "Aadhaar not caught"
+    assert RegexSpy.screen_reply("my PAN is ABCDE1234F") == "unsafe", "PAN not caught"
+    assert RegexSpy.screen_reply("As an AI I cannot do that") == "unsafe", "AI leak not caught"
+    assert RegexSpy.screen_reply("OBJECTIVE: Ask for their UPI ID") == "unsafe", "Instruction leak not caught"
+    assert RegexSpy.screen_reply("is 9876543210 your number sir?") == "review"
+    print("✅ Reply screen test passed")
+
 def test_regex_class_structure():
     # Verify the structure matches what Brain expects
     print("\n--- Testing Regex Class Structure ---")
@@ -58,5 +108,8 @@ def test_regex_class_structure():
 
 if __name__ == "__main__":
     test_regex()
+    test_regex_overlaps()
+    test_tiered_extraction()
+    test_reply_screen()
     test_regex_class_structure()
     test_llm_extraction()
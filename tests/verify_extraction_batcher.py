@@ -0,0 +1,99 @@
+import sys
+import os
+import asyncio
+import unittest
+from unittest.mock import MagicMock, patch
+
+# Add project root to path
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from app.agent.brain import brain_service
+from app.agent.extraction_batcher import ExtractionBatcher
+from app.agent.session_cache import CachedSession
+from app.database.backfill import build_update
+from app.database.unit_of_work import SessionUnitOfWork
+
+
+async def run_inline(func, *args):
+    return func(*args)
+
+
+class TestExtractionBatcher(unittest.TestCase):
+    def test_window_batches_across_sessions(self):
+        print("\n--- Testing Extraction Micro-Batching ---")
+        requests = []
+
+        def extract(messages):
+            requests.append(messages)
+            return {mid: {"name": [text.split()[-1]]} for mid, text in messages}
+
+        applied = []
+
+        async def apply(found):
+            applied.append(found)
+
+        async def scenario():
+            batcher = ExtractionBatcher(extract, apply, batch_size=10, window=0.05, max_chars=10_000, max_queue=100)
+            loop = asyncio.create_task(batcher.run(run_inline))
+            await asyncio.sleep(0)
+            for i in range(25):
+                self.assertTrue(batcher.submit(f"s{i % 8}", f"i am officer{i}"))
+            await asyncio.sleep(0.2)
+            loop.cancel()
+            await asyncio.gather(loop, return_exceptions=True)
+            return batcher
+
+        batcher = asyncio.run(scenario())
+        self.assertEqual([len(r) for r in requests], [10, 10, 5])
+        self.assertEqual(batcher.stats["messages"], 25)
+        # Findings come back grouped per session, in message order
+        self.assertEqual(applied[0]["s0"], [{"name": ["officer0"]}, {"name": ["officer8"]}])
+        self.assertFalse(batcher.submit("s0", "late"), "Stopped batcher accepted a message")
+        print(f"✅ 25 messages -> {len(requests)} LLM requests")
+
+    def test_queue_bound_sheds_load(self):
+        async def scenario():
+            batcher = ExtractionBatcher(None, None, batch_size=10, window=1, max_chars=100, max_queue=2)
+            batcher.queue = asyncio.Queue(maxsize=2)
+            batcher.running = True
+            return [batcher.submit("s1", "msg") for _ in range(3)], batcher
+
+        accepted, batcher = asyncio.run(scenario())
+        self.assertEqual(accepted, [True, True, False])
+        self.assertEqual(batcher.stats["dropped"], 1)
+
+    @patch('app.agent.brain.db_instance')
+    def test_apply_uses_one_bulk_write(self, mock_db):
+        print("\n--- Testing Batched Intel Write ---")
+        collection = MagicMock()
+        mock_db.get_collection.return_value = collection
+        cached_state = {"_id": "hot", "extracted_data": {"dynamic_intel": []}}
+        uow = SessionUnitOfWork(collection, "hot", version=3)
+        brain_service.session_cache.put("hot", CachedSession(cached_state, uow))
+        try:
+            asyncio.run(brain_service.apply_background_intel({
+                "cold1": [{"name": ["Rahul"]}, {"name": ["Rahul"], "upi": ["x@ybl"]}],
+                "cold2": [{"crypto_wallet": ["1A1zP1"]}],
+                "hot": [{"employee_id": ["EMP42"]}],
+            }))
+        finally:
+            brain_service.session_cache.invalidate("hot")
+
+        collection.bulk_write.assert_called_once()
+        ops = collection.bulk_write.call_args[0][0]
+        self.assertEqual({op._filter["_id"] for op in ops}, {"cold1", "cold2"})
+        cold1 = next(op._doc for op in ops if op._filter["_id"] == "cold1")
+        self.assertEqual(cold1, build_update({"name": ["Rahul"], "upi": ["x@ybl"]}))
+        self.assertEqual({field for field in cold1[0]["$set"] if field.startswith("report.")},
+                         {"report.intel_counts.name", "report.intel_counts.upi"})
+        self.assertFalse(any(getattr(op, "_upsert", False) for op in ops), "Background write may create sessions")
+        collection.update_one.assert_not_called()
+        collection.find_one.assert_not_called()
+        # The cached session got the findings in memory, written with its next flush
+        self.assertIn({"type": "employee_id", "value": "EMP42"}, cached_state["extracted_data"]["dynamic_intel"])
+        self.assertTrue(uow.pending)
+        print("✅ Cold sessions in one bulk_write, hot session folded into its cache entry")
+
+
+if __name__ == '__main__':
+    unittest.main()
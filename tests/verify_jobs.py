@@ -0,0 +1,214 @@
+import sys
+import os
+import asyncio
+import time
+import unittest
+from unittest.mock import MagicMock, patch
+
+# Add project root to path
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from pymongo.errors import DuplicateKeyError
+
+from app.core.config import settings
+from app.core.jobs import JobQueue, MemoryJobStore, MongoJobStore, PermanentJobError, parse_concurrency
+
+
+async def run_queue(queue, seconds):
+    queue.start()
+    await asyncio.sleep(seconds)
+    await queue.stop(grace=1)
+
+
+class TestJobQueue(unittest.TestCase):
+    def setUp(self):
+        self.fast = patch.multiple(settings, JOB_POLL_INTERVAL=0.01, JOB_RETRY_BASE=0.01, JOB_CONCURRENCY="")
+        self.fast.start()
+        self.addCleanup(self.fast.stop)
+
+    def test_retry_then_dead_letter(self):
+        print("\n--- Testing Job Retries and Dead-Lettering ---")
+        queue = JobQueue(MemoryJobStore())
+        calls = {"flaky": 0, "broken": 0}
+
+        def flaky(n):
+            calls["flaky"] += 1
+            if calls["flaky"] < n:
+                raise ConnectionError("GUVI down")
+
+        async def broken():
+            calls["broken"] += 1
+            raise ValueError("bad payload")
+
+        queue.register("flaky", flaky, max_attempts=5)
+        queue.register("broken", broken, max_attempts=3)
+
+        async def scenario():
+            await queue.enqueue("flaky", {"n": 3})
+            await queue.enqueue("broken")
+            await run_queue(queue, 0.3)
+
+        asyncio.run(scenario())
+        self.assertEqual(calls, {"flaky": 3, "broken": 3})
+        self.assertEqual(queue.stats["done"], 1)
+        dead = queue.store.dead_letters()
+        self.assertEqual([(j["type"], j["attempts"]) for j in dead], [("broken", 3)])
+        self.assertEqual(dead[0]["last_error"], "ValueError: bad payload")
+        self.assertEqual(queue.store.counts(), {"broken": {"dead": 1}})
+        print(f"✅ Flaky job done after 3 attempts, broken job dead-lettered: {queue.stats}")
+
+    def test_permanent_error_dead_letters_at_once(self):
+        queue = JobQueue(MemoryJobStore())
+        calls = []
+
+        async def rejected():
+            calls.append(1)
+            raise PermanentJobError("400 from report endpoint")
+
+        queue.register("rejected", rejected, max_attempts=5)
+
+        async def scenario():
+            await queue.enqueue("rejected")
+            await run_queue(queue, 0.1)
+
+        asyncio.run(scenario())
+        self.assertEqual(len(calls), 1)
+        self.assertEqual([j["attempts"] for j in queue.store.dead_letters()], [1])
+
+    def test_concurrency_per_type(self):
+        print("\n--- Testing Per-Type Concurrency ---")
+        queue = JobQueue(MemoryJobStore())
+        running = {"report": 0, "summary": 0}
+        peak = {"report": 0, "summary": 0}
+
+        def handler(kind):
+            async def run():
+                running[kind] += 1
+                peak[kind] = max(peak[kind], running[kind])
+                await asyncio.sleep(0.02)
+                running[kind] -= 1
+            return run
+
+        with patch.object(settings, "JOB_CONCURRENCY", "summary=4"):
+            queue.register("report", handler("report"), concurrency=2)
+            queue.register("summary", handler("summary"), concurrency=1)
+
+        async def scenario():
+            for _ in range(12):
+                await queue.enqueue("report")
+                await queue.enqueue("summary")
+            await run_queue(queue, 0.3)
+
+        asyncio.run(scenario())
+        self.assertEqual(queue.stats["done"], 24)
+        self.assertEqual(peak, {"report": 2, "summary": 4}, "JOB_CONCURRENCY should override the default")
+        print(f"✅ Peak concurrency {peak}")
+
+    def test_expired_lease_is_reclaimed(self):
+        store = MemoryJobStore()
+        now = time.time()
+        store.enqueue({"type": "report", "payload": {}, "status": "queued", "attempts": 0, "run_at": now})
+        first = store.claim("report", "worker-a", lease=0.05)
+        self.assertIsNone(store.claim("report", "worker-b", lease=0.05), "Leased job handed out twice")
+        time.sleep(0.06)
+        second = store.claim("report", "worker-b", lease=0.05)
+        self.assertEqual((second["_id"], second["attempts"]), (first["_id"], 2))
+        # The first worker lost the job: its late completion is ignored
+        store.complete(first["_id"], "worker-a")
+        self.assertEqual(store.counts(), {"report": {"running": 1}})
+
+    def test_worker_survives_store_errors(self):
+        print("\n--- Testing Worker Survives Store Errors ---")
+
+        class FlakyStore(MemoryJobStore):
+            def __init__(self):
+                super().__init__()
+                self.failures = {"complete": 1, "fail": 1}
+
+            def _maybe_raise(self, op):
+                if self.failures[op]:
+                    self.failures[op] -= 1
+                    raise ConnectionError(f"mongo down during {op}")
+
+            def complete(self, job_id, owner):
+                self._maybe_raise("complete")
+                super().complete(job_id, owner)
+
+            def fail(self, job_id, owner, error, retry_at=None):
+                self._maybe_raise("fail")
+                super().fail(job_id, owner, error, retry_at)
+
+        queue = JobQueue(FlakyStore())
+        done = []
+
+        def handler(n):
+            if n == 0 and "raised" not in done:
+                done.append("raised")
+                raise ValueError("first try")
+            done.append(n)
+
+        queue.register("work", handler, concurrency=1, lease=0.1)
+
+        async def scenario():
+            for n in range(3):
+                await queue.enqueue("work", {"n": n})
+            await run_queue(queue, 0.8)
+
+        asyncio.run(scenario())
+        # The single worker outlived both store errors; the jobs they hit ran again after their lease
+        self.assertEqual(set(done) - {"raised"}, {0, 1, 2})
+        self.assertEqual(queue.store.counts(), {})
+        print(f"✅ All jobs finished: {queue.stats}")
+
+    def test_dedupe_key(self):
+        queue = JobQueue(MemoryJobStore())
+
+        async def scenario():
+            return [await queue.enqueue("summary", {"session_id": "s1"}, dedupe_key="summary:s1") for _ in range(3)]
+
+        ids = asyncio.run(scenario())
+        self.assertIsNotNone(ids[0])
+        self.assertEqual(ids[1:], [None, None])
+        self.assertEqual(queue.stats["deduplicated"], 2)
+
+    def test_retry_merges_into_queued_duplicate(self):
+        store = MemoryJobStore()
+        job = {"type": "summary", "payload": {}, "status": "queued", "attempts": 0, "run_at": time.time(),
+               "dedupe_key": "summary:s1"}
+        first = store.enqueue(dict(job))
+        store.claim("summary", "worker-a", lease=60)
+        # Allowed: the first one is running, not queued
+        self.assertIsNotNone(store.enqueue(dict(job)))
+        store.fail(first, "worker-a", "boom", retry_at=time.time())
+        self.assertEqual(store.counts(), {"summary": {"queued": 1}})
+        self.assertNotIn(first, store.jobs)
+
+        collection = MagicMock()
+        collection.update_one.side_effect = DuplicateKeyError("dedupe_key")
+        MongoJobStore(lambda: collection).fail("job1", "worker-a", "boom", retry_at=time.time())
+        collection.delete_one.assert_called_once_with({"_id": "job1", "owner": "worker-a"})
+
+    def test_mongo_claim_is_atomic(self):
+        collection = MagicMock()
+        store = MongoJobStore(lambda: collection)
+        store.claim("report", "host:1", lease=60)
+        query, update = collection.find_one_and_update.call_args[0]
+        self.assertEqual(query["type"], "report")
+        self.assertEqual([c["status"] for c in query["$or"]], ["queued", "running"])
+        self.assertEqual(update["$set"]["owner"], "host:1")
+        self.assertEqual(update["$inc"], {"attempts": 1})
+        self.assertEqual(parse_concurrency("report=2, summary = 4,"), {"report": 2, "summary": 4})
+
+    def test_indexes_built_at_startup_only(self):
+        collection = MagicMock()
+        queue = JobQueue(MongoJobStore(lambda: collection))
+        asyncio.run(queue.enqueue("report", {"session_id": "s1"}))
+        collection.create_index.assert_not_called()
+
+        queue.ensure_indexes()
+        unique = [call for call in collection.create_index.call_args_list if call[0] == ("dedupe_key",)]
+        self.assertTrue(unique and unique[0][1]["unique"], "dedupe_key index missing")
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,86 @@
+import sys
+import os
+import time
+import threading
+import unittest
+from collections import Counter
+
+import httpx
+from groq import RateLimitError
+
+# Add project root to path
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from fakes import REQUEST, FakeGroqClient, call_groq, make_service
+
+
+class FakeGroq(FakeGroqClient):
+    """Stand-in for a Groq client: records which key served each call."""
+    def __init__(self, name, calls, lock, rate_limited_until=0.0):
+        super().__init__()
+        self.name = name
+        self.calls = calls
+        self.lock = lock
+        self.rate_limited_until = rate_limited_until
+
+    def create(self, **kwargs):
+        if time.time() < self.rate_limited_until:
+            raise RateLimitError("429 rate limit", response=httpx.Response(429, request=REQUEST), body=None)
+        time.sleep(0.001)
+        with self.lock:
+            self.calls[self.name] += 1
+        return self.name
+
+
+def counting_service(pools, rate_limited=()):
+    calls, lock = Counter(), threading.Lock()
+
+    def client_for(slot):
+        until = time.time() + 60 if slot.name in rate_limited else 0.0
+        return FakeGroq(slot.name, calls, lock, until)
+
+    return make_service(pools, client_for), calls
+
+
+def hammer(service, task, threads=16, calls_per_thread=100):
+    def worker():
+        for _ in range(calls_per_thread):
+            call_groq(service, task)
+
+    pool = [threading.Thread(target=worker) for _ in range(threads)]
+    for t in pool:
+        t.start()
+    for t in pool:
+        t.join()
+
+
+class TestKeyRotationUnderLoad(unittest.TestCase):
+    def test_even_distribution(self):
+        print("\n--- Testing Key Distribution Under Concurrency ---")
+        service, calls = counting_service({"scam": "k1,k2,k3,k4,k5", "global": "g1"})
+        hammer(service, "scam")
+
+        print(f"Calls per key: {dict(calls)}")
+        self.assertEqual(sum(calls.values()), 1600)
+        self.assertNotIn("global#0", calls, "Spilled to global while the task pool had headroom")
+        expected = 1600 / 5
+        for name in ("scam#0", "scam#1", "scam#2", "scam#3", "scam#4"):
+            self.assertAlmostEqual(calls[name], expected, delta=expected * 0.1, msg=f"{name} unevenly used")
+        for slot in service.key_manager.pools["scam"]:
+            self.assertEqual(slot.inflight, 0, "In-flight counter leaked")
+        print("✅ Keys used evenly")
+
+    def test_rate_limited_key_is_skipped(self):
+        print("\n--- Testing 429 Cool-Down Under Concurrency ---")
+        service, calls = counting_service({"scam": "k1,k2,k3", "global": "g1"}, rate_limited={"scam#1"})
+        hammer(service, "scam", threads=8, calls_per_thread=50)
+
+        print(f"Calls per key: {dict(calls)}")
+        self.assertEqual(sum(calls.values()), 400)
+        self.assertEqual(calls["scam#1"], 0)
+        self.assertGreater(service.key_manager.pools["scam"][1].cooldown_until, time.time())
+        print("✅ Rate limited key cooled down and skipped")
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,53 @@
+import sys
+import os
+import unittest
+from unittest.mock import patch
+
+# Add project root to path
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from app.agent.llm_cache import LLMCache, MISS
+
+class TestLLMCache(unittest.TestCase):
+    def test_key_ignores_whitespace(self):
+        a = LLMCache.make_key("scam", "m", [{"role": "user", "content": "Pay  fee\n now"}])
+        b = LLMCache.make_key("scam", "m", [{"role": "user", "content": "Pay fee now"}])
+        c = LLMCache.make_key("safe", "m", [{"role": "user", "content": "Pay fee now"}])
+        self.assertEqual(a, b)
+        self.assertNotEqual(a, c)
+
+    def test_lru_eviction(self):
+        cache = LLMCache(max_entries=2, ttl=60)
+        cache.set("a", 1)
+        cache.set("b", False)
+        cache.get("a")          # 'a' is now most recently used
+        cache.set("c", 3)       # evicts 'b'
+        self.assertIs(cache.get("b"), MISS)
+        self.assertEqual(cache.get("a"), 1)
+        self.assertEqual(cache.stats["evictions"], 1)
+        print("✅ LRU eviction correct")
+
+    def test_ttl_expiry(self):
+        cache = LLMCache(max_entries=10, ttl=60)
+        with patch("app.agent.llm_cache.time.time", return_value=1000):
+            cache.set("a", "value")
+        with patch("app.agent.llm_cache.time.time", return_value=1059):
+            self.assertEqual(cache.get("a"), "value")
+        with patch("app.agent.llm_cache.time.time", return_value=1061):
+            self.assertIs(cache.get("a"), MISS)
+        self.assertEqual(cache.stats["expirations"], 1)
+        print("✅ TTL expiry correct")
+
+    @patch("app.agent.llm_cache.db_instance")
+    def test_shared_tier_index_at_startup(self, mock_db):
+        collection = mock_db.get_collection.return_value
+        collection.find_one.return_value = None
+        cache = LLMCache(max_entries=10, ttl=60, shared=True)
+        self.assertIs(cache.get("a"), MISS)
+        cache.set("a", "value")
+        collection.create_index.assert_not_called()
+        cache.ensure_indexes()
+        collection.create_index.assert_called_once_with("expires_at", expireAfterSeconds=0)
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,78 @@
+import sys
+import os
+import asyncio
+import unittest
+from types import SimpleNamespace
+from unittest.mock import patch
+
+from fastapi.testclient import TestClient
+
+# Add project root to path
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from app.core.config import settings
+from app.core.executor import executor
+from app.utils import metrics
+from app.main import app
+from fakes import FakeGroqClient, make_service
+
+
+class UsageGroq(FakeGroqClient):
+    """Fake client returning a completion with a Groq-style usage block."""
+    def create(self, model, messages, **kwargs):
+        return SimpleNamespace(
+            choices=[SimpleNamespace(message=SimpleNamespace(content="SAFE"))],
+            usage=SimpleNamespace(prompt_tokens=120, completion_tokens=7)
+        )
+
+
+class TestMetrics(unittest.TestCase):
+    def test_histogram_exposition(self):
+        registry = metrics.Registry()
+        hist = registry.histogram("t_seconds", "test", ["stage"], buckets=(0.1, 1))
+        hist.observe(0.05, stage="load")
+        hist.observe(0.5, stage="load")
+        hist.observe(5, stage="load")
+        text = registry.render()
+        print(text)
+        self.assertIn('t_seconds_bucket{stage="load",le="0.1"} 1', text)
+        self.assertIn('t_seconds_bucket{stage="load",le="1"} 2', text)
+        self.assertIn('t_seconds_bucket{stage="load",le="+Inf"} 3', text)
+        self.assertIn('t_seconds_count{stage="load"} 3', text)
+        print("✅ Histogram rendered in Prometheus format")
+
+    def test_turn_trace_collects_llm_usage(self):
+        print("\n--- Testing Per-Turn LLM Accounting ---")
+        service = make_service({"gen": "k1"}, lambda slot: UsageGroq())
+
+        async def turn():
+            with metrics.trace_turn("trace_session") as trace:
+                with metrics.span("generate"):
+                    # Runs on the executor thread, like the real turn
+                    await executor.run(service._call_groq, "gen", lambda client: client.chat.completions.create(
+                        model="openai/gpt-oss-20b", messages=[]))
+                return trace
+
+        with patch.object(settings, "LLM_HEDGE_AFTER", 0):
+            trace = asyncio.run(turn())
+        self.assertEqual(trace.llm_attempts, 1)
+        self.assertEqual((trace.prompt_tokens, trace.completion_tokens), (120, 7))
+        self.assertIn("generate", trace.stages)
+
+        text = metrics.registry.render()
+        self.assertIn('honeypot_llm_tokens_total{task="gen",model="openai/gpt-oss-20b",kind="prompt"}', text)
+        self.assertIn('honeypot_llm_attempts_total{task="gen",key="gen#0",outcome="ok"}', text)
+        print(f"✅ Trace: {trace.summary()}")
+
+    def test_metrics_endpoint(self):
+        client = TestClient(app)
+        with patch.object(settings, "GUVI_API_KEY", "test-key"):
+            self.assertEqual(client.get("/admin/metrics").status_code, 401)
+            response = client.get("/admin/metrics", headers={"x-api-key": "test-key"})
+        self.assertEqual(response.status_code, 200)
+        self.assertIn("# TYPE honeypot_stage_seconds histogram", response.text)
+        print("✅ /admin/metrics served")
+
+
+if __name__ == '__main__':
+    unittest.main()
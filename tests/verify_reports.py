@@ -0,0 +1,186 @@
+import sys
+import os
+import asyncio
+import unittest
+from unittest.mock import AsyncMock, MagicMock, patch
+
+from fastapi.testclient import TestClient
+
+# Add project root to path
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from app.core.jobs import PermanentJobError
+from app.core.report_client import ReportClient, ReportRejected
+from app.api import callback
+from app.main import app
+from guvi_stub import StubGuvi
+
+
+def make_client(stub, retries=2):
+    return ReportClient(stub.url, timeout=5, max_connections=4, retries=retries, backoff_base=0.01)
+
+
+class TestReportClient(unittest.TestCase):
+    def setUp(self):
+        self.stub = StubGuvi().start()
+        self.addCleanup(self.stub.stop)
+
+    def test_pooled_connections(self):
+        print("\n--- Testing Pooled Report Submission ---")
+        client = make_client(self.stub)
+
+        async def scenario():
+            await asyncio.gather(*(client.send(f"s{i}", {"sessionId": f"s{i}"}) for i in range(40)))
+            await client.close()
+
+        asyncio.run(scenario())
+        self.assertEqual(len(self.stub.reports), 40)
+        self.assertLessEqual(self.stub.stats["connections"], 4)
+        print(f"✅ 40 reports over {self.stub.stats['connections']} connections")
+
+    def test_transient_failures_retried(self):
+        self.stub.fail_first, self.stub.retry_after = 2, "0.05"
+        client = make_client(self.stub)
+        asyncio.run(client.send("flaky", {"sessionId": "flaky"}))
+        self.assertEqual(self.stub.reports["flaky"], 1)
+        self.assertEqual((client.stats["retries"], client.stats["sent"]), (2, 1))
+
+        # Out of quick retries: the error goes back to the report job
+        self.stub.fail_first, self.stub.stats["requests"] = 5, 0
+        with self.assertRaises(Exception):
+            asyncio.run(client.send("down", {"sessionId": "down"}))
+        self.assertEqual(self.stub.stats["requests"], 3)
+        self.assertEqual(client.stats["failed"], 1)
+
+    def test_client_error_not_retried(self):
+        client = make_client(self.stub)
+        with self.assertRaises(ReportRejected):
+            asyncio.run(client.send("bad", {"no": "session"}))
+        self.assertEqual((self.stub.stats["requests"], client.stats["retries"]), (1, 0))
+
+
+class TestSubmitReport(unittest.TestCase):
+    def setUp(self):
+        self.stub = StubGuvi().start()
+        self.addCleanup(self.stub.stop)
+        patcher = patch.object(callback, "report_client", make_client(self.stub))
+        patcher.start()
+        self.addCleanup(patcher.stop)
+        self.sessions = MagicMock()
+        db = patch.object(callback, "db_instance")
+        db.start().get_collection.return_value = self.sessions
+        self.addCleanup(db.stop)
+        key = patch.object(callback.settings, "GUVI_API_KEY", "test-key")
+        key.start()
+        self.addCleanup(key.stop)
+
+    def sent_ids(self):
+        return [op._filter["_id"] for call in self.sessions.bulk_write.call_args_list for op in call[0][0]]
+
+    def test_reported_once(self):
+        print("\n--- Testing Report Idempotency ---")
+        session = {"_id": "done_session", "scam_confirmed": True, "turn_count": 4}
+        self.sessions.find.return_value = [session]
+        asyncio.run(callback.submit_report("done_session"))
+        self.assertEqual(self.stub.reports["done_session"], 1)
+        self.assertEqual(self.sent_ids(), ["done_session"])
+        op = self.sessions.bulk_write.call_args[0][0][0]
+        self.assertEqual(op._doc["$set"]["report_status"], "sent")
+
+        # A later job for the same session sends nothing, unless forced from the admin endpoint
+        session["report_status"] = "sent"
+        asyncio.run(callback.submit_report("done_session"))
+        self.assertEqual(self.stub.reports["done_session"], 1)
+        asyncio.run(callback.submit_report("done_session", force=True))
+        self.assertEqual(self.stub.reports["done_session"], 2)
+        print("✅ Second report skipped, forced re-send allowed")
+
+    def test_failed_upload_not_marked(self):
+        self.stub.fail_first = 10
+        self.sessions.find.return_value = [{"_id": "unlucky"}]
+        with self.assertRaises(Exception):
+            asyncio.run(callback.submit_report("unlucky"))
+        self.sessions.bulk_write.assert_not_called()
+
+    def test_missing_key_marks_skipped(self):
+        self.sessions.find.return_value = [{"_id": "keyless", "report_status": "queued"}]
+        with patch.object(callback.settings, "GUVI_API_KEY", ""):
+            asyncio.run(callback.submit_report("keyless"))
+        self.assertEqual(self.stub.stats["requests"], 0)
+        # Finished for good rather than left at "queued" for retries that can't succeed
+        self.assertEqual(self.sent_ids(), ["keyless"])
+        op = self.sessions.bulk_write.call_args[0][0][0]
+        self.assertEqual(op._doc["$set"]["report_status"], "skipped")
+
+    def test_rejected_report_not_retried(self):
+        self.sessions.find.return_value = [{"_id": "rejected"}]
+        with patch.object(callback, "build_payload", return_value={"no": "sessionId"}):
+            with self.assertRaises(PermanentJobError):
+                asyncio.run(callback.submit_report("rejected"))
+        self.assertEqual(self.stub.stats["requests"], 1, "4xx retried by the client")
+        self.sessions.bulk_write.assert_not_called()
+
+    def test_projected_payload(self):
+        print("\n--- Testing Report From Incremental Fields ---")
+        self.sessions.find.return_value = [{
+            "_id": "tracked", "scam_confirmed": True, "persona_locked": "grandma",
+            "extracted_data": {"upi": ["crook@okaxis"], "phone": ["9876543210"]},
+            "report": {"messages": 14, "intel_counts": {"upi": 1, "phone": 1, "ip": 2},
+                       "first_seen": 1000.0, "last_seen": 1300.0, "focus": "bank_account"},
+        }]
+        payload = callback.build_payload(self.sessions.find.return_value[0])
+        self.assertEqual(payload["totalMessagesExchanged"], 14)
+        self.assertEqual(payload["extractedIntelligence"]["upiIds"], ["crook@okaxis"])
+        self.assertIn("Strategy state: bank_account. Intel collected: ip=2, phone=1, upi=1. Engaged for 300s",
+                      payload["agentNotes"])
+
+        asyncio.run(callback.submit_report("tracked"))
+        projection = self.sessions.find.call_args[0][1]
+        self.assertNotIn("history", projection)
+        self.assertNotIn("extracted_data", projection, "Whole extracted_data read instead of the reported lists")
+        self.sessions.find_one.assert_not_called()
+        print(f"✅ Payload built from {len(projection)} projected fields")
+
+    def test_bulk_force_report(self):
+        print("\n--- Testing Bulk Force-Report ---")
+        self.sessions.find.return_value = [
+            {"_id": "a"}, {"_id": "b", "report_status": "sent"}, {"_id": "c"}, {"_id": "d"}]
+        send = callback.report_client.send
+
+        async def flaky_send(session_id, payload):
+            if session_id == "c":
+                raise ConnectionError("GUVI down")
+            return await send(session_id, payload)
+
+        with patch("app.agent.brain.brain_service.flush_session", new=AsyncMock()) as flush, \
+                patch.object(callback.report_client, "send", flaky_send):
+            response = TestClient(app).post("/admin/force-report", json={"session_ids": ["a", "b", "c", "d", "e"]},
+                                            headers={"x-api-key": "test-key"})
+        body = response.json()
+        self.assertEqual(flush.await_count, 5)
+        self.assertEqual(self.sessions.find.call_count, 1)
+        self.assertEqual(body["results"]["b"], "already_sent")
+        self.assertEqual(body["results"]["e"], "not_found")
+        self.assertEqual(body["summary"], {"sent": 2, "failed": 1, "already_sent": 1, "not_found": 1})
+        self.assertEqual(body["results"]["c"], "failed: ConnectionError: GUVI down")
+        # One bulk_write for every session that went out
+        self.sessions.bulk_write.assert_called_once()
+        self.assertEqual(sorted(self.sent_ids()), sorted(self.stub.reports))
+        print(f"✅ {body['summary']}")
+
+    def test_bulk_force_report_guarded(self):
+        client = TestClient(app)
+        body = {"session_ids": ["a"], "force": True}
+        self.assertEqual(client.post("/admin/force-report", json=body).status_code, 401)
+        self.assertEqual(client.post("/admin/force-report", json=body, headers={"x-api-key": "wrong"}).status_code, 401)
+        with patch.object(callback.settings, "GUVI_API_KEY", None):
+            # No key configured and none sent must not count as a match
+            self.assertEqual(client.post("/admin/force-report", json=body).status_code, 401)
+        too_many = {"session_ids": [f"s{i}" for i in range(callback.settings.REPORT_BULK_MAX + 1)]}
+        self.assertEqual(client.post("/admin/force-report", json=too_many,
+                                     headers={"x-api-key": "test-key"}).status_code, 422)
+        self.sessions.find.assert_not_called()
+
+
+if __name__ == '__main__':
+    unittest.main()
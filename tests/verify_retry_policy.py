@@ -0,0 +1,97 @@
+import sys
+import os
+import time
+import unittest
+from unittest.mock import patch
+
+import httpx
+from groq import InternalServerError, BadRequestError
+
+# Add project root to path
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from app.core.config import settings
+from fakes import REQUEST, FakeGroqClient, call_groq, make_service
+
+
+class ScriptedGroq(FakeGroqClient):
+    """Fake client that plays back a script of outcomes (exceptions, delays or values)."""
+    def __init__(self, name, script):
+        super().__init__()
+        self.name = name
+        self.script = list(script)
+        self.calls = 0
+
+    def create(self, **kwargs):
+        self.calls += 1
+        outcome = self.script.pop(0) if self.script else self.name
+        if isinstance(outcome, Exception):
+            raise outcome
+        if isinstance(outcome, float):
+            time.sleep(outcome)
+            return self.name
+        return outcome
+
+
+def scripted_service(scripts):
+    """One "gen" key per script, in order: {key: [outcome, ...]}."""
+    pending = iter(scripts.values())
+    return make_service({"gen": ",".join(scripts)}, lambda slot: ScriptedGroq(slot.name, next(pending)))
+
+
+def server_error(retry_after=None):
+    headers = {"retry-after": retry_after} if retry_after else {}
+    return InternalServerError("503", response=httpx.Response(503, headers=headers, request=REQUEST), body=None)
+
+
+class TestRetryPolicy(unittest.TestCase):
+    def setUp(self):
+        self.patches = [
+            patch.object(settings, "LLM_BACKOFF_BASE", 0.01),
+            patch.object(settings, "LLM_BACKOFF_CAP", 0.05),
+            patch.object(settings, "LLM_HEDGE_AFTER", 0),
+        ]
+        for p in self.patches:
+            p.start()
+
+    def tearDown(self):
+        for p in self.patches:
+            p.stop()
+
+    def test_transient_errors_are_retried(self):
+        service = scripted_service({"k1": [server_error(), server_error("0.1")]})
+        started = time.time()
+        self.assertEqual(call_groq(service), "gen#0")
+        self.assertEqual(service.key_manager.pools["gen"][0].client.calls, 3)
+        self.assertGreaterEqual(time.time() - started, 0.1, "Retry-After not honored")
+        print("✅ 5xx retried with backoff")
+
+    def test_fatal_errors_are_not_retried(self):
+        bad = BadRequestError("400", response=httpx.Response(400, request=REQUEST), body=None)
+        service = scripted_service({"k1": [bad]})
+        with self.assertRaises(BadRequestError):
+            call_groq(service)
+        self.assertEqual(service.key_manager.pools["gen"][0].client.calls, 1)
+        print("✅ 4xx raised immediately")
+
+    def test_deadline_bounds_retries(self):
+        service = scripted_service({"k1": [server_error("5")] * 5})
+        with patch.object(settings, "LLM_CALL_DEADLINE", 1):
+            started = time.time()
+            with self.assertRaises(Exception):
+                call_groq(service)
+        self.assertLess(time.time() - started, 1, "Slept past the deadline")
+        print("✅ Deadline respected")
+
+    def test_slow_call_is_hedged_on_second_key(self):
+        service = scripted_service({"k1": [2.0], "k2": []})
+        with patch.object(settings, "LLM_HEDGE_AFTER", 0.1):
+            started = time.time()
+            result = call_groq(service)
+        self.assertEqual(result, "gen#1")
+        self.assertLess(time.time() - started, 1)
+        print("✅ Slow call hedged")
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -1,13 +1,58 @@
 import sys
 import os
+import asyncio
+import copy
 import unittest
-from unittest.mock import MagicMock, patch
+from unittest.mock import AsyncMock, MagicMock, patch
 
 # Add project root to path
 sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
 
 # Import after path fix
 from app.agent.brain import brain_service
+from app.core.config import settings
+from app.database.unit_of_work import SessionUnitOfWork
+from fakes import FakeInsertMany
+
+
+class FakeSessions:
+    """One session document with just enough of update_one's operators for version conflicts."""
+    def __init__(self, doc):
+        self.doc = copy.deepcopy(doc)
+
+    def find_one(self, query, projection=None):
+        return copy.deepcopy(self.doc) if query["_id"] == self.doc["_id"] else None
+
+    def _parent(self, field):
+        *parents, leaf = field.split(".")
+        target = self.doc
+        for part in parents:
+            target = target.setdefault(part, {})
+        return target, leaf
+
+    def update_one(self, query, update):
+        version = query.get("version", self.doc.get("version"))
+        allowed = version["$in"] if isinstance(version, dict) else [version]
+        if query["_id"] != self.doc["_id"] or self.doc.get("version") not in allowed:
+            return MagicMock(matched_count=0)
+        for field, value in update.get("$set", {}).items():
+            target, leaf = self._parent(field)
+            target[leaf] = copy.deepcopy(value)
+        for field, amount in update.get("$inc", {}).items():
+            target, leaf = self._parent(field)
+            target[leaf] = target.get(leaf, 0) + amount
+        for field, value in update.get("$max", {}).items():
+            target, leaf = self._parent(field)
+            target[leaf] = max(target.get(leaf, value), value)
+        for field, spec in update.get("$addToSet", {}).items():
+            target, leaf = self._parent(field)
+            values = target.setdefault(leaf, [])
+            values.extend(v for v in spec["$each"] if v not in values)
+        for field, spec in update.get("$push", {}).items():
+            target, leaf = self._parent(field)
+            target[leaf] = (target.get(leaf, []) + spec["$each"])[spec.get("$slice", -10**9):]
+        return MagicMock(matched_count=1)
+
 
 class TestStorageLogic(unittest.TestCase):
     def setUp(self):
@@ -76,5 +121,305 @@ class TestStorageLogic(unittest.TestCase):
         self.assertIn(expected_otp, added_items)
         print("✅ Dynamic intel update correct (stored as objects)")
 
+    def _mock_turn(self, mock_db, mock_llm):
+        mock_collection = MagicMock()
+        mock_db.get_collection.return_value = mock_collection
+        mock_collection.find_one.return_value = None
+        mock_llm.classify_scam.return_value = True
+        mock_llm.generate_persona.return_value = "scam persona"
+        mock_llm.extract_regex_tier.return_value = ({"upi": ["crook@okaxis"]}, False)
+        mock_llm.is_degraded.return_value = False
+        mock_llm.generate_response.return_value = "ok which app?"
+        mock_llm.safety_check.return_value = True
+        return mock_collection
+
+    @patch.object(brain_service.session_cache, 'max_entries', 0)
+    @patch('app.agent.brain.llm_service')
+    @patch('app.agent.brain.db_instance')
+    def test_turn_is_one_round_trip(self, mock_db, mock_llm):
+        print("\n--- Testing Single Write Per Turn ---")
+        mock_collection = self._mock_turn(mock_db, mock_llm)
+
+        reply = asyncio.run(brain_service.process_turn("new_session", "pay fine to crook@okaxis"))
+
+        self.assertEqual(reply, "ok which app?")
+        self.assertEqual(mock_collection.find_one.call_count, 1)
+        self.assertEqual(mock_collection.update_one.call_count, 0)
+        # New session: the whole turn lands in the insert
+        doc = mock_collection.insert_one.call_args[0][0]
+        self.assertTrue(doc["scam_confirmed"])
+        self.assertEqual(doc["extracted_data"]["upi"], ["crook@okaxis"])
+        self.assertEqual(doc["history"], [{"user": "pay fine to crook@okaxis", "agent": "ok which app?"}])
+        print("✅ New session written once")
+
+        # Existing session: one update_one carrying every operator
+        mock_collection.reset_mock()
+        mock_collection.find_one.return_value = doc
+        asyncio.run(brain_service.process_turn("new_session", "send now"))
+        self.assertEqual(mock_collection.insert_one.call_count, 0)
+        self.assertEqual(mock_collection.update_one.call_count, 1)
+        update_op = mock_collection.update_one.call_args[0][1]
+        print(f"Update Op: {update_op}")
+        self.assertIn("strategy_state.targets", update_op["$set"])
+        self.assertEqual(update_op["$push"]["history"]["$each"][0]["user"], "send now")
+        print("✅ Existing session written once")
+
+    @patch.object(brain_service.session_cache, 'max_entries', 0)
+    @patch('app.agent.brain.llm_service')
+    @patch('app.agent.brain.db_instance')
+    def test_extraction_llm_tier_waits_for_scam(self, mock_db, mock_llm):
+        self._mock_turn(mock_db, mock_llm)
+        mock_llm.extract_regex_tier.return_value = ({}, True)  # regexes left entity-like text
+        mock_llm.extract_llm_tier.return_value = {"phone": ["9876543210"]}
+        mock_llm.classify_scam.return_value = False
+        asyncio.run(brain_service.process_turn("safe_session", "call me at nine eight seven six"))
+        mock_llm.extract_llm_tier.assert_not_called()
+
+        mock_llm.classify_scam.return_value = True
+        asyncio.run(brain_service.process_turn("scam_session", "call me at nine eight seven six"))
+        mock_llm.extract_llm_tier.assert_called_once_with("call me at nine eight seven six", {})
+
+    @patch.object(brain_service.session_cache, 'max_entries', 0)
+    @patch('app.agent.brain.llm_service')
+    @patch('app.agent.brain.db_instance')
+    def test_report_fields_per_turn(self, mock_db, mock_llm):
+        print("\n--- Testing Incremental Report Fields ---")
+        mock_collection = self._mock_turn(mock_db, mock_llm)
+
+        asyncio.run(brain_service.process_turn("report_session", "pay fine to crook@okaxis"))
+        doc = mock_collection.insert_one.call_args[0][0]
+        self.assertEqual(doc["report"]["messages"], 2)
+        self.assertEqual(doc["report"]["intel_counts"], {"upi": 1})
+        self.assertEqual(doc["report"]["focus"], doc["strategy_state"]["detail_on_focus"])
+
+        # Same UPI again plus a new phone: counters move with the turn's single update
+        mock_collection.find_one.return_value = doc
+        mock_llm.extract_regex_tier.return_value = ({"upi": ["crook@okaxis"], "phone": ["9876543210"]}, False)
+        asyncio.run(brain_service.process_turn("report_session", "call 9876543210"))
+        update_op = mock_collection.update_one.call_args[0][1]
+        self.assertEqual(update_op["$inc"]["report.messages"], 2)
+        self.assertEqual(update_op["$inc"]["report.intel_counts.phone"], 1)
+        self.assertNotIn("report.intel_counts.upi", update_op["$inc"])
+        self.assertIn("report.last_seen", update_op["$set"])
+        self.assertIn("report.focus", update_op["$set"])
+        print(f"✅ Report counters in the turn's write: {update_op['$inc']}")
+
+    @patch('app.agent.brain.db_instance')
+    def test_legacy_history_moved_once(self, mock_db):
+        sessions, turns = MagicMock(), FakeInsertMany("session_turns")
+        mock_db.get_collection.side_effect = lambda name: turns if name == "session_turns" else sessions
+        history = [{"user": f"msg {i}", "agent": "ok"} for i in range(15)]
+        # Two workers load the legacy session before either has trimmed it
+        sessions.find_one.side_effect = lambda query: {"_id": "legacy", "history": list(history), "report": {}}
+        for _ in range(2):
+            state, _ = brain_service.load_session("legacy")
+            brain_service.session_cache.invalidate("legacy")
+        self.assertEqual(sorted(doc["turn"] for doc in turns.stored.values()), list(range(15)))
+        self.assertEqual((state["turn_count"], len(state["history"])), (15, settings.HISTORY_WINDOW))
+
+    @patch('app.agent.brain.db_instance')
+    def test_legacy_session_report_seeded(self, mock_db):
+        mock_collection = MagicMock()
+        mock_db.get_collection.return_value = mock_collection
+        mock_collection.find_one.return_value = {
+            "_id": "old_session", "turn_count": 5, "created_at": 100.0,
+            "extracted_data": {"upi": ["a@ok", "b@ok"], "dynamic_intel": [{"type": "otp", "value": "1"}]},
+            "strategy_state": {"detail_on_focus": "phone"}}
+        state, _ = brain_service.load_session("old_session")
+        brain_service.session_cache.invalidate("old_session")
+        query, update = mock_collection.update_one.call_args[0]
+        self.assertEqual(query, {"_id": "old_session", "report": {"$exists": False}})
+        report = update["$set"]["report"]
+        self.assertEqual((report["messages"], report["intel_counts"], report["first_seen"], report["focus"]),
+                         (10, {"upi": 2, "otp": 1}, 100.0, "phone"))
+        self.assertIs(state["report"], report)
+
+    @patch.object(brain_service.session_cache, 'max_entries', 0)
+    @patch('app.agent.brain.planner_service.is_mission_complete', return_value=True)
+    @patch('app.agent.brain.job_queue')
+    @patch('app.agent.brain.llm_service')
+    @patch('app.agent.brain.db_instance')
+    def test_report_queued_once(self, mock_db, mock_llm, mock_jobs, _):
+        print("\n--- Testing Report Queued Once Per Session ---")
+        mock_collection = self._mock_turn(mock_db, mock_llm)
+        mock_jobs.enqueue = AsyncMock()
+
+        asyncio.run(brain_service.process_turn("finished_session", "pay fine to crook@okaxis"))
+        doc = mock_collection.insert_one.call_args[0][0]
+        self.assertEqual(doc["report_status"], "queued")
+        mock_collection.find_one.return_value = doc
+        asyncio.run(brain_service.process_turn("finished_session", "did you pay?"))
+
+        reports = [c for c in mock_jobs.enqueue.call_args_list if c[0][0] == "report"]
+        self.assertEqual(len(reports), 1)
+        self.assertEqual(reports[0][1]["dedupe_key"], "report:finished_session")
+        print("✅ Later turns of a finished mission don't re-report")
+
+    @patch('app.agent.brain.llm_service')
+    @patch('app.agent.brain.db_instance')
+    def test_write_behind_cache(self, mock_db, mock_llm):
+        print("\n--- Testing Write-Behind Session Cache ---")
+        mock_collection = self._mock_turn(mock_db, mock_llm)
+
+        async def conversation():
+            for text in ("pay fine to crook@okaxis", "hurry up", "send now"):
+                await brain_service.process_turn("cached_session", text)
+            writes_before_flush = mock_collection.insert_one.call_count + mock_collection.update_one.call_count
+            await brain_service.flush_sessions(force=True)
+            return writes_before_flush
+
+        writes_before_flush = asyncio.run(conversation())
+        self.assertEqual(mock_collection.find_one.call_count, 1, "Cached session re-read from Mongo")
+        self.assertEqual(writes_before_flush, 0, "Writes were not deferred")
+        doc = mock_collection.insert_one.call_args[0][0]
+        self.assertEqual(len(doc["history"]), 3)
+        self.assertEqual(mock_collection.update_one.call_count, 0)
+        brain_service.session_cache.invalidate("cached_session")
+        print("✅ Three turns, one read, one write")
+
+    @patch('app.agent.brain.db_instance')
+    def test_history_window_is_capped(self, mock_db):
+        print("\n--- Testing Capped History Window ---")
+        mock_collection = MagicMock()
+        mock_db.get_collection.return_value = mock_collection
+        state = {"_id": "long_session", "history": [], "turn_count": 0}
+        uow = SessionUnitOfWork(mock_collection, "long_session", version=0)
+
+        with patch.object(settings, "HISTORY_WINDOW", 3):
+            for i in range(5):
+                brain_service.save_interaction(state, f"msg {i}", f"reply {i}", uow)
+        uow.flush()
+
+        self.assertEqual([t["user"] for t in state["history"]], ["msg 2", "msg 3", "msg 4"])
+        self.assertEqual(state["turn_count"], 5)
+        update_op = mock_collection.update_one.call_args[0][1]
+        self.assertEqual(update_op["$push"]["history"]["$slice"], -3)
+        self.assertEqual(update_op["$inc"], {"turn_count": 5, "report.messages": 10, "version": 1})
+        # Every turn still goes to the log, in one insert
+        logged = mock_collection.insert_many.call_args[0][0]
+        self.assertEqual([t["turn"] for t in logged], [0, 1, 2, 3, 4])
+        print("✅ Window capped, full transcript logged")
+
+    @patch.object(brain_service.session_cache, 'max_entries', 0)
+    @patch('app.agent.brain.llm_service')
+    @patch('app.agent.brain.db_instance')
+    def test_rolling_summary(self, mock_db, mock_llm):
+        print("\n--- Testing Rolling Summary ---")
+        mock_collection = MagicMock()
+        mock_db.get_collection.return_value = mock_collection
+        history = [{"user": f"msg {i}", "agent": f"reply {i}"} for i in range(2, 12)]
+        state = {"_id": "chatty", "version": 4, "history": history, "turn_count": 12,
+                 "summary": "old summary", "summary_upto": 2}
+        mock_collection.find_one.return_value = state
+        mock_llm.summarize_conversation.return_value = "new summary"
+
+        with patch.object(settings, "PROMPT_TURNS", 3), patch.object(settings, "SUMMARY_EVERY", 4):
+            asyncio.run(brain_service.run_summarizer("chatty"))
+
+        previous, turns = mock_llm.summarize_conversation.call_args[0]
+        self.assertEqual(previous, "old summary")
+        self.assertEqual([t["user"] for t in turns], [f"msg {i}" for i in range(2, 9)])
+        update_op = mock_collection.update_one.call_args[0][1]
+        self.assertEqual(update_op["$set"], {"summary": "new summary", "summary_upto": 9})
+        # Only turns after the summary are sent raw
+        self.assertEqual([t["user"] for t in brain_service._prompt_history(state)], ["msg 9", "msg 10", "msg 11"])
+        print("✅ Old turns folded into the summary")
+
+        # A failed fold is retried by the job instead of being dropped; the cursor stays put
+        mock_collection.update_one.reset_mock()
+        mock_llm.summarize_conversation.return_value = None
+        state.update(summary="old summary", summary_upto=2)
+        with patch.object(settings, "PROMPT_TURNS", 3), patch.object(settings, "SUMMARY_EVERY", 4):
+            with self.assertRaises(RuntimeError):
+                asyncio.run(brain_service.run_summarizer("chatty"))
+        mock_collection.update_one.assert_not_called()
+        self.assertEqual(state["summary_upto"], 2)
+
+    def test_summary_batch_fits_window(self):
+        settings.validate()  # defaults
+        with patch.object(settings, "PROMPT_TURNS", 3), patch.object(settings, "SUMMARY_EVERY", 8), \
+                patch.object(settings, "HISTORY_WINDOW", 10):
+            with self.assertRaises(ValueError):
+                settings.validate()
+
+    def test_version_conflict_is_detected(self):
+        collection = MagicMock()
+        collection.update_one.return_value.matched_count = 0
+        collection.find_one.return_value = None
+        uow = SessionUnitOfWork(collection, "s1", version=3)
+        uow.push("history", {"user": "u", "agent": "a"})
+        self.assertFalse(uow.flush(), "Stale version not reported")
+        first, second = collection.update_one.call_args_list
+        self.assertEqual(first[0][0], {"_id": "s1", "version": 3})
+        self.assertEqual(first[0][1]["$inc"], {"version": 1})
+        # Nothing to rebase onto: the commutative part ($push) is still written, without the guard
+        self.assertEqual(second[0][0], {"_id": "s1"})
+        print("✅ Version conflict detected")
+
+    def test_turn_log_failure_does_not_block_session(self):
+        print("\n--- Testing Partial Turn-Log Failure ---")
+        turns = FakeInsertMany("session_turns")
+        sessions = MagicMock()
+        uow = SessionUnitOfWork(sessions, "s1")
+        for i in range(4):
+            uow.append(turns, {"turn": i})
+        uow.inc("turn_count", 4)
+
+        turns.fail_after = 2  # connection drops after two of the four documents
+        self.assertTrue(uow.flush())
+        sessions.update_one.assert_called_once()
+        self.assertTrue(uow.pending, "Unwritten turn-log documents dropped")
+
+        # Next flush: the two stored documents come back as duplicates, the rest go in
+        uow.inc("turn_count")
+        self.assertTrue(uow.flush())
+        self.assertEqual(sessions.update_one.call_count, 2)
+        self.assertEqual(sorted(doc["turn"] for doc in turns.stored.values()), [0, 1, 2, 3])
+        self.assertFalse(uow.pending)
+        print("✅ Session written both times, turn log caught up without duplicates")
+
+    def test_conflicting_writers_rebase(self):
+        print("\n--- Testing Version Conflict Rebase ---")
+        sessions = FakeSessions({
+            "_id": "s1", "version": 0, "turn_count": 0, "history": [], "scam_confirmed": False,
+            "extracted_data": {"ip": []}, "strategy_state": {"detail_on_focus": None},
+            "report": {"messages": 0, "last_seen": 1.0},
+        })
+        # Two workers loaded version 0
+        first = SessionUnitOfWork(sessions, "s1", version=0)
+        second = SessionUnitOfWork(sessions, "s1", version=0)
+        for uow, ip, focus, seen in ((first, "1.1.1.1", "upi", 5.0), (second, "2.2.2.2", "phone", 3.0)):
+            uow.push("history", {"user": f"to {focus}"})
+            uow.inc("turn_count")
+            uow.inc("report.messages", 2)
+            uow.set("extracted_data.ip", [ip])  # whole list from each worker's own copy
+            uow.set("strategy_state.detail_on_focus", focus)
+            uow.set("report.last_seen", seen)
+        second.set("canary_token", "tok")
+
+        self.assertTrue(first.flush())
+        self.assertFalse(second.flush(), "Conflict not reported")
+        doc = sessions.doc
+        # Commutative changes from both, newer plan kept, stale list merged instead of overwriting
+        self.assertEqual((doc["turn_count"], doc["report"]["messages"], len(doc["history"])), (2, 4, 2))
+        self.assertEqual(doc["extracted_data"]["ip"], ["1.1.1.1", "2.2.2.2"])
+        self.assertEqual(doc["strategy_state"]["detail_on_focus"], "upi")
+        self.assertEqual(doc["report"]["last_seen"], 5.0)
+        self.assertEqual(doc["canary_token"], "tok")
+        self.assertEqual((doc["version"], second.version), (2, 2))
+        print(f"✅ Rebased onto the newer document: {doc['extracted_data']}")
+
+    def test_unit_of_work_merges_operators(self):
+        uow = SessionUnitOfWork(MagicMock(), "s1")
+        uow.merge({"$addToSet": {"extracted_data.upi": {"$each": ["a@x"]}}})
+        uow.merge({"$addToSet": {"extracted_data.upi": {"$each": ["a@x", "b@y"]}}})
+        uow.push("history", {"user": "u", "agent": "a"})
+        uow.flush()
+        uow.flush()  # nothing left to write
+        uow.collection.update_one.assert_called_once_with({"_id": "s1"}, {
+            "$addToSet": {"extracted_data.upi": {"$each": ["a@x", "b@y"]}},
+            "$push": {"history": {"$each": [{"user": "u", "agent": "a"}]}}
+        })
+
 if __name__ == '__main__':
     unittest.main()
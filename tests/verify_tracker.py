@@ -0,0 +1,231 @@
+import sys
+import os
+import asyncio
+import unittest
+from unittest.mock import MagicMock, patch
+
+from fastapi.testclient import TestClient
+
+# Add project root to path
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from app.database.hit_buffer import HitBuffer
+from app.database.unit_of_work import SessionUnitOfWork
+from app.agent.brain import brain_service
+from app.agent.canary import CanaryService, canary_service
+from app.agent.planner import planner_service
+from app.agent.session_cache import CachedSession
+from app.api import tracking
+from app.main import app
+from fakes import FakeInsertMany
+
+
+def make_buffer(collection, **kwargs):
+    options = dict(max_size=100, flush_size=10, flush_interval=0.05, max_wait=0.01)
+    options.update(kwargs)
+    return HitBuffer(lambda: collection, **options)
+
+
+class TestHitBuffer(unittest.TestCase):
+    def test_size_and_time_thresholds(self):
+        print("\n--- Testing Hit Buffer Flushing ---")
+        collection = MagicMock()
+        buffer = make_buffer(collection)
+
+        async def scenario():
+            flusher = asyncio.create_task(buffer.run())
+            for i in range(25):
+                await buffer.put({"ip": f"10.0.0.{i}"})
+                await asyncio.sleep(0)
+            # The 5 left over go out on the interval
+            await asyncio.sleep(0.2)
+            flusher.cancel()
+            await asyncio.gather(flusher, return_exceptions=True)
+
+        asyncio.run(scenario())
+        written = [hit["ip"] for call in collection.insert_many.call_args_list for hit in call[0][0]]
+        self.assertEqual(written, [f"10.0.0.{i}" for i in range(25)])
+        self.assertTrue(all(call[1] == {"ordered": False} for call in collection.insert_many.call_args_list))
+        self.assertLess(collection.insert_many.call_count, 25)
+        collection.insert_one.assert_not_called()
+        print(f"✅ 25 hits in {collection.insert_many.call_count} insert_many calls")
+
+    def test_overflow_overwrites_oldest(self):
+        buffer = make_buffer(MagicMock(), max_size=3)
+
+        async def scenario():
+            for i in range(5):
+                await buffer.put({"n": i})
+
+        # No flush loop running: producers wait max_wait, then the ring overwrites
+        asyncio.run(scenario())
+        self.assertEqual([hit["n"] for hit in buffer.hits], [2, 3, 4])
+        self.assertEqual((buffer.stats["overwritten"], buffer.stats["backpressure_waits"]), (2, 2))
+
+    def test_failed_flush_keeps_hits(self):
+        collection = MagicMock()
+        collection.insert_many.side_effect = ConnectionError("mongo down")
+        buffer = make_buffer(collection)
+
+        async def scenario():
+            for i in range(4):
+                await buffer.put({"n": i})
+            await buffer.flush()
+            await buffer.put({"n": 4})
+
+        asyncio.run(scenario())
+        self.assertEqual([hit["n"] for hit in buffer.hits], [0, 1, 2, 3, 4])
+        self.assertEqual(buffer.stats["failed_flushes"], 1)
+
+    def test_partial_flush_not_replayed(self):
+        collection = FakeInsertMany("honey_hits")
+        buffer = make_buffer(collection)
+
+        async def scenario():
+            for i in range(6):
+                await buffer.put({"n": i})
+            collection.fail_after = 3  # connection drops half-way through the batch
+            await buffer.flush()
+            await buffer.put({"n": 6})
+            await buffer.flush()
+
+        asyncio.run(scenario())
+        self.assertEqual(sorted(hit["n"] for hit in collection.stored.values()), list(range(7)))
+        self.assertEqual(len(buffer.hits), 0)
+        self.assertEqual((buffer.stats["written"], buffer.stats["failed_flushes"]), (7, 1))
+
+    def test_route_buffers_hit(self):
+        before = tracking.hit_buffer.stats["accepted"]
+        response = TestClient(app).get("/receipt.pdf", headers={"user-agent": "curl/8"})
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(tracking.hit_buffer.stats["accepted"], before + 1)
+        hit = tracking.hit_buffer.hits[-1]
+        self.assertEqual((hit["path"], hit["user_agent"]), ("receipt.pdf", "curl/8"))
+        tracking.hit_buffer.hits.clear()
+
+
+class TestDecoys(unittest.TestCase):
+    def test_pdf_served_with_etag(self):
+        print("\n--- Testing Decoy Artifacts ---")
+        client = TestClient(app)
+        response = client.get("/r/anything/receipt.pdf")
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.headers["content-type"], "application/pdf")
+        self.assertTrue(response.content.startswith(b"%PDF-1.4"))
+        self.assertEqual(response.headers["content-length"], str(len(tracking.decoys.pdf.body)))
+        etag = response.headers["etag"]
+
+        again = client.get("/r/anything/receipt.pdf", headers={"if-none-match": etag})
+        self.assertEqual((again.status_code, again.content), (304, b""))
+        image = client.get("/proof.JPG")
+        self.assertEqual(image.headers["content-type"], "image/png")
+        self.assertTrue(image.content.startswith(b"\x89PNG"))
+        tracking.hit_buffer.hits.clear()
+        print(f"✅ {len(response.content)} byte PDF, 304 on revalidation")
+
+    def test_pdf_xref_offsets(self):
+        body = tracking.decoys.pdf.body
+        xref = int(body.rsplit(b"startxref\n", 1)[1].split(b"\n")[0])
+        self.assertTrue(body[xref:].startswith(b"xref"))
+        entries = body[xref:].split(b"\n")[3:9]
+        for number, entry in enumerate(entries, start=1):
+            offset = int(entry[:10])
+            self.assertTrue(body[offset:].startswith(f"{number} 0 obj".encode()), f"Bad offset for object {number}")
+
+    def test_fast_path_leaves_app_routes(self):
+        client = TestClient(app)
+        before = tracking.hit_buffer.stats["accepted"]
+        with patch.object(tracking.settings, "GUVI_API_KEY", "test-key"):
+            stats = client.get("/admin/tracker-stats", headers={"x-api-key": "test-key"})
+            for path in ("/admin/tracker-stats", "/admin/jobs", "/admin/jobs/dead", "/admin/llm-stats"):
+                self.assertEqual(client.get(path).status_code, 401, f"{path} served without the API key")
+        self.assertEqual(stats.headers["content-type"], "application/json")
+        self.assertIn("buffer", stats.json())
+        self.assertEqual(tracking.hit_buffer.stats["accepted"], before)
+
+        head = client.head("/invoice.pdf")
+        self.assertEqual((head.status_code, head.content), (200, b""))
+        self.assertEqual(head.headers["etag"], tracking.decoys.pdf.etag)
+        self.assertEqual(tracking.hit_buffer.stats["accepted"], before + 1)
+        tracking.hit_buffer.hits.clear()
+
+    def test_json_mode(self):
+        with patch.object(tracking.settings, "TRACKER_MODE", "json"):
+            response = TestClient(app).get("/receipt.pdf")
+        self.assertEqual(response.json()["error_code"], "PDF_LOAD_FAIL")
+        tracking.hit_buffer.hits.clear()
+
+
+class TestCanaryLinks(unittest.TestCase):
+    def mint(self, session_id):
+        state = {"_id": session_id, "extracted_data": {"ip": None}}
+        uow = SessionUnitOfWork(MagicMock(), session_id)
+        with patch('app.agent.canary.db_instance'):
+            link = canary_service.link_for(state, uow)
+        return state, uow, link
+
+    def test_token_is_signed(self):
+        print("\n--- Testing Canary Tokens ---")
+        state, uow, link = self.mint("canary_session")
+        token = state["canary_token"]
+        self.assertTrue(link.endswith(f"/r/{token}/receipt.pdf"))
+        self.assertEqual(uow.updates["$set"]["canary_token"], token)
+        # The token -> session mapping is stored with the turn's flush
+        appended = [doc for _, docs in uow.appends.values() for doc in docs]
+        self.assertEqual(appended, [{"_id": token, "session_id": "canary_session", "created_at": appended[0]["created_at"]}])
+        self.assertEqual(canary_service.token_from_path(f"r/{token}/receipt.pdf"), token)
+        forged = token[:-1] + ("A" if token[-1] != "A" else "B")
+        self.assertIsNone(canary_service.token_from_path(f"r/{forged}/receipt.pdf"), "Forged token accepted")
+        self.assertIsNone(canary_service.token_from_path("wp-admin/setup-config.php"))
+        # Minted once per session
+        self.assertEqual(self.mint_again(state), link)
+        print(f"✅ {link}")
+
+    def mint_again(self, state):
+        with patch('app.agent.canary.db_instance'):
+            return canary_service.link_for(state, SessionUnitOfWork(MagicMock(), state["_id"]))
+
+    @patch('app.agent.brain.db_instance')
+    def test_hit_completes_ip_objective(self, mock_db):
+        print("\n--- Testing Canary Hit Attribution ---")
+        sessions = MagicMock()
+        mock_db.get_collection.return_value = sessions
+        state, _, link = self.mint("cold_session")
+        path = link.split("/", 3)[3]
+        client = TestClient(app)
+        for _ in range(3):
+            self.assertEqual(client.get("/" + path, headers={"user-agent": "Mozilla/5.0"}).status_code, 200)
+
+        # One atomic update however often the scammer reloads the link
+        sessions.update_one.assert_called_once()
+        query, pipeline = sessions.update_one.call_args[0]
+        self.assertEqual(query, {"_id": "cold_session"})
+        self.assertEqual(pipeline[0]["$set"]["extracted_data.ip"],
+                         {"$setUnion": [{"$ifNull": ["$extracted_data.ip", []]}, ["testclient"]]})
+        self.assertEqual(tracking.hit_buffer.hits[-1]["session_id"], "cold_session")
+        tracking.hit_buffer.hits.clear()
+        print("✅ Hit attributed with one update")
+
+    def test_cached_session_sees_hit(self):
+        state, uow, _ = self.mint("hot_canary")
+        state["strategy_state"] = {"targets": {}}
+        brain_service.session_cache.put("hot_canary", CachedSession(state, uow))
+        try:
+            asyncio.run(brain_service.record_canary_hit("hot_canary", "198.51.100.4", "curl/8"))
+        finally:
+            brain_service.session_cache.invalidate("hot_canary")
+        self.assertEqual(state["extracted_data"]["ip"], ["198.51.100.4"])
+        self.assertEqual(uow.updates["$set"]["extracted_data.ip"], ["198.51.100.4"])
+        self.assertTrue(planner_service._check_success(state, "ip"))
+
+    def test_unset_secret_is_random(self):
+        first, second = (CanaryService("", "http://x", 10) for _ in range(2))
+        self.assertEqual(len(first.secret), 64)
+        self.assertNotEqual(first.secret, second.secret)
+
+    def test_stalling_reply_carries_link(self):
+        self.assertTrue(planner_service.get_stalling_reply("ip", "http://x/r/t/receipt.pdf").endswith("receipt.pdf"))
+
+
+if __name__ == '__main__':
+    unittest.main()